@@ -0,0 +1,174 @@
+class BacklightController:
+    """Adapt the backlight to the ambient light. The light sensor is
+    smoothed with an exponential moving average and mapped to a
+    brightness through a curve of (light, brightness) points. The
+    backlight is only written if the smoothed light moved by more than
+    the hysteresis since the last write and the brightness changes by at
+    least min_step, so it neither flickers nor writes the PWM needlessly.
+    An override (e.g. the Dim button) takes precedence over the sensor."""
+
+    # Light sensor value -> brightness, linear in between
+    DEFAULT_CURVE = ((0, 0.05), (1000, 0.15), (10000, 0.55), (40000, 1.0))
+
+    def __init__(
+        self,
+        light_sensor,
+        set_backlight,
+        curve=DEFAULT_CURVE,
+        alpha=0.2,
+        hysteresis=0.1,
+        min_step=0.05,
+        debug=False,
+    ):
+        """Constructor
+
+        Arguments:
+            light_sensor {analogio.AnalogIn} -- light sensor (board.LIGHT)
+            set_backlight {function} -- called with the new brightness
+                between 0 and 1 (e.g. PyPortal.set_backlight)
+
+        Keyword Arguments:
+            curve {tuple} -- (light, brightness) points sorted by light
+                (default: {DEFAULT_CURVE})
+            alpha {float} -- Weight of a new sample in the moving average
+                (default: {0.2})
+            hysteresis {float} -- Relative change of the smoothed light
+                needed before the brightness is adapted (default: {0.1})
+            min_step {float} -- Smallest brightness change that is
+                written (default: {0.05})
+            debug {bool} -- Show debug information (default: {False})
+        """
+        self._debug_mode = debug
+        self._light_sensor = light_sensor
+        self._set_backlight = set_backlight
+
+        self.curve = curve
+        self.alpha = alpha
+        self.hysteresis = hysteresis
+        self.min_step = min_step
+
+        self.light = None
+        self._written_light = None
+        self.brightness = None
+        self._override = None
+
+        self.writes = 0
+
+    def log(self, text):
+        """Simple logger
+
+        Arguments:
+            text {string} -- Display text
+        """
+        if self._debug_mode:
+            print(text)
+
+    @property
+    def override(self):
+        """Brightness forced by the override, None while the sensor is
+        used"""
+        return self._override
+
+    @override.setter
+    def override(self, brightness):
+        """Force a brightness, None goes back to the sensor
+
+        Arguments:
+            brightness {float} -- brightness between 0 and 1 or None
+        """
+        self._override = brightness
+
+        if brightness is None:
+            # Adapt to the current light right away
+            self._written_light = None
+            self.brightness = None
+            self.update(sample=False)
+        else:
+            self._write(brightness)
+
+    def toggle_off(self):
+        """Switch the backlight off or back to automatic (Dim button)
+
+        Returns:
+            bool -- True if the backlight is on afterwards
+        """
+        self.override = None if self._override == 0 else 0
+        return self._override is None
+
+    def update(self, sample=True):
+        """Sample the light sensor and adapt the brightness if needed.
+        Call it regularly, e.g. twice per second.
+
+        Keyword Arguments:
+            sample {bool} -- Read the sensor, False just reevaluates the
+                current average (default: {True})
+
+        Returns:
+            bool -- True if the backlight was written
+        """
+        if sample:
+            value = self._light_sensor.value
+            if self.light is None:
+                self.light = value
+            else:
+                self.light += self.alpha * (value - self.light)
+
+        if self._override is not None or self.light is None:
+            return False
+
+        if self._written_light is not None and abs(
+            self.light - self._written_light
+        ) <= self.hysteresis * max(self._written_light, 1):
+            return False
+
+        brightness = self.map(self.light)
+
+        if (
+            self.brightness is not None
+            and abs(brightness - self.brightness) < self.min_step
+        ):
+            return False
+
+        self._written_light = self.light
+        return self._write(brightness)
+
+    def map(self, light):
+        """Map a light value to a brightness through the curve
+
+        Arguments:
+            light {float} -- light sensor value
+
+        Returns:
+            float -- brightness
+        """
+        points = self.curve
+
+        if light <= points[0][0]:
+            return points[0][1]
+
+        for index in range(1, len(points)):
+            if light <= points[index][0]:
+                x0, y0 = points[index - 1]
+                x1, y1 = points[index]
+                return y0 + (y1 - y0) * (light - x0) / (x1 - x0)
+
+        return points[-1][1]
+
+    def _write(self, brightness):
+        """Write the brightness, if it changed
+
+        Arguments:
+            brightness {float} -- brightness
+
+        Returns:
+            bool -- True if the backlight was written
+        """
+        if brightness == self.brightness:
+            return False
+
+        self._set_backlight(brightness)
+        self.brightness = brightness
+        self.writes += 1
+        self.log(f"Backlight set to {brightness:.2f}")
+
+        return True
@@ -1,26 +1,47 @@
 import time
 
-from adafruit_bitmap_font import bitmap_font
 from adafruit_button import Button
 from adafruit_hid.keycode import Keycode
+from glyph_atlas import load_font
+from hid_macro import Macro
+from hit_index import HitTestIndex
+from mem_trace import MemTrace
 
 
 class ButtonController:
     BUTTON_PADDING = 8
 
-    def __init__(self, keyboard, screen_width=480, screen_height=320, debug=False):
+    # Time a pressed button stays selected. Touches in that time are
+    # ignored to avoid pressing two buttons on accident.
+    RELEASE_DELAY = 0.2
+
+    def __init__(
+        self,
+        sender,
+        screen_width=480,
+        screen_height=320,
+        render=None,
+        mem_trace=None,
+        debug=False,
+    ):
         """Constructor
 
         Arguments:
-            keyboard {adafruit_hid.keyboard.Keyboard} -- Keyboard instance
+            sender {MacroSender} -- Sends the keyboard macros to the host
 
         Keyword Arguments:
             screen_width {int} -- Display width (default: {480})
             screen_height {int} -- Display hight (default: {320})
+            render {RenderCoordinator} -- Gets notified about changed
+                buttons (default: {None})
+            mem_trace {MemTrace} -- Records memory usage of button sends
+                (default: {None})
             debug {bool} -- Show debug information (default: {False})
         """
         self._debug_mode = debug
-        self.keyboard = keyboard
+        self.sender = sender
+        self._render = render
+        self._mem_trace = mem_trace or MemTrace(capacity=0)
 
         # Do some pixel math
         self.screen_width = screen_width
@@ -33,8 +54,8 @@ class ButtonController:
             screen_height - self.button_height + ButtonController.BUTTON_PADDING
         )
 
-        # Initialize font
-        self.font = bitmap_font.load_font("/fonts/Helvetica-Bold-16.bdf")
+        # Initialize font (from the precompiled atlas, if there is one)
+        self.font = load_font("/fonts/Helvetica-Bold-16.bdf")
         self.font.load_glyphs(
             b"abcdefghjiklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890- ()"
         )
@@ -42,12 +63,17 @@ class ButtonController:
 
         self.buttons = []
 
+        # Button currently shown as pressed and when to release it
+        self._pressed_button = None
+        self._release_time = 0
+
         # Initialize Buttons with a Bitton Object and the related
-        # keyboard shortcut to be sent to the host
+        # keyboard shortcut to be sent to the host. The shortcuts are
+        # compiled into HID reports right here, not on every press.
         self.buttons.append(
             (
                 self._create_button("Developer\n   Scene"),
-                (
+                Macro.chord(
                     Keycode.COMMAND,
                     Keycode.CONTROL,
                     Keycode.OPTION,
@@ -60,7 +86,7 @@ class ButtonController:
         self.buttons.append(
             (
                 self._create_button("Web Developer\n       Scene"),
-                (
+                Macro.chord(
                     Keycode.COMMAND,
                     Keycode.CONTROL,
                     Keycode.OPTION,
@@ -73,7 +99,7 @@ class ButtonController:
         self.buttons.append(
             (
                 self._create_button("Office\nScene"),
-                (
+                Macro.chord(
                     Keycode.COMMAND,
                     Keycode.CONTROL,
                     Keycode.OPTION,
@@ -83,6 +109,12 @@ class ButtonController:
             )
         )
 
+        # Index to find the touched button without testing all of them.
+        # Other widgets (e.g. the dim button) can be registered as well.
+        self.hit_index = HitTestIndex(screen_width, screen_height)
+        for button in self.buttons:
+            self.hit_index.register_button(button[0], target=button)
+
         self.log("Buttons created")
 
     def log(self, text):
@@ -136,24 +168,45 @@ class ButtonController:
     def check_and_send_shortcut_to_host(self, x, y):
         """Check if any button contains the coordinates that where touched.
         If so send the keyboard shortcut belonging to the button (see
-        constructor) to the host.
+        constructor) to the host. The button is released again by
+        release_pressed_button().
 
         Arguments:
             x {int} -- x-coordinate of the touch
             y {int} -- y-coordinate of the touch
         """
-        for button in self.buttons:
-            if button[0].contains((x, y, 65000)):
-                self.log(f"Button {button} pressed")
+        target = self.hit_index.lookup(x, y)
+
+        if isinstance(target, tuple):
+            self.send_shortcut(target)
 
-                button[0].selected = True
+    def send_shortcut(self, button):
+        """Select the button and send its keyboard shortcut to the host
 
-                self.keyboard.send(*button[1])
+        Arguments:
+            button {tuple} -- (Button, Macro) entry of self.buttons
+        """
+        if self._pressed_button is not None:
+            return  # avoid pressing two buttons on accident
+
+        self.log(f"Button {button} pressed")
 
-                # sleep to avoid pressing two buttons on accident
-                time.sleep(0.2)
+        button[0].selected = True
+        if self._render:
+            self._render.invalidate()
 
-                # change the button state again
-                button[0].selected = False
+        with self._mem_trace.span("button send"):
+            self.sender.queue(button[1])
 
-                break
+        self._pressed_button = button[0]
+        self._release_time = time.monotonic() + ButtonController.RELEASE_DELAY
+
+    def release_pressed_button(self):
+        """Change the state of a pressed button back, once its release
+        delay is over. Has to be called regularly from the main loop.
+        """
+        if self._pressed_button is not None and time.monotonic() >= self._release_time:
+            self._pressed_button.selected = False
+            if self._render:
+                self._render.invalidate()
+            self._pressed_button = None
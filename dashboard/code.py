@@ -1,27 +1,43 @@
-import gc
 import time
 from secrets import secrets
 
+import adafruit_esp32spi.adafruit_esp32spi_socket as socket
 import adafruit_touchscreen
+import analogio
 import board
 import busio
 import displayio
-import supervisor
 import usb_hid
-from adafruit_bitmap_font import bitmap_font
 from adafruit_button import Button
 from adafruit_display_text.label import Label
 from adafruit_esp32spi import adafruit_esp32spi
-from adafruit_hid.keyboard import Keyboard
 from adafruit_pyportal import PyPortal
+from audio_feedback import AudioFeedback
+from backlight_controller import BacklightController
 from button_controller import ButtonController
 from digitalio import DigitalInOut
 from fritz_box import FritzboxStatus
+from glyph_atlas import load_font
+from hid_macro import MacroSender
+from image_cache import ImageCache
+from json_stream import JsonPathExtractor
+from loop_profiler import LoopProfiler
+from mem_trace import MemTrace
+from memory_guard import MemoryGuard
+from poll_scheduler import PollScheduler
+from quote_store import QuoteStore
+from render_coordinator import RenderCoordinator
 from status_icon_controller import StatusIconController
+from task_loop import TaskLoop
+from touch_filter import TouchFilter
+from text_layout import layout_text
 
 # -------------------- Initialize some static values -------------------
 DEBUG_MODE = False
 
+# Print latency histograms of the main loop tasks every minute
+PROFILE_LOOP = False
+
 SCREEN_WIDTH = 480
 SCREEN_HEIGHT = 320
 
@@ -32,30 +48,33 @@ esp32_gpio0 = DigitalInOut(board.ESP_GPIO0)
 
 BEEP_SOUND_FILE = "/sounds/beep.wav"
 
+# The quotes API over HTTPS. HTTP/1.0, so the server closes the
+# connection after the response and doesn't send it in chunks.
+QUOTE_HOST = "www.adafruit.com"
+QUOTE_REQUEST = b"GET /api/quotes.php HTTP/1.0\r\nHost: www.adafruit.com\r\n\r\n"
+QUOTE_TIMEOUT = 10
+QUOTE_PATHS = ([0, "text"], [0, "author"])
 
-# -------------------- Some helper functions ---------------------------
-def log(text):
-    if DEBUG_MODE:
-        print(text)
+# Wrapped quotes are kept on the SD card, PyPortal mounts it to /sd
+QUOTE_STORE_FILE = "/sd/quotes.dat"
 
+# Show the next quote from the store every hour
+QUOTE_DISPLAY_PERIOD = 3600
 
-def set_image(group, filename):
-    if not filename:
-        return  # we're done, no icon desired
 
-    image_file = open(filename, "rb")
-    image = displayio.OnDiskBitmap(image_file)
+# Memory usage per stage, dumped over serial in debug mode. Without debug
+# mode the trace is disabled.
+mem_trace = MemTrace(capacity=64 if DEBUG_MODE else 0, debug=DEBUG_MODE)
+
+# Releases caches and buffers when memory gets low and retries what ran
+# out of memory, instead of reloading the board
+memory_guard = MemoryGuard(low_water=16384, mem_trace=mem_trace, debug=DEBUG_MODE)
 
-    try:
-        image_sprite = displayio.TileGrid(
-            image, pixel_shader=displayio.ColorConverter()
-        )
-    except TypeError:
-        image_sprite = displayio.TileGrid(
-            image, pixel_shader=displayio.ColorConverter(), position=(0, 0)
-        )
 
-    group.append(image_sprite)
+# -------------------- Some helper functions ---------------------------
+def log(text):
+    if DEBUG_MODE:
+        print(text)
 
 
 # -------------------- Initialize the board ----------------------------
@@ -81,17 +100,27 @@ log("Connected to: " + str(esp.ssid, "utf-8"))
 pyportal = PyPortal(
     esp=esp,
     external_spi=spi,
-    url="https://www.adafruit.com/api/quotes.php",  # Only used for the quotes
-    json_path=([0, "text"], [0, "author"]),
     debug=DEBUG_MODE,
 )
 pyportal.set_background("/images/fractal_loading.bmp")
+socket.set_interface(esp)
 log("Pyportal initialized")
 
+# The beep is played from RAM and doesn't block the shortcut
+audio = AudioFeedback(
+    pyportal.audio, speaker_enable=pyportal._speaker_enable, debug=DEBUG_MODE
+)
+audio.load("beep", BEEP_SOUND_FILE)
+
 # Display setup
 display = board.DISPLAY
 display.rotation = 0
-display.auto_brightness = True
+
+# Refreshes are done by the render coordinator, only after changes and
+# at most 10 times per second. Show the loading screen right away.
+render = RenderCoordinator(display, max_fps=10, debug=DEBUG_MODE)
+render.invalidate()
+render.flush()
 log("Display initialized")
 
 # Touchscreen setup
@@ -108,24 +137,39 @@ log("Touchscreen initialized")
 # Keyboard setup
 try:
     # Initialize with the available USB devices. The constructur picks the
-    # correct one from the list
-    keyboard = Keyboard(usb_hid.devices)
+    # correct one from the list. Reports are sent once per USB poll.
+    keyboard = MacroSender(usb_hid.devices, poll_interval=0.01, debug=DEBUG_MODE)
     keyboard_active = True
     log("Keyboard activated")
-except OSError:
+except (OSError, ValueError):
+    keyboard = None
     keyboard_active = False
     log("No keyboard found")
 
 # Display Groups + Background Image
 main_group = displayio.Group(max_size=15)
-set_image(main_group, "/images/fractal.bmp")
+image_cache = ImageCache(debug=DEBUG_MODE)
+main_group.append(image_cache.get("/images/fractal.bmp"))
 
 
 # -------------------- Setup display elements --------------------------
-fritz_status = FritzboxStatus(pyportal, debug=DEBUG_MODE)
-status_icon_controller = StatusIconController(debug=DEBUG_MODE)
+fritz_status = FritzboxStatus(
+    pyportal, mem_trace=mem_trace, memory_guard=memory_guard, debug=DEBUG_MODE
+)
+status_icon_controller = StatusIconController(
+    image_cache=image_cache,
+    sprite_sheet="/images/status_icons.bmp",
+    render=render,
+    mem_trace=mem_trace,
+    debug=DEBUG_MODE,
+)
 button_controller = ButtonController(
-    keyboard, screen_width=SCREEN_WIDTH, screen_height=SCREEN_HEIGHT, debug=DEBUG_MODE
+    keyboard,
+    screen_width=SCREEN_WIDTH,
+    screen_height=SCREEN_HEIGHT,
+    render=render,
+    mem_trace=mem_trace,
+    debug=DEBUG_MODE,
 )
 
 # Append the status icons to the main scene and set the ones we already know
@@ -152,13 +196,13 @@ dim_button = Button(
     style=Button.ROUNDRECT,
 )
 main_group.append(dim_button.group)
+button_controller.hit_index.register_button(dim_button)
 
 # Quote text area
-quote_font = bitmap_font.load_font("/fonts/Arial-ItalicMT-23.bdf")
+quote_font = load_font("/fonts/Arial-ItalicMT-23.bdf")
 quote_font.load_glyphs(
     b"abcdefghjiklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890- ()"
 )
-quote_font_hight = Label(quote_font, text="M", color=0x03AD31, max_glyphs=10)
 
 quote_label = Label(quote_font, text="Loading Quote...", color=0xFED73F, max_glyphs=500)
 quote_label.x = 10
@@ -167,103 +211,311 @@ main_group.append(quote_label)
 
 
 # ------------- Initialize some helpers for the main loop --------------
-# We collect 3 points to simulate a debounced button press. In addition
-# the first touch point usually is not correct, so we discard that
-point_list = []
+# Touch screen sample period in seconds
+TOUCH_SAMPLE_PERIOD = 0.01
+
+# A touch has to last 20ms to be a press, the position is the median of
+# the last 5 samples (drops the usually wrong first one)
+touch_filter = TouchFilter(size=5, settle_ms=20, debug=DEBUG_MODE)
+
+# Check the dsl every 15 seconds. While it's gone, retry after two
+# seconds and back off up to one minute. A recovery is confirmed by a
+# second check shortly after. At most 600 checks per hour.
+dsl_scheduler = PollScheduler(
+    15,
+    retry_period=2,
+    max_period=60,
+    confirm_period=2,
+    budget=600,
+    debug=DEBUG_MODE,
+)
+
+# Quotes are fetched in the background into the store and displayed
+# from there. While it's filling up, fetch a quote every minute (quotes
+# that are too long are just skipped), retry failed fetches after one
+# minute and back off up to half an hour.
+quote_store = QuoteStore(QUOTE_STORE_FILE, capacity=8, debug=DEBUG_MODE)
+quote_scheduler = PollScheduler(
+    60, retry_period=60, max_period=1800, budget=10, debug=DEBUG_MODE
+)
+
+# The backlight follows the ambient light, the Dim button switches it
+# off and back to automatic
+backlight = BacklightController(
+    analogio.AnalogIn(board.LIGHT), pyportal.set_backlight, debug=DEBUG_MODE
+)
+backlight.update()
+
+# What can be given up when memory gets low, from cheap to expensive:
+# images that are not shown and glyphs are loaded again when needed,
+# seen quotes are replaced by new ones, the beep starts a bit later when
+# it's streamed from the file
+memory_guard.register("image cache", image_cache.clear, level=1)
+if hasattr(quote_font, "clear"):
+    memory_guard.register("quote glyphs", quote_font.clear, level=1)
+memory_guard.register("seen quotes", quote_store.drop_seen, level=2)
+memory_guard.register("preloaded sounds", audio.release, level=3)
+
+
+# -------------------- Main loop tasks ---------------------------------
+def fetch_quote_steps():
+    """Fetch a quote and extract text and author while the response
+    arrives in small chunks, instead of parsing the whole JSON document.
+    Reading stops as soon as both are found.
+
+    The task yields while the server prepares the response and between
+    the chunks, so touches are handled in the meantime. Only opening
+    the socket blocks: the ESP32 returns after the TLS handshake.
+
+    Raises:
+        OSError: timeout or the server didn't answer with status 200
+
+    Returns:
+        list -- text and author, None for the ones not found
+    """
+    extractor = JsonPathExtractor(QUOTE_PATHS)
+    quote_socket = socket.socket()
+    # Status line and header until the body starts, None afterwards
+    header = b""
+
+    try:
+        quote_socket.settimeout(QUOTE_TIMEOUT)
+        quote_socket.connect((QUOTE_HOST, 443), esp.TLS_MODE)
+        quote_socket.send(QUOTE_REQUEST)
+        stamp = time.monotonic()
+
+        while True:
+            count = quote_socket.available()
+            if not count:
+                # Every call is a round trip to the ESP32, so only ask
+                # for the connection if nothing arrived
+                if not quote_socket.connected():
+                    break
+                if time.monotonic() - stamp > QUOTE_TIMEOUT:
+                    raise OSError("Timeout waiting for the quote")
+                yield 0.05
+                continue
+
+            chunk = quote_socket.recv(min(count, 64))
+            stamp = time.monotonic()
+
+            if header is not None:
+                header += chunk
+                index = header.find(b"\r\n\r\n")
+                if index < 0:
+                    continue
+                # "HTTP/1.1 200 OK"
+                if header[9:12] != b"200":
+                    raise OSError("Quote request failed: " + str(header[:12]))
+                chunk = header[index + 4 :]
+                header = None
+
+            if extractor.feed(chunk):
+                break
+
+            yield 0
+    finally:
+        quote_socket.close()
+
+    extractor.finish()
+    return extractor.values
+
+
+def quote_steps():
+    """Fetch a quote and wrap it for the quote label
+
+    Raises:
+        ValueError: text or author missing
+
+    Returns:
+        tuple -- wrapped lines, width and height, None if the quote has
+            more than 4 lines
+    """
+    quote_json = yield from fetch_quote_steps()
+    if None in quote_json:
+        raise ValueError("Incomplete quote")
+
+    quote_text = '"' + quote_json[0] + '" - ' + quote_json[1]
+    quote_json = None
+
+    return layout_text(
+        quote_font,
+        quote_text,
+        SCREEN_WIDTH - 2 * quote_label.x,
+        max_lines=4,  # Only show quotes with 4 lines ore less
+    )
+
+
+def handle_touch(event, x, y):
+    """Handle the press events of the touch filter
+
+    Arguments:
+        event {int} -- TouchFilter event
+        x {int} -- filtered x position
+        y {int} -- filtered y position
+    """
+    if event != TouchFilter.PRESS:
+        return
+
+    log("(" + str(x) + "/" + str(y) + ") pressed")
+
+    audio.play("beep")
+
+    target = button_controller.hit_index.lookup(x, y)
+
+    # Shortcut buttons are registered as (Button, Macro)
+    if isinstance(target, tuple):
+        button_controller.send_shortcut(target)
+    elif target is dim_button:
+        print("dim button pressed")
+        backlight.toggle_off()
+
+
+def touch_task():
+    """Sample the touch screen, the filter reports presses to
+    handle_touch()"""
+    while True:
+        touch_filter.update(touch_screen.touch_point)
+        yield TOUCH_SAMPLE_PERIOD
+
+
+def button_release_task():
+    """Release pressed buttons after their release delay"""
+    while True:
+        button_controller.release_pressed_button()
+        yield 0.05
+
+
+def keyboard_task():
+    """Send the queued keyboard reports, one per USB poll"""
+    while True:
+        delay = keyboard.update()
+        yield keyboard.poll_interval if delay is None else delay
+
+
+def audio_task():
+    """Switch the speaker off after a clip"""
+    while True:
+        audio.update()
+        yield 0.1
+
+
+def backlight_task():
+    """Adapt the backlight to the ambient light"""
+    while True:
+        backlight.update()
+        yield 0.5
+
+
+def dsl_task():
+    """Check the dsl status whenever the scheduler says so. The query
+    yields while waiting for the router."""
+    while True:
+        if dsl_scheduler.due():
+            with mem_trace.span("dsl poll"):
+                dsl_status = yield from fritz_status.query_steps(
+                    FritzboxStatus.dsl_actions
+                )
+
+            status_icon_controller.set_dsl_status(dsl_status.connected)
+            dsl_scheduler.report(dsl_status.connected)
+
+        yield dsl_scheduler.delay()
+
+
+def quote_fetch_task():
+    """Fill the quote store in the background. Only quotes with 4 lines
+    or less are stored, already wrapped. Nothing is fetched while the
+    store is full and still has unseen quotes."""
+    while True:
+        if quote_store.full and quote_store.unseen:
+            yield 60
+            continue
+
+        if quote_scheduler.due():
+            quote_fetched = False
+            try:
+                # Retried after each level of resources the memory guard
+                # releases if it runs out of memory
+                with mem_trace.span("quote fetch"):
+                    quote = yield from memory_guard.call_steps(quote_steps)
+
+                quote_fetched = True
+                if quote:
+                    quote_store.add("\n".join(quote[0]))
+            except Exception:
+                log("Couldn't get quote, try again later.")
+            finally:
+                quote = None
+                mem_trace.collect("quote")
+
+            quote_scheduler.report(quote_fetched)
+
+        yield quote_scheduler.delay()
+
+
+def quote_display_task():
+    """Show the next quote from the store every hour, without any
+    network access. Right after a reboot the stored quotes are shown
+    immediately, with an empty store the first fetched one."""
+    while True:
+        quote = quote_store.next()
+
+        if quote is None:
+            yield 1
+            continue
+
+        # The label position relies on the empty first line
+        quote_label.text = "\n" + quote
+        render.invalidate()
+
+        yield QUOTE_DISPLAY_PERIOD
+
+
+def memory_task():
+    """Release caches and buffers when memory gets low"""
+    while True:
+        memory_guard.check()
+        yield 5
+
+
+def render_task():
+    """Refresh the display after changes at a capped frame rate"""
+    last_report = time.monotonic()
+
+    while True:
+        render.flush()
+
+        if DEBUG_MODE and time.monotonic() - last_report > 60:
+            render.report()
+            mem_trace.dump()
+            last_report = time.monotonic()
+
+        yield 1 / render.max_fps
+
+
+profiler = LoopProfiler(report_period=60) if PROFILE_LOOP else None
+task_loop = TaskLoop(profiler=profiler, mem_trace=mem_trace, debug=DEBUG_MODE)
 
-# Initialize the dsl check timer
-current_dsl_check_period = 15
-last_dsl_check = time.monotonic() - 16
+touch_filter.add_listener(handle_touch)
 
-# Initialize the quote check timer
-last_quote_check = time.monotonic() - 3601
+if keyboard_active:
+    task_loop.add("touch", touch_task(), priority=True)
+    task_loop.add("button release", button_release_task())
+    task_loop.add("keyboard", keyboard_task())
 
-# Display Status
-display_on = True
-pyportal.set_backlight(0.55)
+task_loop.add("audio", audio_task())
+task_loop.add("backlight", backlight_task())
+task_loop.add("dsl", dsl_task())
+task_loop.add("quote fetch", quote_fetch_task())
+task_loop.add("quote display", quote_display_task())
+task_loop.add("memory", memory_task())
+task_loop.add("render", render_task())
 
 # -------------------- Start the main loop -----------------------------
 board.DISPLAY.show(main_group)
+render.invalidate()
 
 print("Starting event loop")
 
-while True:
-    # Check dsl status
-    if last_dsl_check + current_dsl_check_period < time.monotonic():
-        """ Only check the dsl every 30 seconds. The check time is decreased
-        to two seconds as soon as dsl is gone and increased back to
-        30 seconds when it's back
-        """
-        dsl_status = fritz_status.get_dsl_status()
-
-        if dsl_status["connected"]:
-            status_icon_controller.set_dsl_status(True)
-            current_dsl_check_period = 15
-        else:
-            status_icon_controller.set_dsl_status(False)
-            current_dsl_check_period = 2
-
-        last_dsl_check = time.monotonic()
-
-    # Load new quote every hour
-    if last_quote_check + 3600 < time.monotonic():
-        try:
-            quote_json = pyportal.fetch()
-            quote_text = '"' + quote_json[0] + '" - ' + quote_json[1]
-            quote = pyportal.wrap_nicely(quote_text, 40)
-
-            # Only show quotes with 4 lines ore less
-            if len(quote) <= 4:
-                new_quote = ""
-                test = ""
-                for w in quote:
-                    new_quote += "\n" + w
-                    test += "M\n"
-                quote_font_hight.text = test  # Odd things happen without this
-                glyph_box = quote_font_hight.bounding_box
-                quote_label.text = ""  # Odd things happen without this
-                quote_label.text = new_quote
-        except MemoryError:
-            supervisor.reload()
-        except:
-            log("Couldn't get quote, try again later.")
-        finally:
-            quote_json = None
-            quote = None
-            quote_text = None
-            gc.collect()
-
-        last_quote_check = time.monotonic()
-
-    # Check keyboard trigger
-    if keyboard_active:
-        point = touch_screen.touch_point
-
-        if point:
-            # append each touch connection to a list
-            point_list.append(point)
-
-            # after three trouch detections have occured.
-            if len(point_list) == 3:
-                # discard the first touch detection and average the other
-                # two get the x,y of the touch
-                x = int((point_list[1][0] + point_list[2][0]) / 2)
-                y = int((point_list[1][1] + point_list[2][1]) / 2)
-                log("(" + str(x) + "/" + str(y) + ") pressed")
-
-                pyportal.play_file(BEEP_SOUND_FILE)
-
-                button_controller.check_and_send_shortcut_to_host(x, y)
-
-                if dim_button.contains((x, y, 65000)):
-                    print("dim button pressed")
-
-                    if display_on:
-                        pyportal.set_backlight(0)
-                    else:
-                        pyportal.set_backlight(0.55)
-
-                    display_on = not display_on
-
-                # clear list for next detection
-                point_list = []
+task_loop.run_forever()
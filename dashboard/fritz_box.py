@@ -1,48 +1,244 @@
-import gc
-import re
 from secrets import secrets
 
 import adafruit_esp32spi.adafruit_esp32spi_socket as socket
-import adafruit_requests as requests
-import supervisor
+from mem_trace import MemTrace
+from memory_guard import MemoryGuard
+from task_loop import run_until_complete
+from upnp_session import UpnpSession, build_request, find, parse_int
 
+# -------------------- Static Values for the SOAP Messages -------------
+FRITZ_HOST = secrets["access_point_ip"]
+FRITZ_PORT = int(secrets["access_point_port"])
+CONTROL_PATH = "/igdupnp/control/"
 
-class FritzboxStatus:
-    """ Encapsulate the FritBox status calls via the upnp protocol"""
-
-    # -------------------- Static Values for the SOAP Messages ---------
-    fritz_url_base = f"http://{secrets['access_point_ip']}:{secrets['access_point_port']}/igdupnp/control/"
-    fritz_soap_action_base = "urn:schemas-upnp-org:service:"
-
-    fritz_soap_connection = (
-        '<?xml version="1.0" encoding="utf-8"?><s:Envelope s:encodingStyle='
-        '"http://schemas.xmlsoap.org/soap/encoding/"xmlns:s='
-        '"http://schemas.xmlsoap.org/soap/envelope/"><s:Body><u:GetStatusInfo '
-        'xmlns:u="urn:schemas-upnp-org:service:WANIPConnection:1">'
-        "</u:GetStatusInfo></s:Body></s:Envelope>"
-    )
+# Pipelined queries in a row that lose a response before pipelining is
+# switched off
+PIPELINING_FAILURES = 3
+
+# Values of the status fields defined by the UPnP IGD specification
+LINK_STATES = ("Up", "Down", "Initializing", "Unavailable")
+CONNECTION_STATES = (
+    "Unconfigured",
+    "Connecting",
+    "Authenticating",
+    "Connected",
+    "PendingDisconnect",
+    "Disconnecting",
+    "Disconnected",
+)
+
+
+class UpnpField:
+    """A field of a SOAP response and how it's read from the receive
+    buffer without decoding it"""
+
+    __slots__ = ("attribute", "field_type", "open_tag", "patterns")
+
+    def __init__(self, tag, attribute, field_type):
+        """Constructor. The byte patterns are built once here.
+
+        Arguments:
+            tag {string} -- XML element, e.g. NewConnectionStatus
+            attribute {string} -- FritzboxStatusResult attribute
+            field_type {type|tuple} -- int, str or a tuple of the known
+                values of a status field (str)
+        """
+        self.attribute = attribute
+        self.field_type = field_type
+        self.open_tag = f"<{tag}>".encode("utf-8")
+
+        # (b"<tag>value<", value) of the known values, matched in place
+        self.patterns = None
+        if isinstance(field_type, tuple):
+            self.patterns = tuple(
+                (f"<{tag}>{value}<".encode("utf-8"), value) for value in field_type
+            )
+
+    def parse(self, buffer, start, end):
+        """Read the field from a response body. Numbers are parsed and
+        known values are matched in the buffer, only other strings are
+        decoded.
+
+        Arguments:
+            buffer {bytearray} -- receive buffer
+            start {int} -- start of the body in the buffer
+            end {int} -- end of the body in the buffer
+
+        Returns:
+            object -- value or None if the body doesn't contain the field
+        """
+        index = find(buffer, self.open_tag, start, end)
+        if index < 0:
+            return None
+
+        if self.field_type is int:
+            return parse_int(buffer, index + len(self.open_tag), end)
+
+        if self.patterns:
+            for pattern, value in self.patterns:
+                if find(buffer, pattern, index, index + len(pattern)) == index:
+                    return value
+
+        value_start = index + len(self.open_tag)
+        value_end = find(buffer, b"<", value_start, end)
+        if value_end < 0:
+            return None
+
+        return str(buffer[value_start:value_end], "utf-8")
+
+
+class UpnpAction:
+    """Declarative description of a UPnP SOAP action and the response
+    fields it provides"""
 
-    fritz_soap_link_status = (
-        '<?xml version="1.0" encoding="utf-8"?><s:Envelope s:encodingStyle='
-        '"http://schemas.xmlsoap.org/soap/encoding/"xmlns:s='
-        '"http://schemas.xmlsoap.org/soap/envelope/"><s:Body>'
-        "<u:GetCommonLinkProperties "
-        'xmlns:u="urn:schemas-upnp-org:service:WANCommonInterfaceConfig:1">'
-        "</u:GetCommonLinkProperties></s:Body></s:Envelope>"
+    __slots__ = ("soapaction", "request", "fields")
+
+    soap_action_base = "urn:schemas-upnp-org:service:"
+
+    def __init__(self, url_suffix, service, action, fields):
+        """Constructor. The complete request, header and SOAP envelope, is
+        encoded once here.
+
+        Arguments:
+            url_suffix {string} -- Command suffix for the url
+            service {string} -- Service name, e.g. WANIPConnection:1
+            action {string} -- Action name, e.g. GetStatusInfo
+            fields {tuple} -- (XML element, result attribute, type) tuples,
+                see UpnpField
+        """
+        self.soapaction = f"{UpnpAction.soap_action_base}{service}#{action}"
+        self.request = build_request(
+            FRITZ_HOST,
+            FRITZ_PORT,
+            CONTROL_PATH + url_suffix,
+            self.soapaction,
+            '<?xml version="1.0" encoding="utf-8"?><s:Envelope s:encodingStyle='
+            '"http://schemas.xmlsoap.org/soap/encoding/" xmlns:s='
+            '"http://schemas.xmlsoap.org/soap/envelope/"><s:Body>'
+            f'<u:{action} xmlns:u="{UpnpAction.soap_action_base}{service}">'
+            f"</u:{action}></s:Body></s:Envelope>",
+        )
+        self.fields = tuple(UpnpField(*field) for field in fields)
+
+
+class FritzboxStatusResult:
+    """Result of a FritzboxStatus query. Fields of actions that were not
+    queried (or failed) are None."""
+
+    __slots__ = (
+        "link_status",
+        "connection_status",
+        "uptime",
+        "max_bitrate_down",
+        "max_bitrate_up",
+        "bytes_sent",
+        "bytes_received",
+        "external_ip",
     )
 
-    fritz_headers = {
-        "charset": "utf-8",
-        "content-type": "text/xml",
-        "soapaction": None,
+    def __init__(self):
+        for name in FritzboxStatusResult.__slots__:
+            setattr(self, name, None)
+
+    @property
+    def linked(self):
+        """True if the FritzBox is linked with the service provider"""
+        return self.link_status == "Up"
+
+    @property
+    def connected(self):
+        """True if the FritzBox is connected to the internet"""
+        return self.connection_status == "Connected"
+
+
+class FritzboxStatus:
+    """Encapsulate the FritBox status calls via the upnp protocol"""
+
+    fritz_host = FRITZ_HOST
+    fritz_port = FRITZ_PORT
+    fritz_control_path = CONTROL_PATH
+
+    # Actions needed for the DSL status
+    dsl_actions = ("link_properties", "status_info")
+
+    # Available actions. Add a line here to query a new value.
+    actions = {
+        "status_info": UpnpAction(
+            "WANIPConn1",
+            "WANIPConnection:1",
+            "GetStatusInfo",
+            (
+                ("NewConnectionStatus", "connection_status", CONNECTION_STATES),
+                ("NewUptime", "uptime", int),
+            ),
+        ),
+        "external_ip": UpnpAction(
+            "WANIPConn1",
+            "WANIPConnection:1",
+            "GetExternalIPAddress",
+            (("NewExternalIPAddress", "external_ip", str),),
+        ),
+        "link_properties": UpnpAction(
+            "WANCommonIFC1",
+            "WANCommonInterfaceConfig:1",
+            "GetCommonLinkProperties",
+            (
+                ("NewPhysicalLinkStatus", "link_status", LINK_STATES),
+                ("NewLayer1DownstreamMaxBitRate", "max_bitrate_down", int),
+                ("NewLayer1UpstreamMaxBitRate", "max_bitrate_up", int),
+            ),
+        ),
+        "bytes_sent": UpnpAction(
+            "WANCommonIFC1",
+            "WANCommonInterfaceConfig:1",
+            "GetTotalBytesSent",
+            (("NewTotalBytesSent", "bytes_sent", int),),
+        ),
+        "bytes_received": UpnpAction(
+            "WANCommonIFC1",
+            "WANCommonInterfaceConfig:1",
+            "GetTotalBytesReceived",
+            (("NewTotalBytesReceived", "bytes_received", int),),
+        ),
     }
 
-    def __init__(self, pyportal, debug=False):
+    def __init__(
+        self, pyportal, pipelining=True, mem_trace=None, memory_guard=None, debug=False
+    ):
+        """Constructor
+
+        Arguments:
+            pyportal {adafruit_pyportal.PyPortal} -- PyPortal instance
+
+        Keyword Arguments:
+            pipelining {bool} -- Send all requests of a query before
+                reading the responses. Switched off automatically if the
+                router doesn't support it. (default: {True})
+            mem_trace {MemTrace} -- Records memory usage of queries
+                (default: {None})
+            memory_guard {MemoryGuard} -- Retries a query that ran out of
+                memory after each level of resources it releases, reloads
+                the board if it fails with all of them released
+                (default: {None})
+            debug {bool} -- Show debug information (default: {False})
+        """
         self._debug_mode = debug
         self._pyportal = pyportal
+        self._pipelining = pipelining
+        self._pipelining_failures = 0
+        self._mem_trace = mem_trace or MemTrace(capacity=0)
+        self._memory_guard = memory_guard or MemoryGuard(debug=debug)
 
-        # Initialize requests object with esp, provided to the pyportal
-        requests.set_socket(socket, pyportal._esp)
+        # One keep-alive session for all SOAP calls, so the socket to the
+        # router is only opened once and not for every single request
+        socket.set_interface(pyportal._esp)
+        self._session = UpnpSession(
+            socket,
+            FritzboxStatus.fritz_host,
+            FritzboxStatus.fritz_port,
+            timeout=2,
+            debug=debug,
+        )
 
     def log(self, text):
         """Simple logger
@@ -54,83 +250,167 @@ class FritzboxStatus:
             print(text)
 
     def get_dsl_status(self):
-        """Build the DSL status as a dictionary with 2 elements:
-        linked: link status
-        connected: connection status
-        Values are either True or False
+        """Query link and connection status in one go
+
+        Returns:
+            FritzboxStatusResult -- use the linked and connected properties
         """
-        return {
-            "linked": self.is_linked(),
-            "connected": self.is_connected(),
-        }
+        return self.query(FritzboxStatus.dsl_actions)
 
     def is_connected(self):
         """Check if the FritzBox is connected to the internet.
         Returns True or False
         """
-        status = self._do_call(
-            url_suffix="WANIPConn1",
-            soapaction=FritzboxStatus.fritz_soap_action_base
-            + "WANIPConnection:1#GetStatusInfo",
-            body=FritzboxStatus.fritz_soap_connection,
-        )
-
-        return status == "Connected"
+        return self.query(("status_info",)).connected
 
     def is_linked(self):
         """Check if the FritzBox is linked with the service provider.
         Returns True or False
         """
-        status = self._do_call(
-            url_suffix="WANCommonIFC1",
-            soapaction=FritzboxStatus.fritz_soap_action_base
-            + "WANCommonInterfaceConfig:1#GetCommonLinkProperties",
-            body=FritzboxStatus.fritz_soap_link_status,
-        )
+        return self.query(("link_properties",)).linked
 
-        return status == "Up"
+    def query(self, actions):
+        """Run several actions over the same connection and collect the
+        response fields in one result object.
 
-    def _do_call(self, url_suffix=None, soapaction=None, body=None):
-        """Main method performaing the SOAP action.
+        Arguments:
+            actions {tuple} -- action names (see FritzboxStatus.actions)
 
-        Keyword Arguments:
-            url_suffix {string} -- Command suffix for the url (default: {None})
-            soapaction {string} -- SOAP header fields (default: {None})
-            body {string} -- SOAP body (default: {None})
+        Returns:
+            FritzboxStatusResult -- query result
+        """
+        return run_until_complete(self.query_steps(actions))
+
+    def query_steps(self, actions):
+        """Same as query(), but as a TaskLoop generator. It yields while
+        waiting for the router, so other tasks (e.g. touch handling) can
+        run in the meantime. A query that runs out of memory is retried by
+        the memory guard, once after each level of resources it releases.
+
+        Arguments:
+            actions {tuple} -- action names (see FritzboxStatus.actions)
+
+        Returns:
+            FritzboxStatusResult -- query result
+        """
+        result = yield from self._memory_guard.call_steps(self._query_steps, actions)
+        return result
+
+    def _query_steps(self, actions):
+        """Run the actions of a query
+
+        Arguments:
+            actions {tuple} -- action names (see FritzboxStatus.actions)
+
+        Raises:
+            MemoryError: out of memory, the session is closed
+
+        Returns:
+            FritzboxStatusResult -- query result
+        """
+        self._mem_trace.collect("fritz")
+        result = FritzboxStatusResult()
+        pending = [FritzboxStatus.actions[name] for name in actions]
+
+        if self._pipelining and len(pending) > 1:
+            pending = yield from self._query_pipelined(pending, result)
+
+        for action in pending:
+            yield from self._query_action(action, result)
+
+        return result
+
+    def _query_pipelined(self, actions, result):
+        """Send all requests first and read the responses afterwards
+
+        Arguments:
+            actions {list} -- UpnpAction objects
+            result {FritzboxStatusResult} -- result to be filled
 
         Returns:
-            string -- raw status text
+            list -- actions that still have to be done one by one
         """
-        gc.collect()
-        url = f"{FritzboxStatus.fritz_url_base}{url_suffix}"
-        headers = FritzboxStatus.fritz_headers.copy()
-        headers["soapaction"] = soapaction
+        index = 0
+
+        try:
+            self._session.release()
+            for action in actions:
+                self._session.send(action.request)
+
+            for index, action in enumerate(actions):
+                if index and self._session.closed:
+                    # The router closed the connection after the previous
+                    # response (connection: close), the other requests
+                    # were dropped. It won't handle pipelined requests.
+                    self.log("Router closes the connection, pipelining off")
+                    self._pipelining = False
+                    return actions[index:]
+
+                status = yield from self._session.read_header()
+                yield from self._read_fields(action, result, status)
+        except MemoryError:
+            self._session.close()
+            raise
+        except:
+            self._session.close()
+
+            if index > 0:
+                # The first response arrived, but not the rest. A broken
+                # connection does that once in a while, a router without
+                # pipelining support every time.
+                self._pipelining_failures += 1
+                if self._pipelining_failures >= PIPELINING_FAILURES:
+                    self.log("Pipelining not supported, switching it off")
+                    self._pipelining = False
+
+            return actions[index:]
+
+        self._pipelining_failures = 0
+        return []
+
+    def _query_action(self, action, result):
+        """Main method performaing a single SOAP action.
 
+        Arguments:
+            action {UpnpAction} -- action to perform
+            result {FritzboxStatusResult} -- result to be filled
+        """
         try:
-            gc.collect()
-            response = requests.post(url, data=body, headers=headers, timeout=2)
-            gc.collect()
+            status = yield from self._session.post(action.request)
+            yield from self._read_fields(action, result, status)
         except MemoryError:
-            supervisor.reload()
+            self._session.close()
+            raise
         except:
+            self._session.close()
             self.log("Couldn't get DSL status, will try again later.")
-            return "Unknown"  # We just ignore this and wait for the next request
+            # We just ignore this and wait for the next request
 
-        # Finde the raw status based on the respective XML Tags
-        if url_suffix == "WANIPConn1":
-            regex = r"<NewConnectionStatus>(.*)<\/NewConnectionStatus>"
-        else:
-            regex = r"<NewPhysicalLinkStatus>(.*)<\/NewPhysicalLinkStatus>"
+    def _read_fields(self, action, result, status):
+        """Receive the response body of an action into the session buffer
+        and read the fields from there. This is a TaskLoop generator, it
+        yields while the body is received. The body of an error response
+        (a SOAP fault) is received as well, so the socket can be reused,
+        but not read.
 
-        matches = re.search(regex, response.text)
-        status = matches.groups()[0]
+        Arguments:
+            action {UpnpAction} -- action the response belongs to
+            result {FritzboxStatusResult} -- result to be filled
+            status {int} -- HTTP status code of the response
+        """
+        start, end = yield from self._session.read_body()
+        buffer = self._session.buffer
 
-        self.log(f"Received DSL state for {url_suffix}: {status}")
+        if status == 200:
+            for field in action.fields:
+                value = field.parse(buffer, start, end)
+                if value is not None:
+                    setattr(result, field.attribute, value)
+        else:
+            self.log(f"{action.soapaction} failed with HTTP status {status}")
 
-        # Clean Up
-        response = None
-        regex = None
-        matches = None
-        gc.collect()
+        if self._debug_mode:
+            self.log(f"Received {action.soapaction}: {buffer[start:end]}")
 
-        return status
+        # Done with the envelope, so the socket can be reused
+        self._session.release()
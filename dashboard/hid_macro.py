@@ -0,0 +1,233 @@
+import time
+
+from adafruit_hid import find_device
+from adafruit_hid.keycode import Keycode
+
+# Report sent to release all keys
+RELEASE_REPORT = bytes(8)
+
+
+def _report(keycodes):
+    """Build the 8 byte keyboard report for keys pressed at the same time
+
+    Arguments:
+        keycodes {tuple} -- keycodes, modifiers and up to 6 other keys
+
+    Raises:
+        ValueError: more than 6 non-modifier keys
+
+    Returns:
+        bytes -- report (modifier byte, reserved byte, 6 key bytes)
+    """
+    report = bytearray(8)
+    index = 2
+
+    for keycode in keycodes:
+        modifier = Keycode.modifier_bit(keycode)
+
+        if modifier:
+            report[0] |= modifier
+        elif index < 8:
+            report[index] = keycode
+            index += 1
+        else:
+            raise ValueError("More than 6 keys in a chord")
+
+    return bytes(report)
+
+
+class Macro:
+    """Keyboard action compiled into raw HID reports. Each report has a
+    delay that has to pass before the next report is sent (0 means the
+    next USB poll). Use the class methods to create macros."""
+
+    def __init__(self, reports, delays=None):
+        """Constructor
+
+        Arguments:
+            reports {tuple} -- 8 byte reports
+
+        Keyword Arguments:
+            delays {tuple} -- seconds to wait after each report, None for
+                no waiting at all (default: {None})
+        """
+        self.reports = tuple(reports)
+        self.delays = tuple(delays) if delays else (0,) * len(self.reports)
+
+    def __len__(self):
+        return len(self.reports)
+
+    def __add__(self, other):
+        return Macro(self.reports + other.reports, self.delays + other.delays)
+
+    @classmethod
+    def chord(cls, *keycodes):
+        """Press keys together and release them (e.g. a shortcut)
+
+        Arguments:
+            keycodes {int} -- keycodes
+
+        Returns:
+            Macro -- macro
+        """
+        return cls((_report(keycodes), RELEASE_REPORT))
+
+    @classmethod
+    def sequence(cls, *chords):
+        """Several chords one after the other
+
+        Arguments:
+            chords {tuple} -- tuples of keycodes
+
+        Returns:
+            Macro -- macro
+        """
+        reports = []
+        for chord in chords:
+            reports.append(_report(chord))
+            reports.append(RELEASE_REPORT)
+
+        return cls(reports)
+
+    @classmethod
+    def text(cls, string, layout):
+        """Type a text
+
+        Arguments:
+            string {str} -- text
+            layout {KeyboardLayoutUS} -- keyboard layout to map the
+                characters to keycodes
+
+        Returns:
+            Macro -- macro
+        """
+        return cls.sequence(*[layout.keycodes(char) for char in string])
+
+    @classmethod
+    def hold(cls, keycodes, duration):
+        """Press keys together, keep them pressed for a while and release
+        them
+
+        Arguments:
+            keycodes {tuple} -- keycodes
+            duration {float} -- seconds to keep the keys pressed
+
+        Returns:
+            Macro -- macro
+        """
+        return cls((_report(keycodes), RELEASE_REPORT), (duration, 0))
+
+
+class MacroSender:
+    """Send macros to the host without blocking. Macros are queued and
+    update() sends at most one report per USB poll interval, so the host
+    sees every report. The queue is bounded, a macro that doesn't fit
+    anymore is rejected as a whole."""
+
+    def __init__(self, devices, poll_interval=0.01, max_macros=8, debug=False):
+        """Constructor
+
+        Arguments:
+            devices {list} -- HID devices (usb_hid.devices) or the
+                keyboard device itself
+
+        Keyword Arguments:
+            poll_interval {float} -- Seconds between two reports
+                (default: {0.01})
+            max_macros {int} -- Queue size (default: {8})
+            debug {bool} -- Show debug information (default: {False})
+
+        Raises:
+            ValueError: there is no keyboard device
+            OSError: the host doesn't accept reports
+        """
+        self._debug_mode = debug
+        self._device = find_device(devices, usage_page=0x1, usage=0x06)
+        self.poll_interval = poll_interval
+
+        # Ring buffer of queued macros
+        self._queue = [None] * max_macros
+        self._head = 0
+        self._count = 0
+
+        # Position in the macro that is being sent
+        self._report_index = 0
+        self._next_send = 0
+
+        self.reports_sent = 0
+
+        # Test if the host is ready, like adafruit_hid's Keyboard does
+        try:
+            self._device.send_report(RELEASE_REPORT)
+        except OSError:
+            time.sleep(1)
+            self._device.send_report(RELEASE_REPORT)
+
+    def log(self, text):
+        """Simple logger
+
+        Arguments:
+            text {string} -- Display text
+        """
+        if self._debug_mode:
+            print(text)
+
+    @property
+    def busy(self):
+        """True while macros are queued"""
+        return self._count > 0
+
+    def queue(self, macro):
+        """Queue a macro
+
+        Arguments:
+            macro {Macro} -- macro
+
+        Returns:
+            bool -- False if the queue is full
+        """
+        if self._count == len(self._queue):
+            self.log("Macro queue full, macro rejected")
+            return False
+
+        self._queue[(self._head + self._count) % len(self._queue)] = macro
+        self._count += 1
+
+        return True
+
+    def update(self):
+        """Send the next report if it's time for it. Call it at least
+        once per poll interval from the main loop.
+
+        Returns:
+            float -- seconds until the next report is due, None if the
+                queue is empty
+        """
+        if not self._count:
+            return None
+
+        now = time.monotonic()
+        if now < self._next_send:
+            return self._next_send - now
+
+        macro = self._queue[self._head]
+
+        try:
+            self._device.send_report(macro.reports[self._report_index])
+        except OSError:
+            # Host not ready, try again with the next poll
+            self._next_send = now + self.poll_interval
+            return self.poll_interval
+
+        self.reports_sent += 1
+        delay = max(self.poll_interval, macro.delays[self._report_index])
+        self._next_send = now + delay
+        self._report_index += 1
+
+        if self._report_index == len(macro):
+            self._queue[self._head] = None
+            self._head = (self._head + 1) % len(self._queue)
+            self._count -= 1
+            self._report_index = 0
+
+        return delay
@@ -0,0 +1,251 @@
+_WHITESPACE = b" \t\r\n"
+_SCALAR = b"+-.0123456789eEtruefalsn"
+_ESCAPES = {
+    ord("b"): b"\b",
+    ord("f"): b"\f",
+    ord("n"): b"\n",
+    ord("r"): b"\r",
+    ord("t"): b"\t",
+}
+
+
+class JsonPathExtractor:
+    """Extract values at given paths (e.g. [0, "text"]) from a JSON
+    document that arrives in chunks. The document is never parsed into
+    Python objects, only the bytes of the requested values are kept.
+    Strings and scalars (numbers, true, false, null) can be extracted.
+    Call finish() at the end of the document, a number at its very end
+    is only complete then."""
+
+    def __init__(self, paths, max_length=512):
+        """Constructor
+
+        Arguments:
+            paths {tuple} -- paths, each a list of array indexes and
+                object keys
+
+        Keyword Arguments:
+            max_length {int} -- Maximum length of a value or key in bytes
+                (default: {512})
+        """
+        self._paths = [list(path) for path in paths]
+        self._max_length = max_length
+
+        self.values = [None] * len(self._paths)
+        # False for the paths that have been found, a found value can be
+        # None (null)
+        self._pending = [True] * len(self._paths)
+        self._found = 0
+
+        # One entry per open container: [is object, key or index,
+        # expecting a key]
+        self._stack = []
+
+        self._in_string = False
+        self._is_key = False
+        self._escape = None
+        self._high_surrogate = 0
+        self._scalar = None
+
+        # Bytes of the current key or captured value, None if the value
+        # is skipped
+        self._buffer = None
+        self._capture = -1
+
+    @property
+    def done(self):
+        """True as soon as all paths have been found"""
+        return self._found == len(self._paths)
+
+    def feed(self, chunk):
+        """Process the next chunk of the document
+
+        Arguments:
+            chunk {bytes} -- next chunk
+
+        Raises:
+            ValueError: a value or key is longer than max_length
+
+        Returns:
+            bool -- True when all paths have been found
+        """
+        for byte in chunk:
+            if self.done:
+                break
+
+            if self._in_string:
+                self._string_byte(byte)
+                continue
+
+            if self._scalar is not None:
+                if byte in _SCALAR:
+                    self._append(self._scalar, byte)
+                    continue
+
+                self._end_scalar()
+
+            if byte in _WHITESPACE or byte == 0x3A:  # ":"
+                continue
+
+            if byte == 0x7B or byte == 0x5B:  # "{" "["
+                is_object = byte == 0x7B
+                self._stack.append([is_object, None if is_object else 0, True])
+            elif byte == 0x7D or byte == 0x5D:  # "}" "]"
+                if self._stack:
+                    self._stack.pop()
+            elif byte == 0x2C:  # ","
+                if self._stack:
+                    top = self._stack[-1]
+                    if top[0]:
+                        top[2] = True
+                    else:
+                        top[1] += 1
+            elif byte == 0x22:  # '"'
+                self._in_string = True
+                top = self._stack[-1] if self._stack else None
+                self._is_key = bool(top and top[0] and top[2])
+                self._buffer = bytearray() if self._is_key else self._start_value()
+            else:
+                # Skipped scalars are collected as well, we have to know
+                # where they end
+                self._scalar = self._start_value() or bytearray()
+                self._append(self._scalar, byte)
+
+        return self.done
+
+    def finish(self):
+        """End of the document: complete a number, true, false or null
+        that was still being read
+
+        Returns:
+            bool -- True when all paths have been found
+        """
+        if self._scalar is not None:
+            self._end_scalar()
+
+        return self.done
+
+    def _start_value(self):
+        """Check if the value starting now is requested
+
+        Returns:
+            bytearray -- buffer for the value or None if it's skipped
+        """
+        for index, path in enumerate(self._paths):
+            if self._pending[index] and len(path) == len(self._stack):
+                for level, entry in enumerate(self._stack):
+                    if entry[1] != path[level]:
+                        break
+                else:
+                    self._capture = index
+                    return bytearray()
+
+        self._capture = -1
+        return None
+
+    def _string_byte(self, byte):
+        """Process a byte inside of a string
+
+        Arguments:
+            byte {int} -- byte
+        """
+        if self._escape is not None:
+            self._escape_byte(byte)
+        elif byte == 0x5C:  # "\"
+            self._escape = b""
+        elif byte == 0x22:  # '"'
+            self._in_string = False
+
+            if self._is_key:
+                top = self._stack[-1]
+                top[1] = self._buffer.decode("utf-8")
+                top[2] = False
+            elif self._buffer is not None:
+                self._store(self._buffer.decode("utf-8"))
+
+            self._buffer = None
+        elif self._buffer is not None:
+            self._append(self._buffer, byte)
+
+    def _escape_byte(self, byte):
+        """Process a byte of an escape sequence
+
+        Arguments:
+            byte {int} -- byte following the backslash
+        """
+        if self._escape == b"" and byte != 0x75:  # not "u"
+            if self._buffer is not None:
+                self._append(self._buffer, _ESCAPES.get(byte, bytes((byte,))))
+            self._escape = None
+            return
+
+        if byte == 0x75 and self._escape == b"":
+            self._escape = b"u"
+            return
+
+        self._escape += bytes((byte,))
+        if len(self._escape) < 5:
+            return
+
+        code = int(self._escape[1:], 16)
+        self._escape = None
+
+        if 0xD800 <= code < 0xDC00:
+            # First half of a surrogate pair, wait for the second one
+            self._high_surrogate = code
+            return
+
+        if 0xDC00 <= code < 0xE000 and self._high_surrogate:
+            code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + code - 0xDC00
+
+        self._high_surrogate = 0
+
+        if self._buffer is not None:
+            self._append(self._buffer, chr(code).encode("utf-8"))
+
+    def _end_scalar(self):
+        """Finish a number, true, false or null"""
+        if self._capture >= 0:
+            text = self._scalar.decode("utf-8")
+
+            if text == "true":
+                value = True
+            elif text == "false":
+                value = False
+            elif text == "null":
+                value = None
+            elif "." in text or "e" in text or "E" in text:
+                value = float(text)
+            else:
+                value = int(text)
+
+            self._store(value)
+
+        self._scalar = None
+        self._capture = -1
+
+    def _store(self, value):
+        """Store a captured value
+
+        Arguments:
+            value {object} -- value
+        """
+        self.values[self._capture] = value
+        self._pending[self._capture] = False
+        self._found += 1
+        self._capture = -1
+
+    def _append(self, buffer, data):
+        """Append to a buffer, but not beyond max_length
+
+        Arguments:
+            buffer {bytearray} -- buffer
+            data {int|bytes} -- byte or bytes to append
+        """
+        if isinstance(data, int):
+            buffer.append(data)
+        else:
+            buffer.extend(data)
+
+        if len(buffer) > self._max_length:
+            raise ValueError("JSON value too long")
@@ -0,0 +1,256 @@
+import gc
+import time
+from array import array
+
+try:
+    from time import monotonic_ns
+except ImportError:
+
+    def monotonic_ns():
+        return int(time.monotonic() * 1000000000)
+
+
+# Fields of a record in the ring buffer
+FIELDS = 5  # name id, free before, free after, lowest free, microseconds
+
+# Heap size the CPython shim reports free memory against
+SHIM_HEAP_SIZE = 1 << 20
+
+if hasattr(gc, "mem_free"):
+    mem_free = gc.mem_free
+
+    # No peak tracking, the lowest value is sampled at span boundaries,
+    # sample() calls and the task steps of a TaskLoop with the trace
+    _peak_free = mem_free
+
+    def _reset_peak():
+        pass
+
+else:
+    # CPython: derive free memory from the traced allocations
+    import tracemalloc
+
+    def mem_free():
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        return SHIM_HEAP_SIZE - tracemalloc.get_traced_memory()[0]
+
+    def _peak_free():
+        return SHIM_HEAP_SIZE - tracemalloc.get_traced_memory()[1]
+
+    def _reset_peak():
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+
+
+class Span:
+    """A named section of code, used as context manager. Records the
+    free memory before and after, the lowest free memory sampled in
+    between and the elapsed time into the ring buffer of its MemTrace."""
+
+    def __init__(self, trace, name_id):
+        """Constructor
+
+        Arguments:
+            trace {MemTrace} -- owner
+            name_id {int} -- index of the name in trace.names
+        """
+        self._trace = trace
+        self._name_id = name_id
+        self._start = 0
+        self._free_before = 0
+        self.lowest_free = 0
+
+    def __enter__(self):
+        # Let the open spans see the peak before it's reset
+        self._trace.sample()
+
+        self._free_before = mem_free()
+        self.lowest_free = self._free_before
+        self._trace._open.append(self)
+        _reset_peak()
+        self._start = monotonic_ns()
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        elapsed = (monotonic_ns() - self._start) // 1000
+        free_after = mem_free()
+
+        self._trace.sample()
+        if self in self._trace._open:
+            self._trace._open.remove(self)
+
+        self._trace.record(
+            self._name_id, self._free_before, free_after, self.lowest_free, elapsed
+        )
+        return False
+
+
+class _NoSpan:
+    """Span of a disabled MemTrace, does nothing"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class MemTrace:
+    """Heap instrumentation. Named spans record gc.mem_free() before and
+    after, the lowest value sampled while they were open and their
+    elapsed time into a ring buffer that is allocated once. The buffer
+    can be dumped over serial, one compact CSV line per record:
+
+        M,<name>,<free before>,<free after>,<lowest free>,<microseconds>
+
+    CircuitPython has no peak tracking, so the lowest free memory is only
+    sampled: when a span starts and ends, at sample() calls and, if the
+    TaskLoop was given the trace, after every task step (every yield).
+    An allocation that is freed again between two samples isn't seen.
+    Under CPython free memory is derived from tracemalloc, which tracks
+    the real peak.
+
+    Spans can be open at the same time (e.g. in different TaskLoop
+    tasks). A span around a yield from isn't isolated: whatever the other
+    tasks allocate while it waits counts for the span, too. A MemTrace
+    with capacity 0 is disabled and costs nothing."""
+
+    def __init__(self, capacity=64, debug=False):
+        """Constructor
+
+        Keyword Arguments:
+            capacity {int} -- Number of records kept (default: {64})
+            debug {bool} -- Show debug information (default: {False})
+        """
+        self._debug_mode = debug
+        self.capacity = capacity
+
+        self._records = array("i", [0] * (capacity * FIELDS))
+        self._next = 0
+        self.count = 0
+
+        self.names = []
+        self._spans = {}
+        self._open = []
+
+    def log(self, text):
+        """Simple logger
+
+        Arguments:
+            text {string} -- Display text
+        """
+        if self._debug_mode:
+            print(text)
+
+    @property
+    def enabled(self):
+        """False if the trace has no buffer"""
+        return self.capacity > 0
+
+    def span(self, name):
+        """Get the span for a name, to be used with the with statement
+
+        Arguments:
+            name {str} -- span name
+
+        Returns:
+            Span -- span
+        """
+        if not self.enabled:
+            return _NO_SPAN
+
+        span = self._spans.get(name)
+        if span is None:
+            self.names.append(name)
+            span = Span(self, len(self.names) - 1)
+            self._spans[name] = span
+
+        return span
+
+    def sample(self):
+        """Update the lowest free memory of the open spans. Call it at
+        points inside of a span where memory usage may peak."""
+        if not self._open:
+            return
+
+        free = _peak_free()
+
+        for span in self._open:
+            if free < span.lowest_free:
+                span.lowest_free = free
+
+    def collect(self, name):
+        """Run gc.collect() in a span named "gc <name>", so it shows how
+        much a collection at this point frees
+
+        Arguments:
+            name {str} -- name of the place of the collection
+        """
+        with self.span("gc " + name):
+            gc.collect()
+
+    def record(self, name_id, free_before, free_after, lowest_free, elapsed):
+        """Write a record into the ring buffer, replacing the oldest one
+        if it's full
+
+        Arguments:
+            name_id {int} -- index of the name in self.names
+            free_before {int} -- free memory at the start
+            free_after {int} -- free memory at the end
+            lowest_free {int} -- lowest free memory seen
+            elapsed {int} -- elapsed time in microseconds
+        """
+        if not self.enabled:
+            return
+
+        offset = self._next * FIELDS
+        self._records[offset] = name_id
+        self._records[offset + 1] = free_before
+        self._records[offset + 2] = free_after
+        self._records[offset + 3] = lowest_free
+        self._records[offset + 4] = elapsed
+
+        self._next = (self._next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def records(self):
+        """Iterate over the records, oldest first
+
+        Returns:
+            generator -- (name, free before, free after, lowest free,
+                microseconds) tuples
+        """
+        start = (self._next - self.count) % self.capacity if self.count else 0
+
+        for index in range(self.count):
+            offset = ((start + index) % self.capacity) * FIELDS
+            yield (
+                self.names[self._records[offset]],
+                self._records[offset + 1],
+                self._records[offset + 2],
+                self._records[offset + 3],
+                self._records[offset + 4],
+            )
+
+    def dump(self, clear=True):
+        """Print the records over serial
+
+        Keyword Arguments:
+            clear {bool} -- Empty the buffer afterwards (default: {True})
+        """
+        print("M,name,before,after,lowest,us")
+
+        for name, before, after, lowest, elapsed in self.records():
+            print(f"M,{name},{before},{after},{lowest},{elapsed}")
+
+        if clear:
+            self.clear()
+
+    def clear(self):
+        """Empty the buffer"""
+        self._next = 0
+        self.count = 0
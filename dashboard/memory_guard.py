@@ -0,0 +1,185 @@
+import supervisor
+from mem_trace import MemTrace, mem_free
+
+
+class MemoryGuard:
+    """Keep the app running when memory gets low, instead of reloading
+    the board (Wi-Fi reconnect, fonts and images loaded again).
+
+    Resources that can be given up are registered with a level: level 1
+    for the ones that come back by themselves (e.g. caches), higher
+    levels for the ones that cost more to do without. When free memory
+    drops below the low water mark, the levels are released one after
+    the other until it's above again. An operation run with call() or
+    call_steps() that fails with a MemoryError is retried after each
+    level, lowest level first, so it gives up no more than it needs.
+    Only if it still fails with all levels released, the board is
+    reloaded."""
+
+    def __init__(self, low_water=16384, mem_trace=None, debug=False):
+        """Constructor
+
+        Keyword Arguments:
+            low_water {int} -- Free memory in bytes below which check()
+                releases resources (default: {16384})
+            mem_trace {MemTrace} -- Records what the releases free
+                (default: {None})
+            debug {bool} -- Show debug information (default: {False})
+        """
+        self._debug_mode = debug
+        self.low_water = low_water
+        self._mem_trace = mem_trace or MemTrace(capacity=0)
+
+        # [level, name, release function], lowest level first
+        self._resources = []
+
+        self.reclaims = 0
+        self.reloads_avoided = 0
+
+    def log(self, text):
+        """Simple logger
+
+        Arguments:
+            text {string} -- Display text
+        """
+        if self._debug_mode:
+            print(text)
+
+    def register(self, name, release, level=1):
+        """Register a resource that can be released
+
+        Arguments:
+            name {str} -- name for the log
+            release {function} -- called without arguments to release it
+
+        Keyword Arguments:
+            level {int} -- the higher, the later it's released
+                (default: {1})
+        """
+        self._resources.append([level, name, release])
+        self._resources.sort(key=lambda resource: resource[0])
+
+    def check(self):
+        """Release resources if free memory is below the low water mark.
+        Call it regularly from the main loop.
+
+        Returns:
+            bool -- True if resources were released
+        """
+        if mem_free() >= self.low_water:
+            return False
+
+        self.reclaim(self.low_water)
+        return True
+
+    def reclaim(self, needed=None):
+        """Release the resources level by level, with a garbage collection
+        before and after each level, until enough memory is free
+
+        Keyword Arguments:
+            needed {int} -- free bytes to stop at, None releases all
+                levels (default: {None})
+
+        Returns:
+            int -- free memory afterwards
+        """
+        self.reclaims += 1
+        self._mem_trace.collect("reclaim")
+        free = mem_free()
+        index = 0
+
+        while index < len(self._resources):
+            if needed is not None and free >= needed:
+                break
+
+            index = self._release_level(index)
+            free = mem_free()
+
+        return free
+
+    def call(self, function, *args):
+        """Run a function. After a MemoryError the next level of resources
+        is released and the function is retried, once per level. If it
+        still fails with all levels released, the board is reloaded.
+
+        Arguments:
+            function {function} -- function to run
+            *args -- its arguments
+
+        Returns:
+            object -- return value of the function
+        """
+        index = 0
+
+        while True:
+            try:
+                result = function(*args)
+                break
+            except MemoryError:
+                if index == len(self._resources):
+                    self._reload()
+                    raise
+                self.log("Out of memory, releasing resources and retrying")
+
+            # Outside of the except clause, so the exception and its
+            # traceback are gone and what they reference can be collected
+            index = self._release_level(index)
+
+        if index:
+            self.reloads_avoided += 1
+        return result
+
+    def call_steps(self, steps, *args):
+        """Same as call(), for a TaskLoop generator. A new generator is
+        created for every retry.
+
+        Arguments:
+            steps {function} -- generator function
+            *args -- its arguments
+
+        Returns:
+            object -- return value of the generator
+        """
+        index = 0
+
+        while True:
+            try:
+                result = yield from steps(*args)
+                break
+            except MemoryError:
+                if index == len(self._resources):
+                    self._reload()
+                    raise
+                self.log("Out of memory, releasing resources and retrying")
+
+            index = self._release_level(index)
+
+        if index:
+            self.reloads_avoided += 1
+        return result
+
+    def _release_level(self, index):
+        """Release the resources of one level, followed by a garbage
+        collection
+
+        Arguments:
+            index {int} -- index of the first resource of the level
+
+        Returns:
+            int -- index of the first resource of the next level
+        """
+        level = self._resources[index][0]
+        while index < len(self._resources) and self._resources[index][0] == level:
+            self.log(f"Releasing {self._resources[index][1]}")
+            self._resources[index][2]()
+            index += 1
+
+        self._mem_trace.collect("reclaim")
+        self.log(f"Released level {level}, {mem_free()} bytes free")
+
+        return index
+
+    def _reload(self):
+        """Last resort, restart the app with a fresh heap"""
+        self.log("Still out of memory, reloading")
+        supervisor.reload()
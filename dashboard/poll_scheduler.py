@@ -0,0 +1,147 @@
+import random
+import time
+
+
+class PollScheduler:
+    """Decide when a source (DSL status, quotes, ...) should be polled
+    next. Failed polls are repeated with an exponentially growing,
+    jittered delay up to a cap, the failure count stops once the delay
+    reached the cap. After a failure the first success has
+    to be confirmed before the normal period is used again. An optional
+    budget limits the number of polls per time window."""
+
+    def __init__(
+        self,
+        period,
+        retry_period=None,
+        max_period=None,
+        backoff=2,
+        jitter=0.1,
+        confirm_period=None,
+        budget=None,
+        budget_window=3600,
+        clock=time.monotonic,
+        rand=random.random,
+        debug=False,
+    ):
+        """Constructor
+
+        Arguments:
+            period {float} -- Poll period in seconds while all is fine
+
+        Keyword Arguments:
+            retry_period {float} -- First retry delay after a failure
+                (default: {period})
+            max_period {float} -- Maximum retry delay (default: {period})
+            backoff {float} -- Retry delay factor per failure (default: {2})
+            jitter {float} -- Random deviation of the delay as a fraction
+                (default: {0.1})
+            confirm_period {float} -- Delay of the confirmation poll after
+                the first success following a failure. None means no
+                confirmation (default: {None})
+            budget {int} -- Maximum polls per budget window, None means no
+                limit (default: {None})
+            budget_window {float} -- Budget window in seconds (default: {3600})
+            clock {function} -- Time source in seconds (default: {time.monotonic})
+            rand {function} -- Random source returning [0, 1) (default: {random.random})
+            debug {bool} -- Show debug information (default: {False})
+        """
+        self._debug_mode = debug
+        self._clock = clock
+        self._rand = rand
+
+        self.period = period
+        self.retry_period = retry_period if retry_period is not None else period
+        self.max_period = max_period if max_period is not None else period
+        self.backoff = backoff
+        self.jitter = jitter
+        self.confirm_period = confirm_period
+
+        self.budget = budget
+        self.budget_window = budget_window
+        self._window_start = clock()
+        self._window_polls = 0
+
+        self.failures = 0
+        self._confirming = False
+        self.polls = 0
+
+        # Poll right away
+        self.next_poll = self._window_start
+
+    def log(self, text):
+        """Simple logger
+
+        Arguments:
+            text {string} -- Display text
+        """
+        if self._debug_mode:
+            print(text)
+
+    def due(self):
+        """Check if the next poll is due. A due poll is deferred to the
+        next budget window when the budget is used up.
+
+        Returns:
+            bool -- True if the source should be polled now
+        """
+        now = self._clock()
+
+        if now < self.next_poll:
+            return False
+
+        if self.budget is not None:
+            if now - self._window_start >= self.budget_window:
+                self._window_start = now
+                self._window_polls = 0
+
+            if self._window_polls >= self.budget:
+                self.next_poll = self._window_start + self.budget_window
+                self.log(f"Poll budget exhausted, next poll at {self.next_poll}")
+                return False
+
+        return True
+
+    def delay(self):
+        """Seconds until the next poll is due
+
+        Returns:
+            float -- delay in seconds, 0 if the poll is due
+        """
+        return max(0, self.next_poll - self._clock())
+
+    def report(self, success):
+        """Report the result of a poll and schedule the next one
+
+        Arguments:
+            success {bool} -- True if the poll was successful
+        """
+        self.polls += 1
+        self._window_polls += 1
+
+        if success:
+            if self.failures and self.confirm_period and not self._confirming:
+                # Recovered: check again soon to confirm it's stable. The
+                # failure count is kept until then, so a failed
+                # confirmation continues the backoff where it was.
+                delay = self.confirm_period
+                self._confirming = True
+            else:
+                delay = self.period
+                self._confirming = False
+                self.failures = 0
+        else:
+            self._confirming = False
+            delay = min(
+                self.retry_period * self.backoff**self.failures, self.max_period
+            )
+            # Once the delay is capped, counting on would only grow the
+            # power until it overflows (floats after 1024 failures)
+            if not self.failures or delay < self.max_period:
+                self.failures += 1
+
+        if self.jitter:
+            delay *= 1 + self.jitter * (2 * self._rand() - 1)
+
+        self.next_poll = self._clock() + delay
+        self.log(f"Next poll in {delay:.1f}s (failures: {self.failures})")
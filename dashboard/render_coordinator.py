@@ -0,0 +1,91 @@
+import time
+
+
+class RenderCoordinator:
+    """Take over display refreshes from displayio's auto refresh.
+    Widgets report that they changed and the display is refreshed at
+    most max_fps times per second, and only if something changed.
+    displayio itself keeps track of the changed areas and pushes only
+    those, so an icon flip repaints just the icon. The coordinator only
+    decides when to refresh, it doesn't reduce the pixels pushed."""
+
+    def __init__(self, display, max_fps=10, debug=False):
+        """Constructor
+
+        Arguments:
+            display {displayio.Display} -- display to refresh
+
+        Keyword Arguments:
+            max_fps {int} -- Maximum refreshes per second (default: {10})
+            debug {bool} -- Show debug information (default: {False})
+        """
+        self._debug_mode = debug
+        self._display = display
+        self._display.auto_refresh = False
+
+        self.max_fps = max_fps
+        self._last_refresh = 0
+        self._dirty = False
+
+        # Statistics
+        self.refreshes = 0
+        self.skipped = 0
+        self._stats_start = time.monotonic()
+
+    def log(self, text):
+        """Simple logger
+
+        Arguments:
+            text {string} -- Display text
+        """
+        if self._debug_mode:
+            print(text)
+
+    def invalidate(self):
+        """Mark the display as changed, the next flush() refreshes it"""
+        self._dirty = True
+
+    def flush(self):
+        """Refresh the display if something changed and the frame rate
+        allows it. If displayio skips the refresh, the display stays
+        marked as changed for the next flush().
+
+        Returns:
+            bool -- True if the display was refreshed
+        """
+        if not self._dirty:
+            return False
+
+        now = time.monotonic()
+        if now - self._last_refresh < 1 / self.max_fps:
+            return False
+
+        # minimum_frames_per_second=0, because we don't refresh at all
+        # while nothing changes
+        refreshed = self._display.refresh(
+            target_frames_per_second=self.max_fps, minimum_frames_per_second=0
+        )
+        self._last_refresh = now
+
+        if refreshed is False:
+            self.skipped += 1
+            self.log("Refresh skipped by displayio")
+            return False
+
+        self.refreshes += 1
+        self._dirty = False
+
+        return True
+
+    def report(self):
+        """Print refresh statistics since the last report and reset them"""
+        duration = max(time.monotonic() - self._stats_start, 1)
+
+        print(
+            f"Render: {self.refreshes} refreshes "
+            f"({self.refreshes / duration:.2f}/s), {self.skipped} skipped"
+        )
+
+        self.refreshes = 0
+        self.skipped = 0
+        self._stats_start = time.monotonic()
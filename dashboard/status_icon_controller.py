@@ -1,15 +1,43 @@
-import displayio
 import gc
+import json
+
+import displayio
+from image_cache import ImageCache
+from mem_trace import MemTrace
 
 
 class StatusIconController:
-    def __init__(self, debug=False):
+    def __init__(
+        self,
+        image_cache=None,
+        sprite_sheet=None,
+        render=None,
+        mem_trace=None,
+        debug=False,
+    ):
         """Constructor
 
         Keyword Arguments:
+            image_cache {ImageCache} -- Cache for the icon images, a new
+                one is created if None (default: {None})
+            sprite_sheet {str} -- Sprite sheet BMP created with
+                tools/pack_sprites.py. If set, all icons are tiles of this
+                one image and a status change doesn't touch the file
+                system at all. (default: {None})
+            render {RenderCoordinator} -- Gets notified about changed
+                icons (default: {None})
+            mem_trace {MemTrace} -- Records memory usage of image changes
+                (default: {None})
             debug {bool} -- Show debug output (default: {False})
         """
         self._debug_mode = debug
+        self._image_cache = image_cache or ImageCache(debug=debug)
+        self._render = render
+        self._mem_trace = mem_trace or MemTrace(capacity=0)
+
+        self._sheet = None
+        if sprite_sheet:
+            self._load_sprite_sheet(sprite_sheet)
 
         self.icons = {
             "dsl_status": {
@@ -117,6 +145,9 @@ class StatusIconController:
         icon["is_active"] = active
         self.log(f"is_active status changed to {active}")
 
+        if self._render:
+            self._render.invalidate()
+
     def _create_group_for_icon(self, icon):
         """Create a display group object from an icon dictionary object
         Chnages are done inplace to the "object" atrribute.
@@ -129,35 +160,71 @@ class StatusIconController:
         group.y = icon["y"]
         group.scale = icon["scale"]
 
-        self._set_image(group, icon["icon_path_inactive"])
+        if self._sheet:
+            group.append(self._create_tile(icon["icon_path_inactive"]))
+        else:
+            self._set_image(group, icon["icon_path_inactive"])
+
+            # Have the other state ready as well
+            self._image_cache.preload(icon["icon_path_active"])
 
         icon["object"] = group
 
     def _set_image(self, group, filename):
         """Generic method to chnage the icon based on the image loaded
-        from the filename.
+        from the filename. Images come from the image cache, so flipping
+        an icon back and forth doesn't read the files again.
 
         Arguments:
             group {group} -- display group object to be modified
             filename {str} -- file path+name
         """
-        if group:
-            group.pop()
+        with self._mem_trace.span("set image"):
+            if self._sheet:
+                # Only the tile index changes, no I/O at all
+                group[0][0] = self._tile_index(filename)
+            else:
+                self._image_cache.show(group, filename)
+
+    def _load_sprite_sheet(self, filename):
+        """Open the sprite sheet and read its manifest (same name, but
+        with .json extension)
 
-        if not filename:
-            return  # we're done, no icon desired
+        Arguments:
+            filename {str} -- sprite sheet file path+name
+        """
+        with open(filename.rsplit(".", 1)[0] + ".json", "r") as manifest_file:
+            self._manifest = json.load(manifest_file)
 
-        image_file = open(filename, "rb")
-        image = displayio.OnDiskBitmap(image_file)
+        self._sheet_file = open(filename, "rb")
+        self._sheet = displayio.OnDiskBitmap(self._sheet_file)
+        self._color_converter = displayio.ColorConverter()
         self.log(filename + " loaded")
 
-        try:
-            image_sprite = displayio.TileGrid(
-                image, pixel_shader=displayio.ColorConverter()
-            )
-        except TypeError:
-            image_sprite = displayio.TileGrid(
-                image, pixel_shader=displayio.ColorConverter(), position=(0, 0)
-            )
+    def _tile_index(self, filename):
+        """Get the tile index of an icon in the sprite sheet
 
-        group.append(image_sprite)
+        Arguments:
+            filename {str} -- icon file path+name as in self.icons
+
+        Returns:
+            int -- tile index
+        """
+        return self._manifest["tiles"][filename.rsplit("/", 1)[-1]]
+
+    def _create_tile(self, filename):
+        """Create a single tile TileGrid over the sprite sheet
+
+        Arguments:
+            filename {str} -- icon file path+name as in self.icons
+
+        Returns:
+            displayio.TileGrid -- icon sprite
+        """
+        return displayio.TileGrid(
+            self._sheet,
+            pixel_shader=self._color_converter,
+            tile_width=self._manifest["tile_width"],
+            tile_height=self._manifest["tile_height"],
+            default_tile=self._tile_index(filename),
+        )
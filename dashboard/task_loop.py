@@ -0,0 +1,182 @@
+import time
+
+
+class TaskLoop:
+    """Tiny cooperative scheduler. A task is a generator that yields the
+    number of seconds until it wants to run again (0 or None means as
+    soon as possible). Priority tasks (e.g. touch sampling) get a chance
+    to run before every step of a normal task, so they are never delayed
+    by more than one step of another task."""
+
+    def __init__(
+        self,
+        clock=time.monotonic,
+        sleep=time.sleep,
+        profiler=None,
+        mem_trace=None,
+        debug=False,
+    ):
+        """Constructor
+
+        Keyword Arguments:
+            clock {function} -- Time source in seconds (default: {time.monotonic})
+            sleep {function} -- Sleep function used while idle (default: {time.sleep})
+            profiler {LoopProfiler} -- Records the duration of every task
+                step and of every loop pass (default: {None})
+            mem_trace {MemTrace} -- Sampled after every task step, so the
+                open spans see the lowest free memory at every yield
+                (default: {None})
+            debug {bool} -- Show debug information (default: {False})
+        """
+        self._debug_mode = debug
+        self._clock = clock
+        self._sleep = sleep
+        self._profiler = profiler
+        self._loop_stage = profiler.stage("loop") if profiler else None
+        self._sample = mem_trace.sample if mem_trace and mem_trace.enabled else None
+
+        # Task entries are lists: [name, generator, due time, profiler stage]
+        self._priority_tasks = []
+        self._tasks = []
+        self._finished = False
+
+    def log(self, text):
+        """Simple logger
+
+        Arguments:
+            text {string} -- Display text
+        """
+        if self._debug_mode:
+            print(text)
+
+    def add(self, name, task, priority=False):
+        """Add a task to the loop
+
+        Arguments:
+            name {string} -- Task name (for debugging)
+            task {generator} -- Task generator
+
+        Keyword Arguments:
+            priority {bool} -- Run before every step of a normal task
+                (default: {False})
+        """
+        entry = [
+            name,
+            task,
+            self._clock(),
+            self._profiler.stage(name) if self._profiler else None,
+        ]
+
+        if priority:
+            self._priority_tasks.append(entry)
+        else:
+            self._tasks.append(entry)
+
+        self.log(f"Task {name} added")
+
+    def run_once(self):
+        """Run one step of every due task
+
+        Returns:
+            float -- seconds until the next task is due
+        """
+        if self._profiler:
+            start = self._profiler.start()
+
+        self._run_due(self._priority_tasks)
+
+        for entry in self._tasks:
+            if self._step(entry):
+                self._run_due(self._priority_tasks)
+
+        if self._finished:
+            # Finished tasks are removed here and not while iterating
+            self._priority_tasks = [e for e in self._priority_tasks if e[1]]
+            self._tasks = [e for e in self._tasks if e[1]]
+            self._finished = False
+
+        if self._profiler:
+            self._profiler.stop(self._loop_stage, start)
+
+        now = self._clock()
+        next_due = None
+
+        for tasks in (self._priority_tasks, self._tasks):
+            for entry in tasks:
+                if entry[1] and (next_due is None or entry[2] < next_due):
+                    next_due = entry[2]
+
+        return 0 if next_due is None else max(0, next_due - now)
+
+    def run_forever(self):
+        """Run the tasks until all of them are finished. The loop sleeps
+        while no task is due."""
+        while self._priority_tasks or self._tasks:
+            idle = self.run_once()
+
+            if self._profiler:
+                self._profiler.tick()
+
+            if idle > 0:
+                self._sleep(idle)
+
+    def _run_due(self, tasks):
+        """Run one step of each due task in the list
+
+        Arguments:
+            tasks {list} -- task entries
+        """
+        for entry in tasks:
+            self._step(entry)
+
+    def _step(self, entry):
+        """Run one step of a task, if it is due
+
+        Arguments:
+            entry {list} -- task entry
+
+        Returns:
+            bool -- True if the task was run
+        """
+        if not entry[1] or entry[2] > self._clock():
+            return False
+
+        if self._profiler:
+            start = self._profiler.start()
+
+        try:
+            delay = next(entry[1])
+        except StopIteration:
+            self.log(f"Task {entry[0]} finished")
+            entry[1] = None
+            self._finished = True
+            return True
+
+        if self._profiler:
+            self._profiler.stop(entry[3], start)
+
+        if self._sample:
+            self._sample()
+
+        entry[2] = self._clock() + (delay or 0)
+
+        return True
+
+
+def run_until_complete(task):
+    """Run a task generator to its end outside of a TaskLoop (blocking)
+
+    Arguments:
+        task {generator} -- Task generator
+
+    Returns:
+        object -- return value of the task
+    """
+    try:
+        while True:
+            delay = next(task)
+
+            if delay:
+                time.sleep(delay)
+    except StopIteration as stop:
+        return stop.value
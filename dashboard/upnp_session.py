@@ -0,0 +1,402 @@
+import gc
+import time
+
+# Size of the receive buffer. Header and body of a response have to fit,
+# the SOAP responses of the router are below 1 KB.
+BUFFER_SIZE = 1024
+
+# Seconds between two checks for data from the router. Every check is a
+# round trip to the ESP32 over SPI.
+POLL_INTERVAL = 0.01
+
+if hasattr(bytearray, "find"):
+
+    def find(buffer, pattern, start, end):
+        """Index of pattern in buffer[start:end], -1 if it isn't there.
+        Searches the buffer in place.
+
+        Arguments:
+            buffer {bytearray} -- buffer
+            pattern {bytes} -- bytes to find
+            start {int} -- first index
+            end {int} -- index after the last one
+
+        Returns:
+            int -- index in the buffer
+        """
+        return buffer.find(pattern, start, end)
+
+else:
+
+    def find(buffer, pattern, start, end):
+        # MicroPython's bytearray has no find(), so a copy of the range
+        # is searched
+        index = bytes(memoryview(buffer)[start:end]).find(pattern)
+        return index + start if index >= 0 else -1
+
+
+def parse_int(buffer, start, end):
+    """Parse the decimal number at the start of buffer[start:end] without
+    copying or decoding it. Leading spaces are skipped.
+
+    Arguments:
+        buffer {bytearray} -- buffer
+        start {int} -- first index
+        end {int} -- index after the last one
+
+    Returns:
+        int -- number, None if there are no digits
+    """
+    while start < end and buffer[start] == 32:
+        start += 1
+
+    value = None
+    while start < end and 48 <= buffer[start] <= 57:
+        value = (value or 0) * 10 + buffer[start] - 48
+        start += 1
+
+    return value
+
+
+def build_request(host, port, path, soapaction, body):
+    """Encode a SOAP POST request, header and body, so it can be sent as
+    it is with UpnpSession.send()
+
+    Arguments:
+        host {string} -- IP address or host name of the router
+        port {int} -- UPnP port of the router
+        path {string} -- Request path, e.g. /igdupnp/control/WANIPConn1
+        soapaction {string} -- Value of the SOAPAction header
+        body {string} -- SOAP envelope
+
+    Returns:
+        bytes -- request
+    """
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+
+    return (
+        f"POST {path} HTTP/1.1\r\n"
+        f"Host: {host}:{port}\r\n"
+        "charset: utf-8\r\n"
+        "content-type: text/xml\r\n"
+        f"soapaction: {soapaction}\r\n"
+        f"content-length: {len(body)}\r\n"
+        "connection: keep-alive\r\n\r\n"
+    ).encode("utf-8") + body
+
+
+class UpnpSession:
+    """Minimal HTTP/1.1 client that keeps a single socket to the router
+    open and reuses it for every SOAP call (keep-alive). A stale socket
+    is detected on the next request and replaced transparently.
+
+    Requests are sent pre-encoded (see build_request()). Responses are
+    received into one preallocated buffer, which holds the body of the
+    current response at buffer[body_start:body_end] until release()."""
+
+    def __init__(
+        self, socket_module, host, port, timeout=2, buffer_size=BUFFER_SIZE, debug=False
+    ):
+        """Constructor
+
+        Arguments:
+            socket_module {module} -- socket module to use (usually
+                adafruit_esp32spi_socket with the interface already set)
+            host {string} -- IP address or host name of the router
+            port {int} -- UPnP port of the router
+
+        Keyword Arguments:
+            timeout {int} -- Socket timeout in seconds (default: {2})
+            buffer_size {int} -- Size of the receive buffer, the biggest
+                response that can be read (default: {BUFFER_SIZE})
+            debug {bool} -- Show debug information (default: {False})
+        """
+        self._debug_mode = debug
+        self._socket_module = socket_module
+        self._host = host
+        self._port = port
+        self._timeout = timeout
+
+        self._socket = None
+        self._recv_into = None
+        self._keep_alive = True
+
+        self.buffer = bytearray(buffer_size)
+        self._view = memoryview(self.buffer)
+        # Bytes received into the buffer
+        self._length = 0
+
+        # Body of the current response, body_end is -1 if it ends when
+        # the router closes the connection
+        self.body_start = 0
+        self.body_end = 0
+
+        # Statistics, e.g. to compare socket opens per minute
+        self.socket_opens = 0
+        self.requests_sent = 0
+
+    def log(self, text):
+        """Simple logger
+
+        Arguments:
+            text {string} -- Display text
+        """
+        if self._debug_mode:
+            print(text)
+
+    def close(self):
+        """Close the socket. The next request opens a new one."""
+        if self._socket:
+            try:
+                self._socket.close()
+            except (OSError, RuntimeError):
+                pass
+
+        self._socket = None
+        self._keep_alive = True
+        self._length = 0
+        self.body_start = 0
+        self.body_end = 0
+
+    def post(self, request):
+        """Send a request and read the response header. This is a TaskLoop
+        generator: it yields while waiting for the router and returns the
+        HTTP status code. The response has to be released with release()
+        before the next request is sent.
+
+        A request on a reused socket that fails before the status line
+        was received is retried once on a fresh socket.
+
+        Arguments:
+            request {bytes} -- request made with build_request()
+
+        Returns:
+            int -- HTTP status code
+        """
+        # Drop what's left from a previous response, otherwise it would
+        # be read as the answer to this request
+        self.release()
+
+        if self._socket and not self._socket.connected():
+            self.log("Socket was closed by the router")
+            self.close()
+
+        reused = self._socket is not None
+
+        try:
+            self.send(request)
+            status = yield from self.read_header()
+            return status
+        except (OSError, RuntimeError) as error:
+            self.close()
+
+            if not reused:
+                raise
+
+            self.log(f"Stale socket ({error}), reconnecting")
+
+        self.send(request)
+        status = yield from self.read_header()
+        return status
+
+    @property
+    def closed(self):
+        """True if no socket is open, e.g. because the router announced
+        to close the connection after the last response"""
+        return self._socket is None
+
+    def wait(self):
+        """Wait until the socket has something to receive or the router
+        closed the connection. This is a TaskLoop generator, so other
+        tasks can run in the meantime. It checks every POLL_INTERVAL
+        seconds.
+
+        Raises:
+            OSError: no answer within the timeout
+        """
+        stamp = time.monotonic()
+
+        while not self._socket.available():
+            if time.monotonic() - stamp > self._timeout:
+                # Asked only now, every call is a round trip to the ESP32
+                if not self._socket.connected():
+                    return
+                raise OSError("Timeout waiting for the router")
+
+            yield POLL_INTERVAL
+
+    def send(self, request):
+        """Send a request without waiting for the response. Several
+        requests can be sent before reading the responses with
+        read_header() in the same order (pipelining).
+
+        Arguments:
+            request {bytes} -- request made with build_request()
+        """
+        self._connect()
+        self._socket.send(request)
+        self.requests_sent += 1
+
+    def read_header(self):
+        """Read status line and header of the next response. The header
+        is parsed in the buffer, nothing is decoded. This is a TaskLoop
+        generator, so other tasks can run while the router answers.
+
+        Raises:
+            OSError: timeout, the connection was closed or the header
+                doesn't fit into the buffer
+
+        Returns:
+            int -- HTTP status code
+        """
+        if not self._socket:
+            raise OSError("Not connected")
+
+        header_end = yield from self._receive_until(b"\r\n\r\n")
+        buffer = self.buffer
+
+        # Header names are case insensitive
+        for index in range(header_end):
+            if 65 <= buffer[index] <= 90:
+                buffer[index] += 32
+
+        # "HTTP/1.1 200 OK"
+        index = find(buffer, b" ", 0, header_end)
+        status = parse_int(buffer, index, header_end) if index >= 0 else None
+        if status is None:
+            raise OSError("Invalid status line")
+
+        self.body_start = header_end + 4
+        self.body_end = -1
+        index = find(buffer, b"\r\ncontent-length:", 0, header_end)
+        length = parse_int(buffer, index + 17, header_end) if index >= 0 else None
+        if length is not None:
+            self.body_end = self.body_start + length
+
+        index = find(buffer, b"\r\nconnection:", 0, header_end)
+        self._keep_alive = self.body_end >= 0 and not (
+            index >= 0 and find(buffer, b"close", index + 13, index + 19) >= 0
+        )
+
+        return status
+
+    def read_body(self):
+        """Receive the rest of the current response body. This is a
+        TaskLoop generator like read_header().
+
+        Raises:
+            OSError: timeout, the connection was closed early or the body
+                doesn't fit into the buffer
+
+        Returns:
+            tuple -- start and end of the body in self.buffer
+        """
+        if self.body_end < 0:
+            # Until the router closes the connection
+            while True:
+                if not self._receive():
+                    yield from self.wait()
+                    if not self._receive():
+                        break
+            self.body_end = self._length
+        else:
+            while self._length < self.body_end:
+                if not self._receive():
+                    yield from self.wait()
+                    if not self._receive():
+                        raise OSError("Connection closed by the router")
+
+        return self.body_start, self.body_end
+
+    def release(self):
+        """Discard the current response, so the socket can be used for the
+        next request. What the router sent beyond it (the next pipelined
+        response) stays in the buffer. If the response wasn't received
+        completely, the socket is closed instead of waiting for the rest."""
+        if self.body_end < 0 or self.body_end > self._length or not self._keep_alive:
+            self.close()
+            return
+
+        if self.body_end:
+            # Move the start of the next response to the front
+            rest = self._length - self.body_end
+            if rest > self.body_end:
+                # Overlapping ranges, copy through a temporary object
+                self.buffer[:rest] = bytes(self._view[self.body_end : self._length])
+            elif rest:
+                self.buffer[:rest] = self._view[self.body_end : self._length]
+            self._length = rest
+
+        self.body_start = 0
+        self.body_end = 0
+
+    def _receive_until(self, pattern):
+        """Receive until the buffer contains pattern, TaskLoop generator
+
+        Arguments:
+            pattern {bytes} -- bytes to wait for
+
+        Raises:
+            OSError: timeout, the connection was closed or the buffer is
+                full
+
+        Returns:
+            int -- index of the pattern in the buffer
+        """
+        start = 0
+
+        while True:
+            index = find(self.buffer, pattern, start, self._length)
+            if index >= 0:
+                return index
+
+            start = max(self._length - len(pattern) + 1, 0)
+            if not self._receive():
+                yield from self.wait()
+                if not self._receive():
+                    raise OSError("Connection closed by the router")
+
+    def _receive(self):
+        """Receive what the socket has available into the free part of
+        the buffer, without waiting. Reading only what is available
+        keeps the socket library from waiting or buffering on its own.
+
+        Raises:
+            OSError: the buffer is full
+
+        Returns:
+            int -- number of bytes received
+        """
+        space = len(self.buffer) - self._length
+        if not space:
+            raise OSError("Response doesn't fit into the buffer")
+
+        count = min(self._socket.available(), space)
+        if not count:
+            return 0
+
+        if self._recv_into:
+            count = self._recv_into(self._view[self._length :], count)
+        else:
+            data = self._socket.recv(count)
+            count = len(data)
+            self.buffer[self._length : self._length + count] = data
+
+        self._length += count
+        return count
+
+    def _connect(self):
+        """Open a new socket to the router, if there is none"""
+        if self._socket:
+            return
+
+        gc.collect()
+        self._socket = self._socket_module.socket()
+        self._socket.settimeout(self._timeout)
+        self._socket.connect((self._host, self._port))
+        # Newer socket libraries receive into a buffer directly
+        self._recv_into = getattr(self._socket, "recv_into", None)
+        self._length = 0
+        self.socket_opens += 1
+        self.log(f"Socket to {self._host}:{self._port} opened")
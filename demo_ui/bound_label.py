@@ -0,0 +1,68 @@
+import time
+
+
+class BoundLabel:
+    """Show a live value (e.g. a sensor reading) in a label. The value is
+    quantized and formatted and the label is only written if the text
+    changed, at most once per min_interval. Label rebuilds all glyphs on
+    every write, so each value should get its own small label instead of
+    sharing one with others."""
+
+    def __init__(
+        self, label, fmt="{}", step=None, min_interval=0.25, clock=time.monotonic
+    ):
+        """Constructor
+
+        Arguments:
+            label {adafruit_display_text.label.Label} -- label to write to
+
+        Keyword Arguments:
+            fmt {str} -- format string for the value (default: {"{}"})
+            step {float} -- Values are rounded to multiples of step, None
+                means no rounding (default: {None})
+            min_interval {float} -- Minimum seconds between two writes
+                (default: {0.25})
+            clock {function} -- Time source in seconds (default: {time.monotonic})
+        """
+        self.label = label
+        self.fmt = fmt
+        self.step = step
+        self.min_interval = min_interval
+        self._clock = clock
+
+        self._text = label.text
+        self._last_write = -min_interval
+
+        # Statistics
+        self.writes = 0
+        self.skipped = 0
+
+    def update(self, value):
+        """Show a new value. Call it regularly, a change that came too
+        early is written by a later call.
+
+        Arguments:
+            value {object} -- value
+
+        Returns:
+            bool -- True if the label was written
+        """
+        if self.step and value is not None:
+            value = round(value / self.step) * self.step
+
+        text = self.fmt.format(value)
+
+        if text == self._text:
+            self.skipped += 1
+            return False
+
+        now = self._clock()
+        if now - self._last_write < self.min_interval:
+            return False
+
+        self.label.text = text
+        self._text = text
+        self._last_write = now
+        self.writes += 1
+
+        return True
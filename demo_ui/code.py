@@ -1,15 +1,23 @@
-import time
+import gc
 import board
 import displayio
 import busio
 from analogio import AnalogIn
 import neopixel
 import adafruit_adt7410
-from adafruit_bitmap_font import bitmap_font
 from adafruit_display_text.label import Label
 from adafruit_button import Button
 import adafruit_touchscreen
 from adafruit_pyportal import PyPortal
+from audio_feedback import AudioFeedback
+from bound_label import BoundLabel
+from glyph_atlas import load_font
+from hit_index import HitTestIndex
+from image_cache import ImageCache
+from loop_profiler import LoopProfiler
+from text_layout import layout_text
+from touch_filter import TouchFilter
+from view_manager import ViewManager
 
 # ------------- Inputs and Outputs Setup ------------- #
 # init. the temperature sensor
@@ -34,6 +42,7 @@ soundDemo = "/sounds/sound.wav"
 soundBeep = "/sounds/beep.wav"
 soundTab = "/sounds/tab.wav"
 
+
 # ------------- Other Helper Functions------------- #
 # Helper for cycling through a number set of 1 to x.
 def numberUP(num, max_val):
@@ -46,9 +55,16 @@ def numberUP(num, max_val):
 
 # ------------- Screen Setup ------------- #
 pyportal = PyPortal()
+
+# Sound effects don't block the loop, beep is kept in RAM
+audio = AudioFeedback(pyportal.audio, speaker_enable=pyportal._speaker_enable)
+audio.load("beep", soundBeep)
+audio.load("tab", soundTab)
+audio.load("demo", soundDemo)
 display = board.DISPLAY
 display.rotation = 270
 
+
 # Backlight function
 # Value between 0 and 1 where 0 is OFF, 0.5 is 50% and 1 is 100% brightness.
 def set_backlight(val):
@@ -76,24 +92,6 @@ ts = adafruit_touchscreen.Touchscreen(
 
 # ------------- Display Groups ------------- #
 splash = displayio.Group(max_size=15)  # The Main Display Group
-view1 = displayio.Group(max_size=15)  # Group for View 1 objects
-view2 = displayio.Group(max_size=15)  # Group for View 2 objects
-view3 = displayio.Group(max_size=15)  # Group for View 3 objects
-
-
-def hideLayer(hide_target):
-    try:
-        splash.remove(hide_target)
-    except ValueError:
-        pass
-
-
-def showLayer(show_target):
-    try:
-        time.sleep(0.1)
-        splash.append(show_target)
-    except ValueError:
-        pass
 
 
 # ------------- Setup for Images ------------- #
@@ -105,14 +103,11 @@ pyportal.set_background("/images/loading.bmp")
 bg_group = displayio.Group(max_size=1)
 splash.append(bg_group)
 
+# This will handel switching Images and Icons. Images are cached, so
+# switching back to an icon doesn't read the file again.
+image_cache = ImageCache()
 
-icon_group = displayio.Group(max_size=1)
-icon_group.x = 180
-icon_group.y = 120
-icon_group.scale = 1
-view2.append(icon_group)
 
-# This will handel switching Images and Icons
 def set_image(group, filename):
     """Set the image file for a given goup for display.
     This is most useful for Icons or image slideshows.
@@ -120,72 +115,28 @@ def set_image(group, filename):
         :param filename: The filename of the chosen image
     """
     print("Set image to ", filename)
-    if group:
-        group.pop()
-
-    if not filename:
-        return  # we're done, no icon desired
-
-    image_file = open(filename, "rb")
-    image = displayio.OnDiskBitmap(image_file)
-    try:
-        image_sprite = displayio.TileGrid(
-            image, pixel_shader=displayio.ColorConverter()
-        )
-    except TypeError:
-        image_sprite = displayio.TileGrid(
-            image, pixel_shader=displayio.ColorConverter(), position=(0, 0)
-        )
-    group.append(image_sprite)
+    image_cache.show(group, filename)
 
 
 set_image(bg_group, "/images/BGimage.bmp")
 
 # ---------- Text Boxes ------------- #
-# Set the font and preload letters
-font = bitmap_font.load_font("/fonts/Helvetica-Bold-16.bdf")
+# Set the font and preload letters (from the precompiled atlas, if there
+# is one, see tools/compile_font.py)
+font = load_font("/fonts/Helvetica-Bold-16.bdf")
 font.load_glyphs(b"abcdefghjiklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890- ()")
 
 # Default Label styling:
 TABS_X = 5
 TABS_Y = 50
 
-# Text Label Objects
-feed1_label = Label(font, text="Text Wondow 1", color=0xE39300, max_glyphs=200)
-feed1_label.x = TABS_X
-feed1_label.y = TABS_Y
-view1.append(feed1_label)
-
-feed2_label = Label(font, text="Text Wondow 2", color=0xFFFFFF, max_glyphs=200)
-feed2_label.x = TABS_X
-feed2_label.y = TABS_Y
-view2.append(feed2_label)
-
-sensors_label = Label(font, text="Data View", color=0x03AD31, max_glyphs=200)
-sensors_label.x = TABS_X
-sensors_label.y = TABS_Y
-view3.append(sensors_label)
-
-sensor_data = Label(font, text="Data View", color=0x03AD31, max_glyphs=100)
-sensor_data.x = TABS_X + 15
-sensor_data.y = 170
-view3.append(sensor_data)
-
-
-text_hight = Label(font, text="M", color=0x03AD31, max_glyphs=10)
-# return a reformatted string with word wrapping using PyPortal.wrap_nicely
-def text_box(target, top, string, max_chars):
-    text = pyportal.wrap_nicely(string, max_chars)
-    new_text = ""
-    test = ""
-    for w in text:
-        new_text += "\n" + w
-        test += "M\n"
-    text_hight.text = test  # Odd things happen without this
-    glyph_box = text_hight.bounding_box
+
+# return a reformatted string with word wrapping to max_width pixel
+def text_box(target, top, string, max_width):
+    text, width, height = layout_text(font, string, max_width)
     target.text = ""  # Odd things happen without this
-    target.y = int(glyph_box[3] / 2) + top
-    target.text = new_text
+    target.y = int(height / 2) + top
+    target.text = "\n" + "\n".join(text)
 
 
 # ---------- Display Buttons ------------- #
@@ -291,230 +242,348 @@ buttons.append(button_2)  # adding this button to the buttons group
 for b in buttons:
     splash.append(b.group)
 
+# Index to find the pressed button without testing all of them
+hit_index = HitTestIndex(screen_width, screen_height)
+for i, b in enumerate(buttons):
+    hit_index.register_button(b, target=i)
+
+# Buttons that only exist in one view, ids continue after the main ones
+BUTTON_ICON = 5
+BUTTON_SOUND = 6
+
+
+# ------------- Views ------------- #
+# Each view is built when it's shown for the first time. Hidden views
+# are released when memory gets low and built again on demand.
+view_group = displayio.Group(max_size=3)
+splash.append(view_group)
+views = ViewManager(view_group, screen_width, screen_height)
+
+# Free memory below which hidden views are released
+LOW_MEMORY = 20000
+
+# Light sensor readings are shown in steps of this size
+LIGHT_STEP = 256
+
+
+def build_view1(view):
+    feed1_label = Label(font, text="Text Wondow 1", color=0xE39300, max_glyphs=200)
+    feed1_label.x = TABS_X
+    feed1_label.y = TABS_Y
+    view.group.append(feed1_label)
+
+    text_box(
+        feed1_label,
+        TABS_Y,
+        "The text on this screen is wrapped so that all of it fits nicely into a \
+text box that is ### x ###.",
+        300,
+    )
+    text_box(
+        feed1_label,
+        TABS_Y,
+        "The text on this screen is wrapped so that all of it fits nicely into a \
+text box that is {} x {}.".format(
+            feed1_label.bounding_box[2], feed1_label.bounding_box[3] * 2
+        ),
+        300,
+    )
+
+
+def build_view2(view):
+    icon_group = displayio.Group(max_size=1)
+    icon_group.x = 180
+    icon_group.y = 120
+    icon_group.scale = 1
+    view.group.append(icon_group)
+    view.widgets["icon_group"] = icon_group
+    view.on_release.append(lambda: image_cache.show(icon_group, None))
+
+    feed2_label = Label(font, text="Text Wondow 2", color=0xFFFFFF, max_glyphs=200)
+    feed2_label.x = TABS_X
+    feed2_label.y = TABS_Y
+    view.group.append(feed2_label)
+    view.widgets["feed2_label"] = feed2_label
+
+    # Make a button to change the icon image on view2
+    button_icon = Button(
+        x=150,
+        y=60,
+        width=BUTTON_WIDTH,
+        height=BUTTON_HEIGHT,
+        label="Icon",
+        label_font=font,
+        label_color=0xFFFFFF,
+        fill_color=0x8900FF,
+        outline_color=0xBC55FD,
+        selected_fill=0x5A5A5A,
+        selected_outline=0xFF6600,
+        selected_label=0x525252,
+        style=Button.ROUNDRECT,
+    )
+    view.add_button(BUTTON_ICON, button_icon)
+
+    # Show the current friend, if the view was built before
+    if friend_met:
+        show_icon(view)
+    else:
+        text_box(
+            feed2_label, TABS_Y, "Tap on the Icon button to meet a new friend.", 170
+        )
 
-# Make a button to change the icon image on view2
-button_icon = Button(
-    x=150,
-    y=60,
-    width=BUTTON_WIDTH,
-    height=BUTTON_HEIGHT,
-    label="Icon",
-    label_font=font,
-    label_color=0xFFFFFF,
-    fill_color=0x8900FF,
-    outline_color=0xBC55FD,
-    selected_fill=0x5A5A5A,
-    selected_outline=0xFF6600,
-    selected_label=0x525252,
-    style=Button.ROUNDRECT,
-)
-buttons.append(button_icon)  # adding this button to the buttons group
-
-# Add this button to view2 Group
-view2.append(button_icon.group)
-
-# Make a button to play a sound on view2
-button_sound = Button(
-    x=150,
-    y=170,
-    width=BUTTON_WIDTH,
-    height=BUTTON_HEIGHT,
-    label="Sound",
-    label_font=font,
-    label_color=0xFFFFFF,
-    fill_color=0x8900FF,
-    outline_color=0xBC55FD,
-    selected_fill=0x5A5A5A,
-    selected_outline=0xFF6600,
-    selected_label=0x525252,
-    style=Button.ROUNDRECT,
-)
-buttons.append(button_sound)  # adding this button to the buttons group
 
-# Add this button to view2 Group
-view3.append(button_sound.group)
+def show_icon(view):
+    text_box(
+        view.widgets["feed2_label"],
+        TABS_Y,
+        "Every time you tap the Icon button the icon image will \
+change. Say hi to {}!".format(icon_name),
+        170,
+    )
+    set_image(view.widgets["icon_group"], "/images/" + icon_name + ".bmp")
+
+
+def build_view3(view):
+    sensors_label = Label(font, text="Data View", color=0x03AD31, max_glyphs=200)
+    sensors_label.x = TABS_X
+    sensors_label.y = TABS_Y
+    view.group.append(sensors_label)
+
+    # One label per reading, so a change only rebuilds the glyphs of its
+    # own line. Light is shown in steps, temperature to 0.1 degrees.
+    line_height = int(font.get_bounding_box()[1] * 1.25)
+    readouts = (
+        ("touch", "Touch: {}", None),
+        ("light", "Light: {}", LIGHT_STEP),
+        ("temp", " Temp: {:.1f}°F", 0.1),
+    )
+
+    for line, readout in enumerate(readouts):
+        label = Label(font, text="", color=0x03AD31, max_glyphs=30)
+        label.x = TABS_X + 15
+        label.y = 170 + line * line_height
+        view.group.append(label)
+        view.widgets[readout[0]] = BoundLabel(label, readout[1], step=readout[2])
+
+    text_box(
+        sensors_label,
+        TABS_Y,
+        "This screen can display sensor readings and tap Sound to play a WAV file.",
+        280,
+    )
+
+    # Make a button to play a sound on view3
+    button_sound = Button(
+        x=150,
+        y=170,
+        width=BUTTON_WIDTH,
+        height=BUTTON_HEIGHT,
+        label="Sound",
+        label_font=font,
+        label_color=0xFFFFFF,
+        fill_color=0x8900FF,
+        outline_color=0xBC55FD,
+        selected_fill=0x5A5A5A,
+        selected_outline=0xFF6600,
+        selected_label=0x525252,
+        style=Button.ROUNDRECT,
+    )
+    view.add_button(BUTTON_SOUND, button_sound)
+
+
+views.add(1, build_view1)
+views.add(2, build_view2)
+views.add(3, build_view3)
+
 
 # pylint: disable=global-statement
 def switch_view(what_view):
     global view_live
-    if what_view == 1:
-        hideLayer(view2)
-        hideLayer(view3)
-        button_view1.selected = False
-        button_view2.selected = True
-        button_view3.selected = True
-        showLayer(view1)
-        view_live = 1
-        print("View1 On")
-    elif what_view == 2:
-        # global icon
-        hideLayer(view1)
-        hideLayer(view3)
-        button_view1.selected = True
-        button_view2.selected = False
-        button_view3.selected = True
-        showLayer(view2)
-        view_live = 2
-        print("View2 On")
-    else:
-        hideLayer(view1)
-        hideLayer(view2)
-        button_view1.selected = True
-        button_view2.selected = True
-        button_view3.selected = False
-        showLayer(view3)
-        view_live = 3
-        print("View3 On")
+    button_view1.selected = what_view != 1
+    button_view2.selected = what_view != 2
+    button_view3.selected = what_view != 3
+    views.show(what_view)
+    view_live = what_view
+    print("View{} On".format(what_view))
 
 
 # pylint: enable=global-statement
 
 # Set veriables and startup states
-button_view1.selected = False
-button_view2.selected = True
-button_view3.selected = True
-showLayer(view1)
-hideLayer(view2)
-hideLayer(view3)
-
 view_live = 1
 icon = 1
 icon_name = "Ruby"
+friend_met = False
 button_mode = 1
 switch_state = 0
 button_switch.label = "OFF"
 button_switch.selected = True
 
-# Update out Labels with display text.
-text_box(
-    feed1_label,
-    TABS_Y,
-    "The text on this screen is wrapped so that all of it fits nicely into a \
-text box that is ### x ###.",
-    30,
-)
-text_box(
-    feed1_label,
-    TABS_Y,
-    "The text on this screen is wrapped so that all of it fits nicely into a \
-text box that is {} x {}.".format(
-        feed1_label.bounding_box[2], feed1_label.bounding_box[3] * 2
-    ),
-    30,
-)
+# Only view1 is built before the first frame
+switch_view(1)
 
-text_box(feed2_label, TABS_Y, "Tap on the Icon button to meet a new friend.", 18)
+board.DISPLAY.show(splash)
 
-text_box(
-    sensors_label,
-    TABS_Y,
-    "This screen can display sensor readings and tap Sound to play a WAV file.",
-    28,
-)
+# ------------- Loop Profiling ------------- #
+# Set to True to print latency histograms of the loop stages every 30s
+PROFILE_LOOP = False
+
+profiler = LoopProfiler(report_period=30, enabled=PROFILE_LOOP)
+STAGE_LOOP = profiler.stage("loop")
+STAGE_TOUCH = profiler.stage("touch read")
+STAGE_SENSORS = profiler.stage("sensors")
+STAGE_BUTTONS = profiler.stage("buttons")
+
+# ------------- Touch Handling ------------- #
+# A touch has to last 20ms to be a press, the release is an event as
+# well, so the loop never waits for the finger to go away
+touch_filter = TouchFilter(size=5, settle_ms=20)
+
+# Id of the button that is held down
+pressed_id = None
+
+
+def find_button(x, y):
+    """Find the button at a touch point
+
+    Returns:
+        tuple -- button id and button, (None, None) if there is none
+    """
+    i = hit_index.lookup(x, y)
+    if i is not None:
+        return i, buttons[i]
+
+    i = views.lookup(x, y)
+    if i is not None:
+        return i, views.active.buttons[i]
+
+    return None, None
 
-board.DISPLAY.show(splash)
+
+# pylint: disable=global-statement
+def handle_press(i, b):
+    global switch_state, button_mode
+    print("button%d pressed" % i)
+
+    if i in (0, 1, 2) and view_live != i + 1:  # only if not visable yet
+        audio.play("tab")
+        switch_view(i + 1)
+    elif i == 3:
+        audio.play("beep")
+        # Toggle switch button type
+        if switch_state == 0:
+            switch_state = 1
+            b.label = "ON"
+            b.selected = False
+            pixel.fill(WHITE)
+            print("Swich ON")
+        else:
+            switch_state = 0
+            b.label = "OFF"
+            b.selected = True
+            pixel.fill(BLACK)
+            print("Swich OFF")
+        print("Swich Pressed")
+    elif i == 4:
+        audio.play("beep")
+        # Momentary button type
+        b.selected = True
+        print("Button Pressed")
+        button_mode = numberUP(button_mode, 5)
+        if button_mode == 1:
+            pixel.fill(RED)
+        elif button_mode == 2:
+            pixel.fill(YELLOW)
+        elif button_mode == 3:
+            pixel.fill(GREEN)
+        elif button_mode == 4:
+            pixel.fill(BLUE)
+        elif button_mode == 5:
+            pixel.fill(PURPLE)
+        switch_state = 1
+        button_switch.label = "ON"
+        button_switch.selected = False
+    elif i == BUTTON_ICON:
+        audio.play("beep")
+        b.selected = True
+    elif i == BUTTON_SOUND:
+        b.selected = True
+
+
+def handle_release(i, b):
+    global icon, icon_name, friend_met
+
+    if i == 4:
+        print("Button released")
+        b.selected = False
+    elif i == BUTTON_ICON:
+        print("Icon Button Pressed")
+        icon = numberUP(icon, 3)
+        if icon == 1:
+            icon_name = "Ruby"
+        elif icon == 2:
+            icon_name = "Gus"
+        elif icon == 3:
+            icon_name = "Billie"
+        b.selected = False
+        friend_met = True
+        show_icon(views.active)
+    elif i == BUTTON_SOUND:
+        print("Sound Button Pressed")
+        audio.play("demo")
+        b.selected = False
+
+
+def handle_touch(event, x, y):
+    global pressed_id
+
+    if event == TouchFilter.PRESS:
+        i, b = find_button(x, y)
+        if i is not None:
+            pressed_id = i
+            handle_press(i, b)
+    elif event == TouchFilter.RELEASE and pressed_id is not None:
+        i = pressed_id
+        pressed_id = None
+
+        # The view may have changed in the meantime
+        if i < len(buttons):
+            handle_release(i, buttons[i])
+        elif i in views.active.buttons:
+            handle_release(i, views.active.buttons[i])
+
+
+# pylint: enable=global-statement
+
+touch_filter.add_listener(handle_touch)
 
 # ------------- Code Loop ------------- #
 while True:
+    loop_start = profiler.start()
+
     touch = ts.touch_point
+    profiler.stop(STAGE_TOUCH, loop_start)
+
+    stage_start = profiler.start()
     light = light_sensor.value
     tempC = 21.2
     tempF = tempC * 1.8 + 32
 
-    sensor_data.text = "Touch: {}\nLight: {}\n Temp: {}°F".format(touch, light, tempF)
+    if view_live == 3:
+        views.active.widgets["touch"].update(touch)
+        views.active.widgets["light"].update(light)
+        views.active.widgets["temp"].update(tempF)
+    profiler.stop(STAGE_SENSORS, stage_start)
 
     # ------------- Handle Button Press Detection  ------------- #
-    if touch:  # Only do this if the screen is touched
-        # loop with buttons using enumerate() to number each button group as i
-        for i, b in enumerate(buttons):
-            if b.contains(touch):  # Test each button to see if it was pressed
-                print("button%d pressed" % i)
-                if i == 0 and view_live != 1:  # only if view1 is visable
-                    pyportal.play_file(soundTab)
-                    switch_view(1)
-                    while ts.touch_point:
-                        pass
-                if i == 1 and view_live != 2:  # only if view2 is visable
-                    pyportal.play_file(soundTab)
-                    switch_view(2)
-                    while ts.touch_point:
-                        pass
-                if i == 2 and view_live != 3:  # only if view3 is visable
-                    pyportal.play_file(soundTab)
-                    switch_view(3)
-                    while ts.touch_point:
-                        pass
-                if i == 3:
-                    pyportal.play_file(soundBeep)
-                    # Toggle switch button type
-                    if switch_state == 0:
-                        switch_state = 1
-                        b.label = "ON"
-                        b.selected = False
-                        pixel.fill(WHITE)
-                        print("Swich ON")
-                    else:
-                        switch_state = 0
-                        b.label = "OFF"
-                        b.selected = True
-                        pixel.fill(BLACK)
-                        print("Swich OFF")
-                    # for debounce
-                    while ts.touch_point:
-                        pass
-                    print("Swich Pressed")
-                if i == 4:
-                    pyportal.play_file(soundBeep)
-                    # Momentary button type
-                    b.selected = True
-                    print("Button Pressed")
-                    button_mode = numberUP(button_mode, 5)
-                    if button_mode == 1:
-                        pixel.fill(RED)
-                    elif button_mode == 2:
-                        pixel.fill(YELLOW)
-                    elif button_mode == 3:
-                        pixel.fill(GREEN)
-                    elif button_mode == 4:
-                        pixel.fill(BLUE)
-                    elif button_mode == 5:
-                        pixel.fill(PURPLE)
-                    switch_state = 1
-                    button_switch.label = "ON"
-                    button_switch.selected = False
-                    # for debounce
-                    while ts.touch_point:
-                        pass
-                    print("Button released")
-                    b.selected = False
-                if i == 5 and view_live == 2:  # only if view2 is visable
-                    pyportal.play_file(soundBeep)
-                    b.selected = True
-                    while ts.touch_point:
-                        pass
-                    print("Icon Button Pressed")
-                    icon = numberUP(icon, 3)
-                    if icon == 1:
-                        icon_name = "Ruby"
-                    elif icon == 2:
-                        icon_name = "Gus"
-                    elif icon == 3:
-                        icon_name = "Billie"
-                    b.selected = False
-                    text_box(
-                        feed2_label,
-                        TABS_Y,
-                        "Every time you tap the Icon button the icon image will \
-change. Say hi to {}!".format(
-                            icon_name
-                        ),
-                        18,
-                    )
-                    set_image(icon_group, "/images/" + icon_name + ".bmp")
-                if i == 6 and view_live == 3:  # only if view3 is visable
-                    b.selected = True
-                    while ts.touch_point:
-                        pass
-                    print("Sound Button Pressed")
-                    pyportal.play_file(soundDemo)
-                    b.selected = False
+    stage_start = profiler.start()
+    touch_filter.update(touch)
+    profiler.stop(STAGE_BUTTONS, stage_start)
+
+    audio.update()
+
+    if gc.mem_free() < LOW_MEMORY and views.release_hidden():
+        gc.collect()
+
+    profiler.stop(STAGE_LOOP, loop_start)
+    profiler.tick()
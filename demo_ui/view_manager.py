@@ -0,0 +1,155 @@
+import displayio
+from hit_index import HitTestIndex
+
+
+class View:
+    """Content of one view: its display group, the buttons that only
+    exist in this view and other widgets the app wants to reach later."""
+
+    def __init__(self, screen_width, screen_height, max_size=15):
+        """Constructor
+
+        Arguments:
+            screen_width {int} -- Display width
+            screen_height {int} -- Display hight
+
+        Keyword Arguments:
+            max_size {int} -- Maximum number of elements in the view group
+                (default: {15})
+        """
+        self.group = displayio.Group(max_size=max_size)
+        self.hit_index = HitTestIndex(screen_width, screen_height)
+
+        # Button id -> button, the id is returned by lookup()
+        self.buttons = {}
+        self.widgets = {}
+
+        # Functions called when the view is released (e.g. to give cached
+        # images back)
+        self.on_release = []
+
+    def add_button(self, button_id, button):
+        """Add a button to the view
+
+        Arguments:
+            button_id {object} -- id returned by ViewManager.lookup()
+            button {adafruit_button.Button} -- button
+        """
+        self.group.append(button.group)
+        self.hit_index.register_button(button, target=button_id)
+        self.buttons[button_id] = button
+
+
+class ViewManager:
+    """Show one of several views in a parent group. A view is built by
+    its factory the first time it is shown, so nothing (including the
+    text layout) is done for views that are never visible. Built views
+    stay in the parent group and switching views only flips their hidden
+    flags. Hidden views can be released to free memory, they are built
+    again when they are shown the next time."""
+
+    def __init__(self, parent, screen_width, screen_height, debug=False):
+        """Constructor
+
+        Arguments:
+            parent {displayio.Group} -- group the views are shown in, it
+                needs room for all views
+            screen_width {int} -- Display width
+            screen_height {int} -- Display hight
+
+        Keyword Arguments:
+            debug {bool} -- Show debug information (default: {False})
+        """
+        self._debug_mode = debug
+        self._parent = parent
+        self._screen_width = screen_width
+        self._screen_height = screen_height
+
+        self._factories = {}
+        self._views = {}
+
+        self.active_name = None
+        self.active = None
+
+    def log(self, text):
+        """Simple logger
+
+        Arguments:
+            text {string} -- Display text
+        """
+        if self._debug_mode:
+            print(text)
+
+    def add(self, name, factory):
+        """Add a view
+
+        Arguments:
+            name {object} -- view name
+            factory {function} -- called with a new View to fill it
+        """
+        self._factories[name] = factory
+
+    def show(self, name):
+        """Show a view, building it if needed. The previous view is
+        hidden, but stays built until release_hidden() is called. For a
+        built view this is just a change of two hidden flags.
+
+        Arguments:
+            name {object} -- view name
+
+        Returns:
+            View -- the view
+        """
+        if name == self.active_name:
+            return self.active
+
+        view = self._views.get(name)
+        if view is None:
+            view = View(self._screen_width, self._screen_height)
+            self._factories[name](view)
+            self._views[name] = view
+            self._parent.append(view.group)
+            self.log(f"View {name} built")
+
+        if self.active is not None:
+            self.active.group.hidden = True
+
+        view.group.hidden = False
+        self.active_name = name
+        self.active = view
+
+        return view
+
+    def lookup(self, x, y):
+        """Find the button of the active view at a touch point
+
+        Arguments:
+            x {int} -- x position
+            y {int} -- y position
+
+        Returns:
+            object -- button id or None
+        """
+        if self.active is None:
+            return None
+
+        return self.active.hit_index.lookup(x, y)
+
+    def release_hidden(self):
+        """Drop all hidden views, e.g. when memory gets low
+
+        Returns:
+            int -- number of released views
+        """
+        hidden = [name for name in self._views if name != self.active_name]
+
+        for name in hidden:
+            view = self._views.pop(name)
+
+            for release in view.on_release:
+                release()
+
+            self._parent.remove(view.group)
+            self.log(f"View {name} released")
+
+        return len(hidden)
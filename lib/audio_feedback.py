@@ -0,0 +1,179 @@
+import struct
+from array import array
+
+import audiocore
+
+
+class AudioFeedback:
+    """Non-blocking sound effects. Short clips are read into RAM once and
+    played from there, longer ones are streamed from the file. play()
+    returns right away, a new play() stops the clip that is still playing
+    (retrigger). update() switches the speaker off once the clip is over,
+    call it regularly from the main loop."""
+
+    def __init__(self, audio_out, speaker_enable=None, max_preload=16384, debug=False):
+        """Constructor
+
+        Arguments:
+            audio_out {audioio.AudioOut} -- audio output (e.g.
+                PyPortal.audio)
+
+        Keyword Arguments:
+            speaker_enable {digitalio.DigitalInOut} -- Speaker enable pin,
+                switched on only while playing (default: {None})
+            max_preload {int} -- Clips with more sample bytes are streamed
+                instead of being kept in RAM (default: {16384})
+            debug {bool} -- Show debug information (default: {False})
+        """
+        self._debug_mode = debug
+        self._audio = audio_out
+        self._speaker_enable = speaker_enable
+        self.max_preload = max_preload
+
+        # Name -> RawSample or file name for streamed clips
+        self._clips = {}
+        # Name -> file name
+        self._files = {}
+
+        self._stream_file = None
+        self._active = False
+
+    def log(self, text):
+        """Simple logger
+
+        Arguments:
+            text {string} -- Display text
+        """
+        if self._debug_mode:
+            print(text)
+
+    @property
+    def playing(self):
+        """True while a clip is playing"""
+        return self._audio.playing
+
+    def load(self, name, filename):
+        """Load a WAV file (PCM, 8 or 16 bit, mono or stereo). Short
+        clips are preloaded into RAM.
+
+        Arguments:
+            name {str} -- name to play the clip with
+            filename {str} -- WAV file path+name
+        """
+        self._files[name] = filename
+
+        with open(filename, "rb") as wav_file:
+            channels, sample_rate, bits, size = self._read_header(wav_file)
+
+            if size > self.max_preload:
+                self._clips[name] = filename
+                self.log(f"{filename} ({size} bytes) is streamed")
+                return
+
+            data = bytearray(size)
+            wav_file.readinto(data)
+
+        typecode = "h" if bits == 16 else "B"
+        samples = array(typecode)
+        if hasattr(samples, "frombytes"):
+            samples.frombytes(data)
+        else:
+            # MicroPython copies the raw bytes of a bytearray
+            samples = array(typecode, data)
+        data = None
+
+        self._clips[name] = audiocore.RawSample(
+            samples, channel_count=channels, sample_rate=sample_rate
+        )
+        self.log(f"{filename} ({size} bytes) preloaded")
+
+    def play(self, name):
+        """Start playing a clip, a clip that is still playing is stopped
+
+        Arguments:
+            name {str} -- name of the clip
+        """
+        self.stop()
+
+        clip = self._clips[name]
+        if isinstance(clip, str):
+            self._stream_file = open(clip, "rb")
+            clip = audiocore.WaveFile(self._stream_file)
+
+        if self._speaker_enable:
+            self._speaker_enable.value = True
+
+        self._audio.play(clip)
+        self._active = True
+
+    def release(self):
+        """Stream the preloaded clips from their files from now on, to free
+        the RAM they use. Streamed clips take a bit longer to start."""
+        self.stop()
+
+        for name, clip in self._clips.items():
+            if not isinstance(clip, str):
+                self._clips[name] = self._files[name]
+                self.log(f"{name} is streamed from now on")
+
+    def stop(self):
+        """Stop the current clip"""
+        if self._audio.playing:
+            self._audio.stop()
+
+        self._finish()
+
+    def update(self):
+        """Switch off the speaker and close the stream once a clip is
+        over"""
+        if self._active and not self._audio.playing:
+            self._finish()
+
+    def _finish(self):
+        """Release what the last clip used"""
+        if self._stream_file:
+            self._stream_file.close()
+            self._stream_file = None
+
+        if self._speaker_enable and self._active:
+            self._speaker_enable.value = False
+
+        self._active = False
+
+    @staticmethod
+    def _read_header(wav_file):
+        """Read the header of a WAV file up to the start of the samples
+
+        Arguments:
+            wav_file {file} -- WAV file opened in binary mode
+
+        Raises:
+            ValueError: not a PCM WAV file
+
+        Returns:
+            tuple -- channels, sample rate, bits per sample and size of
+                the sample data in bytes
+        """
+        riff = wav_file.read(12)
+        if riff[0:4] != b"RIFF" or riff[8:12] != b"WAVE":
+            raise ValueError("Not a WAV file")
+
+        fmt = None
+
+        while True:
+            chunk = wav_file.read(8)
+            if len(chunk) < 8:
+                raise ValueError("No data in WAV file")
+
+            chunk_id = chunk[0:4]
+            size = struct.unpack("<I", chunk[4:8])[0]
+
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", wav_file.read(16))
+                wav_file.seek(wav_file.tell() + size - 16 + (size & 1))
+            elif chunk_id == b"data":
+                if not fmt or fmt[0] != 1:
+                    raise ValueError("Only PCM WAV files are supported")
+                return fmt[1], fmt[2], fmt[5], size
+            else:
+                wav_file.seek(wav_file.tell() + size + (size & 1))
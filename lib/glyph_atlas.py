@@ -0,0 +1,146 @@
+import os
+import struct
+
+import displayio
+from adafruit_bitmap_font import bitmap_font
+
+try:
+    from fontio import Glyph
+except ImportError:
+    from displayio import Glyph
+
+HEADER_FORMAT = "<4sHhhhh"
+HEADER_SIZE = 14
+ENTRY_FORMAT = "<HBBbbbbI"
+ENTRY_SIZE = 12
+
+
+def load_font(filename):
+    """Drop-in replacement for bitmap_font.load_font(). If a glyph atlas
+    (created with tools/compile_font.py) exists next to the BDF file it is
+    used, otherwise the BDF file is parsed as usual.
+
+    Arguments:
+        filename {str} -- BDF file path+name
+
+    Returns:
+        object -- font
+    """
+    atlas = filename.rsplit(".", 1)[0] + ".atlas"
+
+    try:
+        os.stat(atlas)
+    except OSError:
+        return bitmap_font.load_font(filename)
+
+    return GlyphAtlas(atlas)
+
+
+class GlyphAtlas:
+    """Font read from a precompiled glyph atlas. Only the header and the
+    glyph index are read at load time, glyph bitmaps are read from the
+    file when they are used for the first time."""
+
+    def __init__(self, filename):
+        """Constructor
+
+        Arguments:
+            filename {str} -- atlas file path+name
+        """
+        self._file = open(filename, "rb")
+
+        header = struct.unpack(HEADER_FORMAT, self._file.read(HEADER_SIZE))
+        if header[0] != b"GLA1":
+            raise ValueError(f"{filename} is not a glyph atlas")
+
+        self._count = header[1]
+        self._bounding_box = header[2:]
+        self._index = self._file.read(self._count * ENTRY_SIZE)
+        self._glyphs = {}
+
+    def get_bounding_box(self):
+        """Font bounding box
+
+        Returns:
+            tuple -- width, height, x offset, y offset
+        """
+        return self._bounding_box
+
+    def load_glyphs(self, code_points):
+        """Load glyphs in advance
+
+        Arguments:
+            code_points {str|bytes|int} -- characters or code points
+        """
+        if isinstance(code_points, int):
+            code_points = (code_points,)
+        elif isinstance(code_points, str):
+            code_points = [ord(char) for char in code_points]
+
+        for code_point in code_points:
+            self.get_glyph(code_point)
+
+    def clear(self):
+        """Drop the loaded glyphs to free memory, they are read from the
+        atlas again when they are used. Glyphs a Label shows stay in
+        memory until its text changes."""
+        self._glyphs = {}
+
+    def get_glyph(self, code_point):
+        """Get a glyph, reading it from the atlas if needed
+
+        Arguments:
+            code_point {int} -- code point
+
+        Returns:
+            Glyph -- glyph or None if the atlas doesn't contain it
+        """
+        if code_point in self._glyphs:
+            return self._glyphs[code_point]
+
+        # Binary search in the index, which is sorted by code point
+        low = 0
+        high = self._count - 1
+        entry = None
+
+        while low <= high:
+            middle = (low + high) // 2
+            entry = struct.unpack_from(ENTRY_FORMAT, self._index, middle * ENTRY_SIZE)
+
+            if entry[0] == code_point:
+                break
+
+            if entry[0] < code_point:
+                low = middle + 1
+            else:
+                high = middle - 1
+
+            entry = None
+
+        glyph = self._read_glyph(entry) if entry else None
+        self._glyphs[code_point] = glyph
+
+        return glyph
+
+    def _read_glyph(self, entry):
+        """Read the bitmap of a glyph
+
+        Arguments:
+            entry {tuple} -- index entry
+
+        Returns:
+            Glyph -- glyph
+        """
+        _, width, height, dx, dy, shift_x, shift_y, offset = entry
+        row_bytes = (width + 7) // 8
+
+        self._file.seek(offset)
+        data = self._file.read(row_bytes * height)
+
+        bitmap = displayio.Bitmap(max(width, 1), max(height, 1), 2)
+        for y in range(height):
+            for x in range(width):
+                if data[y * row_bytes + x // 8] & (0x80 >> (x % 8)):
+                    bitmap[x, y] = 1
+
+        return Glyph(bitmap, 0, width, height, dx, dy, shift_x, shift_y)
@@ -0,0 +1,87 @@
+class HitTestIndex:
+    """Grid based index to find the widget at a touch point. The screen
+    is split into square cells and every widget is registered in the
+    cells it covers, so a lookup only has to check the few widgets of
+    one cell instead of all of them."""
+
+    def __init__(self, screen_width=480, screen_height=320, cell_size=40):
+        """Constructor
+
+        Keyword Arguments:
+            screen_width {int} -- Display width (default: {480})
+            screen_height {int} -- Display hight (default: {320})
+            cell_size {int} -- Edge length of a grid cell in pixel (default: {40})
+        """
+        self._cell_size = cell_size
+        self._columns = (screen_width + cell_size - 1) // cell_size
+        self._rows = (screen_height + cell_size - 1) // cell_size
+
+        # Lists are only created for cells that contain a widget
+        self._cells = [None] * (self._columns * self._rows)
+
+    def register(self, target, x, y, width, height):
+        """Register a rectangular area. Areas should not overlap, if they
+        do, the one registered first wins.
+
+        Arguments:
+            target {object} -- object returned by lookup() for this area
+            x {int} -- left edge
+            y {int} -- top edge
+            width {int} -- width of the area
+            height {int} -- height of the area
+        """
+        entry = (x, y, x + width, y + height, target)
+
+        for row in range(self._row(y), self._row(y + height) + 1):
+            for column in range(self._column(x), self._column(x + width) + 1):
+                index = row * self._columns + column
+
+                if self._cells[index] is None:
+                    self._cells[index] = []
+
+                self._cells[index].append(entry)
+
+    def register_button(self, button, target=None):
+        """Register the area of an adafruit_button.Button
+
+        Arguments:
+            button {adafruit_button.Button} -- button
+
+        Keyword Arguments:
+            target {object} -- object returned by lookup(), the button
+                itself if None (default: {None})
+        """
+        self.register(
+            button if target is None else target,
+            button.x,
+            button.y,
+            button.width,
+            button.height,
+        )
+
+    def lookup(self, x, y):
+        """Find the target at a point
+
+        Arguments:
+            x {int} -- x-coordinate of the touch
+            y {int} -- y-coordinate of the touch
+
+        Returns:
+            object -- registered target or None
+        """
+        cell = self._cells[self._row(y) * self._columns + self._column(x)]
+
+        if cell:
+            for left, top, right, bottom, target in cell:
+                if left <= x <= right and top <= y <= bottom:
+                    return target
+
+        return None
+
+    def _column(self, x):
+        """Grid column of an x-coordinate, clipped to the screen"""
+        return min(max(x // self._cell_size, 0), self._columns - 1)
+
+    def _row(self, y):
+        """Grid row of a y-coordinate, clipped to the screen"""
+        return min(max(y // self._cell_size, 0), self._rows - 1)
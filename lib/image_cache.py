@@ -0,0 +1,190 @@
+import gc
+
+import displayio
+
+# Approximate heap cost of an entry on boards without gc.mem_free()
+DEFAULT_ENTRY_COST = 640
+
+
+class ImageCache:
+    """Keep BMP images open and their TileGrids ready, so switching an
+    image (e.g. a status icon) doesn't open and decode the file again.
+    All images share one ColorConverter. Images that are not shown are
+    evicted in least recently used order when the cache exceeds its byte
+    budget.
+
+    Every get() hands out its own TileGrid over the cached bitmap, so an
+    image can be shown in several places at once. Released TileGrids are
+    handed out again by the next get() of the same image."""
+
+    def __init__(self, byte_budget=8192, debug=False):
+        """Constructor
+
+        Keyword Arguments:
+            byte_budget {int} -- Heap budget in bytes. Images that are
+                shown are never evicted, even if it is exceeded.
+                (default: {8192})
+            debug {bool} -- Show debug information (default: {False})
+        """
+        self._debug_mode = debug
+        self.byte_budget = byte_budget
+
+        self._color_converter = displayio.ColorConverter()
+
+        # path -> [file, bitmap, cost, idle sprites, shown sprites]
+        self._entries = {}
+
+        # Paths, least recently used first
+        self._lru = []
+
+        self.size = 0
+        self.file_opens = 0
+
+    def log(self, text):
+        """Simple logger
+
+        Arguments:
+            text {string} -- Display text
+        """
+        if self._debug_mode:
+            print(text)
+
+    def get(self, filename):
+        """Get a TileGrid for an image file and mark it as shown. The
+        image can't be evicted until all its TileGrids are released
+        again.
+
+        Arguments:
+            filename {str} -- file path+name
+
+        Returns:
+            displayio.TileGrid -- image sprite
+        """
+        entry = self._entries.get(filename)
+
+        if entry:
+            self._lru.remove(filename)
+        else:
+            entry = self._load(filename)
+            self._entries[filename] = entry
+            self.size += entry[2]
+
+        self._lru.append(filename)
+
+        if entry[3]:
+            sprite = entry[3].pop()
+        else:
+            sprite = self._create_sprite(entry[1])
+        entry[4].append(sprite)
+
+        self._evict()
+
+        return sprite
+
+    def preload(self, filename):
+        """Load an image into the cache without showing it
+
+        Arguments:
+            filename {str} -- file path+name
+        """
+        if filename not in self._entries:
+            entry = self._entries[filename] = self._load(filename)
+            entry[3].append(self._create_sprite(entry[1]))
+            self.size += entry[2]
+            self._lru.append(filename)
+            self._evict()
+
+    def release(self, sprite):
+        """Mark a sprite as not shown anymore, so it can be evicted
+
+        Arguments:
+            sprite {displayio.TileGrid} -- sprite returned by get()
+        """
+        for entry in self._entries.values():
+            if sprite in entry[4]:
+                entry[4].remove(sprite)
+                entry[3].append(sprite)
+                break
+
+        self._evict()
+
+    def show(self, group, filename):
+        """Replace the image shown in a group with the one from filename.
+        The group should only contain the image.
+
+        Arguments:
+            group {displayio.Group} -- display group object to be modified
+            filename {str} -- file path+name, None to remove the image
+        """
+        # Got before the old sprite is released, so showing the same
+        # image again doesn't evict and reload it
+        sprite = self.get(filename) if filename else None
+
+        if group:
+            self.release(group.pop())
+
+        if sprite:
+            group.append(sprite)
+
+    def clear(self):
+        """Evict all images that are not shown"""
+        budget = self.byte_budget
+        self.byte_budget = 0
+        self._evict()
+        self.byte_budget = budget
+
+    def _load(self, filename):
+        """Open an image file, without creating a sprite for it yet
+
+        Arguments:
+            filename {str} -- file path+name
+
+        Returns:
+            list -- cache entry
+        """
+        mem_free = getattr(gc, "mem_free", None)
+        before = mem_free() if mem_free else 0
+
+        image_file = open(filename, "rb")
+        self.file_opens += 1
+        image = displayio.OnDiskBitmap(image_file)
+
+        cost = max(before - mem_free(), 0) if mem_free else DEFAULT_ENTRY_COST
+        self.log(f"{filename} loaded ({cost} bytes)")
+
+        return [image_file, image, cost, [], []]
+
+    def _create_sprite(self, image):
+        """Create a TileGrid showing a cached image
+
+        Arguments:
+            image {displayio.OnDiskBitmap} -- bitmap of a cache entry
+
+        Returns:
+            displayio.TileGrid -- image sprite
+        """
+        try:
+            return displayio.TileGrid(image, pixel_shader=self._color_converter)
+        except TypeError:
+            return displayio.TileGrid(
+                image, pixel_shader=self._color_converter, position=(0, 0)
+            )
+
+    def _evict(self):
+        """Drop least recently used images that are not shown until the
+        cache fits into its budget"""
+        index = 0
+
+        while self.size > self.byte_budget and index < len(self._lru):
+            filename = self._lru[index]
+            entry = self._entries[filename]
+
+            if entry[4]:
+                index += 1
+                continue
+
+            entry[0].close()
+            self.size -= entry[2]
+            del self._entries[filename]
+            del self._lru[index]
+            self.log(f"{filename} evicted")
@@ -0,0 +1,221 @@
+import time
+from array import array
+
+try:
+    from time import monotonic_ns
+except ImportError:
+
+    def monotonic_ns():
+        return int(time.monotonic() * 1000000000)
+
+
+class LoopProfiler:
+    """Latency histograms per main loop stage (touch read, DSL poll, ...).
+    Each stage has fixed log-scale buckets: bucket 0 counts durations
+    below 1 microsecond, bucket n the ones from 2^(n-1) up to 2^n
+    microseconds. The last bucket takes everything longer. All counters
+    are allocated when a stage is added, a sample only increments them.
+
+    With a precision above 0, every power of two is split into
+    2^precision buckets (e.g. 5 for about 3 % wide buckets), for host
+    side measurements that need more than the order of magnitude.
+
+    report() prints count, p50, p99 and max per stage in microseconds,
+    either on demand or every report_period seconds via tick(). The
+    percentiles are the upper bounds of their buckets."""
+
+    def __init__(
+        self, buckets=24, report_period=None, enabled=True, precision=0, debug=False
+    ):
+        """Constructor
+
+        Keyword Arguments:
+            buckets {int} -- Buckets per stage, 24 covers up to about 8
+                seconds (default: {24})
+            report_period {float} -- Seconds between reports printed by
+                tick(), None means on demand only (default: {None})
+            enabled {bool} -- Collect samples at all (default: {True})
+            precision {int} -- Bits of a sample kept below its highest
+                bit, 0 gives one bucket per power of two (default: {0})
+            debug {bool} -- Show debug information (default: {False})
+        """
+        self._debug_mode = debug
+        self.buckets = buckets
+        self.report_period = report_period
+        self.enabled = enabled
+        self.precision = precision
+        # Samples below this one get a bucket each
+        self._exact = 2 << precision
+
+        self.names = []
+        self._histograms = []
+        self._max = []
+        self._last_report = time.monotonic()
+
+    def log(self, text):
+        """Simple logger
+
+        Arguments:
+            text {string} -- Display text
+        """
+        if self._debug_mode:
+            print(text)
+
+    def stage(self, name):
+        """Get the id of a stage, the stage is added if it's new
+
+        Arguments:
+            name {str} -- stage name
+
+        Returns:
+            int -- stage id
+        """
+        if name in self.names:
+            return self.names.index(name)
+
+        self.names.append(name)
+        self._histograms.append(array("L", [0] * self.buckets))
+        self._max.append(0)
+        self.log(f"Profiling stage {name}")
+
+        return len(self.names) - 1
+
+    def start(self):
+        """Start time of a sample
+
+        Returns:
+            int -- start time in nanoseconds (0 if disabled)
+        """
+        return monotonic_ns() if self.enabled else 0
+
+    def stop(self, stage, start):
+        """Add the time since start to a stage
+
+        Arguments:
+            stage {int} -- stage id
+            start {int} -- value returned by start()
+        """
+        if self.enabled:
+            self.add(stage, (monotonic_ns() - start) // 1000)
+
+    def add(self, stage, elapsed):
+        """Add a sample to a stage
+
+        Arguments:
+            stage {int} -- stage id
+            elapsed {int} -- duration in microseconds
+        """
+        shift = 0
+        value = elapsed
+        while value >= self._exact:
+            value >>= 1
+            shift += 1
+
+        # Above the exact range, every shift adds half of it as buckets
+        bucket = value + (shift << self.precision) if shift else value
+
+        self._histograms[stage][min(bucket, self.buckets - 1)] += 1
+        if elapsed > self._max[stage]:
+            self._max[stage] = elapsed
+
+    def count(self, stage):
+        """Number of samples of a stage
+
+        Arguments:
+            stage {int} -- stage id
+
+        Returns:
+            int -- samples since the last reset
+        """
+        return sum(self._histograms[stage])
+
+    def maximum(self, stage):
+        """Longest sample of a stage
+
+        Arguments:
+            stage {int} -- stage id
+
+        Returns:
+            int -- microseconds, 0 without samples
+        """
+        return self._max[stage]
+
+    def percentile(self, stage, fraction):
+        """Duration below which the given fraction of samples lies
+
+        Arguments:
+            stage {int} -- stage id
+            fraction {float} -- e.g. 0.99 for p99
+
+        Returns:
+            int -- upper bucket bound in microseconds, 0 without samples
+        """
+        histogram = self._histograms[stage]
+        count = self.count(stage)
+        if not count:
+            return 0
+
+        limit = fraction * count
+        seen = 0
+
+        for bucket in range(self.buckets):
+            seen += histogram[bucket]
+            if seen >= limit:
+                break
+
+        return min(self.upper_bound(bucket), self._max[stage])
+
+    def upper_bound(self, bucket):
+        """Upper bound of a bucket, the first duration not in it
+
+        Arguments:
+            bucket {int} -- bucket index
+
+        Returns:
+            int -- microseconds
+        """
+        half = self._exact >> 1
+        if bucket < self._exact:
+            return bucket + 1
+
+        shift = bucket // half - 1
+        return (bucket - shift * half + 1) << shift
+
+    def report(self, reset=True):
+        """Print the summary of every stage, one line per stage:
+
+            P,<stage>,<count>,<p50 us>,<p99 us>,<max us>
+
+        Keyword Arguments:
+            reset {bool} -- Clear the histograms afterwards (default: {True})
+        """
+        print("P,stage,count,p50,p99,max")
+
+        for stage, name in enumerate(self.names):
+            print(
+                f"P,{name},{self.count(stage)},"
+                f"{self.percentile(stage, 0.5)},{self.percentile(stage, 0.99)},"
+                f"{self._max[stage]}"
+            )
+
+        if reset:
+            self.reset()
+
+    def reset(self):
+        """Clear the histograms of all stages"""
+        for stage, histogram in enumerate(self._histograms):
+            for bucket in range(self.buckets):
+                histogram[bucket] = 0
+            self._max[stage] = 0
+
+        self._last_report = time.monotonic()
+
+    def tick(self):
+        """Print a report if the report period is over. Call it from the
+        main loop."""
+        if (
+            self.enabled
+            and self.report_period
+            and time.monotonic() - self._last_report >= self.report_period
+        ):
+            self.report()
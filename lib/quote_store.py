@@ -0,0 +1,358 @@
+import os
+import struct
+
+RECORD_MAGIC = 0xA5
+RECORD_QUOTE = 1
+RECORD_SHOWN = 2
+
+# magic, record type, payload length
+HEADER_FORMAT = "<BBH"
+HEADER_SIZE = 4
+CHECKSUM_SIZE = 2
+
+
+def checksum(data):
+    """Fletcher-16 checksum
+
+    Arguments:
+        data {bytes} -- data
+
+    Returns:
+        int -- checksum
+    """
+    sum1 = 0
+    sum2 = 0
+
+    for byte in data:
+        sum1 = (sum1 + byte) % 255
+        sum2 = (sum2 + sum1) % 255
+
+    return (sum2 << 8) | sum1
+
+
+class QuoteStore:
+    """Pool of quotes that are ready to be displayed (already validated
+    and wrapped by the app). New quotes replace the oldest ones and the
+    display rotates through the pool without any network access.
+
+    The pool is kept in an append-only record file, so it survives a
+    reboot. Each record is a header (magic, type, length), the payload
+    and a checksum. Corrupt records (e.g. a write cut off by a reset)
+    are skipped when loading. Only the first showing of a quote is
+    recorded, rotating through the pool doesn't write to the file.
+
+    The file is compacted once it grows beyond max_size. If the pool
+    alone takes more than that, it waits until half of the file is
+    outdated, so not every write rewrites the file. If the file can't be
+    written (no SD card, read-only file system) the pool is only kept in
+    memory."""
+
+    def __init__(self, filename, capacity=8, max_size=4096, debug=False):
+        """Constructor
+
+        Arguments:
+            filename {str} -- record file path+name
+
+        Keyword Arguments:
+            capacity {int} -- Maximum number of quotes (default: {8})
+            max_size {int} -- File size in bytes that triggers a
+                compaction, if it frees at least half of the file
+                (default: {4096})
+            debug {bool} -- Show debug information (default: {False})
+        """
+        self._debug_mode = debug
+        self._filename = filename
+        self.capacity = capacity
+        self.max_size = max_size
+
+        # [sequence number, text] lists, oldest first
+        self._quotes = []
+        self._next_sequence = 0
+        # Rotation cursor, the quote shown last
+        self._last_shown = -1
+        # Newest quote that has ever been shown, as recorded in the file.
+        # Quotes after it are unseen, the rotation doesn't change it.
+        self._newest_shown = -1
+
+        self._size = 0
+        self.corrupt_records = 0
+        self.persistent = True
+
+        self._load()
+
+        if self.corrupt_records or self._compaction_due():
+            self._compact()
+        else:
+            self._check_writable()
+
+    def log(self, text):
+        """Simple logger
+
+        Arguments:
+            text {string} -- Display text
+        """
+        if self._debug_mode:
+            print(text)
+
+    def __len__(self):
+        return len(self._quotes)
+
+    @property
+    def full(self):
+        """True if the pool holds capacity quotes"""
+        return len(self._quotes) >= self.capacity
+
+    @property
+    def unseen(self):
+        """Number of quotes that haven't been shown yet"""
+        return sum(1 for quote in self._quotes if quote[0] > self._newest_shown)
+
+    def add(self, text):
+        """Add a quote, replacing the oldest one if the pool is full
+
+        Arguments:
+            text {str} -- quote as it should be displayed
+        """
+        sequence = self._next_sequence
+        self._add(sequence, text)
+        self._write(RECORD_QUOTE, struct.pack("<I", sequence) + text.encode("utf-8"))
+
+    def next(self):
+        """Get the next quote to display: the oldest one that hasn't been
+        shown yet, or the one after the last shown one if all have been
+        shown, starting over with the oldest one
+
+        Returns:
+            str -- quote or None if the pool is empty
+        """
+        if not self._quotes:
+            return None
+
+        quote = None
+        for candidate in self._quotes:
+            if candidate[0] > self._newest_shown:
+                quote = candidate
+                break
+
+        if quote is None:
+            quote = self._quotes[0]
+            for candidate in self._quotes:
+                if candidate[0] > self._last_shown:
+                    quote = candidate
+                    break
+
+        self._last_shown = quote[0]
+
+        if quote[0] > self._newest_shown:
+            self._newest_shown = quote[0]
+            self._write(RECORD_SHOWN, struct.pack("<I", quote[0]))
+
+        return quote[1]
+
+    def drop_seen(self):
+        """Forget the quotes that have been shown already, except the last
+        one, to free memory. The file keeps them until the next
+        compaction, new quotes take their place.
+
+        Returns:
+            int -- number of dropped quotes
+        """
+        count = len(self._quotes)
+        self._quotes = [
+            quote
+            for quote in self._quotes
+            if quote[0] > self._newest_shown or quote[0] == self._last_shown
+        ]
+        self.log(f"Dropped {count - len(self._quotes)} seen quotes")
+
+        return count - len(self._quotes)
+
+    def _add(self, sequence, text):
+        """Add a quote to the pool in memory
+
+        Arguments:
+            sequence {int} -- sequence number
+            text {str} -- quote
+        """
+        self._quotes.append([sequence, text])
+        self._next_sequence = max(self._next_sequence, sequence + 1)
+
+        while len(self._quotes) > self.capacity:
+            self._quotes.pop(0)
+
+    def _load(self):
+        """Replay the record file"""
+        try:
+            with open(self._filename, "rb") as record_file:
+                data = record_file.read()
+        except OSError:
+            self.log(f"No quote file {self._filename}")
+            return
+
+        self._size = len(data)
+        position = 0
+
+        while position + HEADER_SIZE + CHECKSUM_SIZE <= len(data):
+            magic, record_type, length = struct.unpack_from(
+                HEADER_FORMAT, data, position
+            )
+            end = position + HEADER_SIZE + length
+
+            if (
+                magic != RECORD_MAGIC
+                or end + CHECKSUM_SIZE > len(data)
+                or struct.unpack_from("<H", data, end)[0]
+                != checksum(data[position:end])
+                or not self._replay(record_type, data[position + HEADER_SIZE : end])
+            ):
+                # Resync at the next magic byte
+                self.corrupt_records += 1
+                position = data.find(bytes((RECORD_MAGIC,)), position + 1)
+                if position < 0:
+                    break
+                continue
+
+            position = end + CHECKSUM_SIZE
+
+        if 0 <= position < len(data):
+            # Cut off record at the end of the file
+            self.corrupt_records += 1
+
+        self.log(
+            f"Loaded {len(self._quotes)} quotes, "
+            f"{self.corrupt_records} corrupt records"
+        )
+
+    def _replay(self, record_type, payload):
+        """Apply a record to the pool in memory
+
+        Arguments:
+            record_type {int} -- record type
+            payload {bytes} -- payload
+
+        Returns:
+            bool -- False if the record is invalid
+        """
+        if len(payload) < 4:
+            return False
+
+        sequence = struct.unpack_from("<I", payload)[0]
+
+        if record_type == RECORD_QUOTE:
+            try:
+                text = payload[4:].decode("utf-8")
+            except UnicodeError:
+                return False
+
+            self._add(sequence, text)
+        elif record_type == RECORD_SHOWN:
+            self._last_shown = sequence
+            self._newest_shown = max(self._newest_shown, sequence)
+        else:
+            return False
+
+        return True
+
+    @staticmethod
+    def _record(record_type, payload):
+        """Encode a record
+
+        Arguments:
+            record_type {int} -- record type
+            payload {bytes} -- payload
+
+        Returns:
+            bytes -- record
+        """
+        record = struct.pack(HEADER_FORMAT, RECORD_MAGIC, record_type, len(payload))
+        record += payload
+
+        return record + struct.pack("<H", checksum(record))
+
+    def _write(self, record_type, payload):
+        """Append a record to the file, compact it if it got too big
+
+        Arguments:
+            record_type {int} -- record type
+            payload {bytes} -- payload
+        """
+        if not self.persistent:
+            return
+
+        record = self._record(record_type, payload)
+
+        try:
+            with open(self._filename, "ab") as record_file:
+                record_file.write(record)
+        except OSError as e:
+            self.log(f"Can't write quote file, keeping quotes in memory: {e}")
+            self.persistent = False
+            return
+
+        self._size += len(record)
+
+        if self._compaction_due():
+            self._compact()
+
+    def _compaction_due(self):
+        """Check if the file should be compacted: it is bigger than
+        max_size and at least twice the size of the current pool
+
+        Returns:
+            bool -- True if a compaction is due
+        """
+        if self._size <= self.max_size:
+            return False
+
+        # Size of the file after a compaction
+        size = sum(
+            HEADER_SIZE + 4 + len(quote[1].encode("utf-8")) + CHECKSUM_SIZE
+            for quote in self._quotes
+        )
+        if self._newest_shown >= 0:
+            size += HEADER_SIZE + 4 + CHECKSUM_SIZE
+
+        return self._size >= 2 * size
+
+    def _compact(self):
+        """Rewrite the file with the current pool only"""
+        records = [
+            self._record(
+                RECORD_QUOTE, struct.pack("<I", quote[0]) + quote[1].encode("utf-8")
+            )
+            for quote in self._quotes
+        ]
+        if self._newest_shown >= 0:
+            records.append(
+                self._record(RECORD_SHOWN, struct.pack("<I", self._newest_shown))
+            )
+
+        temp_filename = self._filename + ".tmp"
+
+        try:
+            with open(temp_filename, "wb") as record_file:
+                for record in records:
+                    record_file.write(record)
+
+            try:
+                os.remove(self._filename)
+            except OSError:
+                pass
+
+            os.rename(temp_filename, self._filename)
+        except OSError as e:
+            self.log(f"Can't write quote file, keeping quotes in memory: {e}")
+            self.persistent = False
+            return
+
+        self._size = sum(len(record) for record in records)
+        self.log(f"Compacted quote file to {self._size} bytes")
+
+    def _check_writable(self):
+        """Switch to memory only if the file can't be written"""
+        try:
+            with open(self._filename, "ab"):
+                pass
+        except OSError as e:
+            self.log(f"Can't write quote file, keeping quotes in memory: {e}")
+            self.persistent = False
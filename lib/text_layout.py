@@ -0,0 +1,74 @@
+def layout_text(font, text, max_width, max_lines=None, line_spacing=1.25):
+    """Wrap text at word boundaries by pixel width, using the advance
+    widths of the font's glyphs. No Label is created, the size of the
+    wrapped text is calculated from the glyph metrics in the same pass.
+
+    Arguments:
+        font {object} -- font (bitmap_font or GlyphAtlas)
+        text {str} -- text to wrap
+        max_width {int} -- maximum line width in pixel
+
+    Keyword Arguments:
+        max_lines {int} -- stop and return None as soon as the text
+            needs more lines (default: {None})
+        line_spacing {float} -- line spacing factor as used by
+            adafruit_display_text.label.Label (default: {1.25})
+
+    Returns:
+        tuple -- list of lines, width and height of the text in pixel,
+            or None if the text doesn't fit into max_lines
+    """
+    get_glyph = font.get_glyph
+    space = get_glyph(32)
+    space_width = space.shift_x if space else 0
+    line_height = int(font.get_bounding_box()[1] * line_spacing)
+
+    lines = []
+    line_start = 0
+    line_width = 0
+    width = 0
+    position = 0
+
+    for word in text.split(" "):
+        # Only the advance widths are needed for wrapping
+        word_width = 0
+        for char in word:
+            glyph = get_glyph(ord(char))
+            if glyph:
+                word_width += glyph.shift_x
+
+        if line_width and line_width + space_width + word_width > max_width:
+            # Word doesn't fit anymore, start a new line
+            lines.append(text[line_start : position - 1])
+            width = max(width, line_width)
+
+            if max_lines and len(lines) >= max_lines:
+                return None
+
+            line_start = position
+            line_width = word_width
+        else:
+            line_width += (space_width if line_width else 0) + word_width
+
+        position += len(word) + 1
+
+    lines.append(text[line_start:])
+    width = max(width, line_width)
+
+    # Top of the first line and bottom of the last line relative to the
+    # baseline of their line
+    top = 0
+    for char in lines[0]:
+        glyph = get_glyph(ord(char))
+        if glyph:
+            top = max(top, glyph.height + glyph.dy)
+
+    bottom = 0
+    for char in lines[-1]:
+        glyph = get_glyph(ord(char))
+        if glyph:
+            bottom = min(bottom, glyph.dy)
+
+    height = (len(lines) - 1) * line_height + top - bottom
+
+    return lines, width, height
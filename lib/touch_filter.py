@@ -0,0 +1,205 @@
+import time
+from array import array
+
+
+class TouchFilter:
+    """Turn raw touch screen samples into press, hold and release events.
+    The samples of a touch are kept in a preallocated ring buffer and the
+    position is the median of them, which drops the outliers resistive
+    touch screens produce (especially the first sample of a touch). A
+    press is reported once the touch lasted settle_ms, shorter touches
+    are ignored. Short dropouts while touching don't end the touch."""
+
+    # Events
+    PRESS = 1
+    HOLD = 2
+    RELEASE = 3
+
+    def __init__(
+        self,
+        size=5,
+        settle_ms=20,
+        hold_ms=800,
+        release_ms=30,
+        clock=time.monotonic,
+        debug=False,
+    ):
+        """Constructor
+
+        Keyword Arguments:
+            size {int} -- Number of samples the median is taken of
+                (default: {5})
+            settle_ms {int} -- Time a touch has to last to be a press
+                (default: {20})
+            hold_ms {int} -- Time after the press until a hold event
+                (default: {800})
+            release_ms {int} -- Time without touch until a release
+                (default: {30})
+            clock {function} -- Time source in seconds (default: {time.monotonic})
+            debug {bool} -- Show debug information (default: {False})
+        """
+        self._debug_mode = debug
+        self._clock = clock
+
+        self.settle_ms = settle_ms
+        self.hold_ms = hold_ms
+        self.release_ms = release_ms
+
+        self._size = size
+        self._x = array("h", [0] * size)
+        self._y = array("h", [0] * size)
+        self._scratch = array("h", [0] * size)
+        self._count = 0
+        self._next = 0
+
+        self._touch_start = None
+        self._last_touch = 0
+        self._pressed_at = None
+        self._held = False
+
+        # Filtered position of the current or last touch
+        self.x = 0
+        self.y = 0
+
+        self._listeners = []
+
+    def log(self, text):
+        """Simple logger
+
+        Arguments:
+            text {string} -- Display text
+        """
+        if self._debug_mode:
+            print(text)
+
+    @property
+    def pressed(self):
+        """True between the press and the release event"""
+        return self._pressed_at is not None
+
+    def add_listener(self, listener):
+        """Register a function that is called with (event, x, y) for
+        every event
+
+        Arguments:
+            listener {function} -- event consumer
+        """
+        self._listeners.append(listener)
+
+    def update(self, point):
+        """Process a sample. Call it regularly, also while the screen is
+        not touched, otherwise no release is detected.
+
+        Arguments:
+            point {tuple} -- touch_point of the touch screen (None if not
+                touched)
+
+        Returns:
+            int -- event (PRESS, HOLD, RELEASE) or None
+        """
+        now = self._clock()
+
+        if point:
+            if self._touch_start is None:
+                self._touch_start = now
+                self._count = 0
+                self._next = 0
+
+            self._last_touch = now
+            self._add(point)
+
+            if self._pressed_at is None:
+                if self._elapsed_ms(self._touch_start, now) >= self.settle_ms:
+                    self._pressed_at = now
+                    return self._emit(TouchFilter.PRESS)
+            elif (
+                not self._held
+                and self._elapsed_ms(self._pressed_at, now) >= self.hold_ms
+            ):
+                self._held = True
+                return self._emit(TouchFilter.HOLD)
+
+            return None
+
+        if self._touch_start is None:
+            return None
+
+        if self._elapsed_ms(self._last_touch, now) < self.release_ms:
+            return None  # Maybe just a dropout
+
+        # The touch is over
+        was_pressed = self._pressed_at is not None
+        self._touch_start = None
+        self._pressed_at = None
+        self._held = False
+
+        if was_pressed:
+            return self._emit(TouchFilter.RELEASE)
+
+        self.log("Touch too short, ignored")
+        return None
+
+    def _elapsed_ms(self, since, now):
+        """Milliseconds between two clock readings, rounded. Without the
+        rounding 0.85 - 0.05 s would be less than 800 ms.
+
+        Arguments:
+            since {float} -- earlier reading in seconds
+            now {float} -- later reading in seconds
+
+        Returns:
+            int -- milliseconds
+        """
+        return round((now - since) * 1000)
+
+    def _add(self, point):
+        """Add a sample to the ring buffer and update the position
+
+        Arguments:
+            point {tuple} -- touch point
+        """
+        self._x[self._next] = point[0]
+        self._y[self._next] = point[1]
+        self._next = (self._next + 1) % self._size
+        self._count = min(self._count + 1, self._size)
+
+        self.x = self._median(self._x)
+        self.y = self._median(self._y)
+
+    def _median(self, values):
+        """Median of the buffered samples, sorted in a scratch buffer
+
+        Arguments:
+            values {array} -- sample buffer
+
+        Returns:
+            int -- median
+        """
+        scratch = self._scratch
+
+        # Insertion sort, the buffer is tiny
+        for index in range(self._count):
+            value = values[index]
+            position = index
+            while position > 0 and scratch[position - 1] > value:
+                scratch[position] = scratch[position - 1]
+                position -= 1
+            scratch[position] = value
+
+        return scratch[self._count // 2]
+
+    def _emit(self, event):
+        """Pass an event to the listeners
+
+        Arguments:
+            event {int} -- event
+
+        Returns:
+            int -- the event
+        """
+        self.log(f"Touch event {event} at ({self.x}/{self.y})")
+
+        for listener in self._listeners:
+            listener(event, self.x, self.y)
+
+        return event
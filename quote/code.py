@@ -1,35 +1,101 @@
 import time
 import board
+import adafruit_esp32spi.adafruit_esp32spi_socket as socket
+import adafruit_requests as requests
 from adafruit_pyportal import PyPortal
+from quote_store import QuoteStore
 
 # Set up where we'll be fetching data from
 DATA_SOURCE = "https://www.adafruit.com/api/quotes.php"
-QUOTE_LOCATION = [0, 'text']
-AUTHOR_LOCATION = [0, 'author']
+QUOTE_LOCATION = [0, "text"]
+AUTHOR_LOCATION = [0, "author"]
+
+QUOTE_WRAP = 35  # characters to wrap for quote
+QUOTE_MAXLEN = 180  # longer quotes are cut off
+AUTHOR_MAXLEN = 30
+
+# Quotes are kept on the SD card (mounted to /sd by PyPortal), a new one
+# is shown every minute from there
+QUOTE_STORE_FILE = "/sd/quotes.dat"
+DISPLAY_PERIOD = 60
 
 # the current working directory (where this file is)
-cwd = ("/"+__file__).rsplit('/', 1)[0]
-pyportal = PyPortal(url=DATA_SOURCE,
-                    json_path=(QUOTE_LOCATION, AUTHOR_LOCATION),
-                    status_neopixel=board.NEOPIXEL,
-                    default_bg=cwd+"/quote_background.bmp",
-                    text_font=cwd+"/fonts/Arial-ItalicMT-17.bdf",
-                    text_position=((20, 120),  # quote location
-                                   (5, 210)), # author location
-                    text_color=(0xFFFFFF,  # quote text color
-                                0x8080FF), # author text color
-                    text_wrap=(35, # characters to wrap for quote
-                               0), # no wrap for author
-                    text_maxlen=(180, 30), # max text size for quote & author
-                   )
+cwd = ("/" + __file__).rsplit("/", 1)[0]
+pyportal = PyPortal(
+    status_neopixel=board.NEOPIXEL,
+    default_bg=cwd + "/quote_background.bmp",
+    text_font=cwd + "/fonts/Arial-ItalicMT-17.bdf",
+    text_position=(
+        (20, 120),  # quote location
+        (5, 210),  # author location
+    ),
+    text_color=(
+        0xFFFFFF,  # quote text color
+        0x8080FF,  # author text color
+    ),
+    text_wrap=(0, 0),  # quotes are wrapped before storing them
+    text_maxlen=(QUOTE_MAXLEN, AUTHOR_MAXLEN),
+)
 
 # speed up projects with lots of text by preloading the font!
 pyportal.preload_font()
 
+requests.set_socket(socket, pyportal._esp)
+store = QuoteStore(QUOTE_STORE_FILE)
+
+
+def fetch_quote():
+    """Fetch a quote and store it wrapped, with the author in the last
+    line. Like PyPortal.fetch(), text and author are cut off at their
+    maximum length."""
+    pyportal._connect_esp()
+
+    response = requests.get(DATA_SOURCE)
+    value = response.json()
+    response.close()
+
+    text = value[QUOTE_LOCATION[0]][QUOTE_LOCATION[1]]
+    author = value[AUTHOR_LOCATION[0]][AUTHOR_LOCATION[1]]
+    print("Response is", text, author)
+
+    text = text[:QUOTE_MAXLEN]
+    author = author[:AUTHOR_MAXLEN]
+
+    store.add("\n".join(PyPortal.wrap_nicely(text, QUOTE_WRAP) + [author]))
+
+
+def show_quote():
+    """Show the next quote from the store, no network needed"""
+    quote = store.next()
+    if quote is None:
+        return False
+
+    lines = quote.split("\n")
+    pyportal.set_text("\n".join(lines[:-1]), 0)
+    pyportal.set_text(lines[-1], 1)
+    return True
+
+
+# Show a stored quote right away, fetch one only if there is none
+shown = show_quote()
+last_shown = time.monotonic()
+
 while True:
-    try:
-        value = pyportal.fetch()
-        print("Response is", value)
-    except (ValueError, RuntimeError) as e:
-        print("Some error occured, retrying! -", e)
-    time.sleep(60)
\ No newline at end of file
+    if not shown or time.monotonic() - last_shown >= DISPLAY_PERIOD:
+        shown = show_quote()
+        last_shown = time.monotonic()
+
+    # Keep the store filled once the quote is on the screen, nothing is
+    # fetched while there are unseen quotes left
+    if not store.full or not store.unseen:
+        try:
+            fetch_quote()
+        except (ValueError, RuntimeError) as e:
+            print("Some error occured, retrying! -", e)
+
+        if not shown:
+            # The store was empty, show the fetched quote right away
+            shown = show_quote()
+            last_shown = time.monotonic()
+
+    time.sleep(10 if store.full and store.unseen else 60)
@@ -0,0 +1,3 @@
+"""Host-side PyPortal simulator: stand-ins for the board modules, a
+virtual clock and local servers, to run and measure the apps with
+CPython. See run.py, benchmark.py and upnp_benchmark.py."""
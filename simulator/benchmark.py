@@ -0,0 +1,200 @@
+"""Benchmark the apps on the simulated PyPortal and compare with a
+baseline: boot time, loop latency, memory per stage and network round
+trips.
+
+Runs on the host (CPython), see simulator/run.py:
+
+    python -m simulator.benchmark --duration 300 --repeat 3 --output new.json
+    python -m simulator.benchmark --baseline new.json
+
+Every run happens in a fresh interpreter, the median of the repeats is
+reported. Compute times vary with the host, compare results from the
+same machine only.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from simulator.scenarios import APPS
+
+# (name, path in the report), the metrics of the table. A path without
+# section is a top level value.
+METRICS = (
+    ("boot ms", ("boot", "busy_ms")),
+    ("boot heap", ("boot", "heap")),
+    ("loop p50 ms", ("loop_ms", "p50")),
+    ("loop p99 ms", ("loop_ms", "p99")),
+    ("loop max ms", ("loop_ms", "max")),
+    ("tap p50 ms", ("tap_ms", "p50")),
+    ("tap max ms", ("tap_ms", "max")),
+    ("pixels/s", ("display", "pixels_per_s")),
+    ("heap end", ("heap", "end")),
+    ("min free", ("heap", "min_free")),
+    ("round trips/min", ("network", "round_trips_per_min")),
+    ("ESP32 calls/min", ("network", "esp_calls_per_min")),
+    ("timeouts", ("network", "timeouts")),
+    ("allocation failures", (None, "allocation_failures")),
+    ("reloads", (None, "reloads")),
+)
+
+# Per stage metrics, the stage name is put in front
+STAGE_METRICS = (("mean ms", "mean_ms"), ("peak heap", "peak_heap"))
+
+
+def run_app(app, duration, cpu_scale):
+    """Run an app once, in its own interpreter
+
+    Arguments:
+        app {str} -- app name
+        duration {float} -- seconds of main loop
+        cpu_scale {float} -- factor for the compute time
+
+    Raises:
+        RuntimeError: the app failed
+
+    Returns:
+        dict -- report of simulator.run
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "simulator.run",
+            app,
+            "--duration",
+            str(duration),
+            "--cpu-scale",
+            str(cpu_scale),
+            "--json",
+            "--quiet",
+        ],
+        stdout=subprocess.PIPE,
+        check=False,
+    )
+    if not result.stdout:
+        raise RuntimeError(f"{app} failed with exit code {result.returncode}")
+
+    report = json.loads(result.stdout)
+    if report["error"]:
+        raise RuntimeError(f"{app} failed:\n{report['error']}")
+
+    return report
+
+
+def flatten(report):
+    """Metrics of a report
+
+    Arguments:
+        report {dict} -- report of simulator.run
+
+    Returns:
+        dict -- metric name -> value, None where the app has no value
+    """
+    metrics = {}
+    for name, (section, key) in METRICS:
+        values = report if section is None else report[section] or {}
+        metrics[name] = values.get(key)
+
+    for stage, values in sorted(report["stages"].items()):
+        for name, key in STAGE_METRICS:
+            metrics[f"{stage} {name}"] = values[key]
+
+    return metrics
+
+
+def median(reports):
+    """Median of every metric over repeated runs
+
+    Arguments:
+        reports {list} -- flattened reports
+
+    Returns:
+        dict -- metric name -> median
+    """
+    result = {}
+    for name in reports[0]:
+        values = [report[name] for report in reports if report.get(name) is not None]
+        result[name] = statistics.median(values) if values else None
+
+    return result
+
+
+def _format(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float) and not value.is_integer() and abs(value) < 100:
+        return f"{value:.3f}"
+    return f"{value:.0f}"
+
+
+def print_table(results, baseline=None, out=sys.stdout):
+    """Print the results, with the change against a baseline
+
+    Arguments:
+        results {dict} -- app -> metric name -> value
+
+    Keyword Arguments:
+        baseline {dict} -- results to compare with (default: {None})
+        out {file} -- output (default: {sys.stdout})
+    """
+    for app, metrics in results.items():
+        out.write(f"{app}\n")
+        before = (baseline or {}).get(app, {})
+
+        for name, value in metrics.items():
+            line = f"  {name:<28}{_format(value):>14}"
+
+            old = before.get(name)
+            if old is not None:
+                line += f"{_format(old):>14}"
+                if value is not None and old:
+                    line += f"{(value - old) / abs(old) * 100:>+9.1f} %"
+
+            out.write(line + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "apps", nargs="*", metavar="app", help=f"{', '.join(APPS)} (default: all)"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=300, help="seconds of main loop"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs per app")
+    parser.add_argument(
+        "--cpu-scale", type=float, default=1.0, help="factor for the compute time"
+    )
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON file of an earlier --output")
+    args = parser.parse_args()
+
+    for app in args.apps:
+        if app not in APPS:
+            parser.error(f"unknown app {app}")
+
+    results = {}
+    for app in args.apps or APPS:
+        reports = [
+            flatten(run_app(app, args.duration, args.cpu_scale))
+            for _ in range(args.repeat)
+        ]
+        results[app] = median(reports)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    print_table(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import time
+
+
+class SimulationEnd(BaseException):
+    """Raised at a poll point (sleep, touch read) once the simulated run
+    is over. It's a BaseException, so the apps' error handling doesn't
+    swallow it (bare excepts aside, which the apps only use around
+    network calls)."""
+
+
+class VirtualClock:
+    """Time source of the simulated board. Computing takes real time
+    (scaled by cpu_scale), sleeping takes no real time at all: sleep()
+    just moves the clock forward. So an app that is idle most of the
+    time runs an hour in a few seconds, while the time spent in code is
+    still measured for real."""
+
+    def __init__(self, cpu_scale=1.0, duration=None):
+        """Constructor
+
+        Keyword Arguments:
+            cpu_scale {float} -- Factor applied to the real time spent
+                computing, e.g. to approximate a slower CPU
+                (default: {1.0})
+            duration {float} -- Seconds of virtual time after which
+                check() ends the simulation, None runs forever
+                (default: {None})
+        """
+        self.cpu_scale = cpu_scale
+        self.duration = duration
+
+        self._real_start = time.perf_counter()
+        self._skipped = 0.0
+
+        # Statistics
+        self.sleeps = 0
+        self.slept = 0.0
+
+    def monotonic(self):
+        """Virtual seconds since the clock was created
+
+        Returns:
+            float -- seconds
+        """
+        return self.busy() + self._skipped
+
+    def monotonic_ns(self):
+        """Virtual nanoseconds since the clock was created
+
+        Returns:
+            int -- nanoseconds
+        """
+        return int(self.monotonic() * 1000000000)
+
+    def busy(self):
+        """Virtual seconds spent computing, i.e. not sleeping
+
+        Returns:
+            float -- seconds
+        """
+        return (time.perf_counter() - self._real_start) * self.cpu_scale
+
+    def exclude(self, seconds):
+        """Leave real time out of the busy time, e.g. the time the local
+        servers needed, which the board doesn't spend
+
+        Arguments:
+            seconds {float} -- real seconds
+        """
+        self._real_start += seconds
+
+    def sleep(self, seconds):
+        """Sleep without waiting: move the clock forward. This is a poll
+        point, the simulation may end here.
+
+        Arguments:
+            seconds {float} -- seconds to sleep
+        """
+        self.sleeps += 1
+        self.slept += max(seconds, 0)
+        self.advance(seconds)
+        self.check()
+
+    def advance(self, seconds):
+        """Move the clock forward without ending the simulation, e.g. for
+        a simulated network timeout
+
+        Arguments:
+            seconds {float} -- seconds
+        """
+        if seconds > 0:
+            self._skipped += seconds
+
+    def check(self):
+        """End the simulation if its duration is over
+
+        Raises:
+            SimulationEnd: the duration is over
+        """
+        if self.duration is not None and self.monotonic() >= self.duration:
+            raise SimulationEnd(f"{self.duration} s simulated")
+
+    def install(self):
+        """Replace the functions of the time module by the virtual ones.
+        Modules that bind them at import time (e.g. default arguments)
+        have to be imported afterwards."""
+        self._saved = (time.monotonic, time.monotonic_ns, time.sleep)
+        time.monotonic = self.monotonic
+        time.monotonic_ns = self.monotonic_ns
+        time.sleep = self.sleep
+
+    def uninstall(self):
+        """Restore the functions of the time module"""
+        time.monotonic, time.monotonic_ns, time.sleep = self._saved
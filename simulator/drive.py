@@ -0,0 +1,121 @@
+import builtins
+import os
+
+# Buffer size of the files on the device drive and the SD card
+FILE_BUFFER = 512
+
+
+class Drive:
+    """File system of the simulated board. The apps use absolute paths
+    on the CIRCUITPY drive (e.g. /images/fractal.bmp) and /sd for the SD
+    card. Those paths are mapped to the app directory and to a host
+    directory for the SD card. Files that are deployed from elsewhere
+    (e.g. the dashboard fonts) are looked up in the fallback directories,
+    BDF fonts that don't exist anywhere are replaced by a substitute.
+    Host paths pass through unchanged."""
+
+    def __init__(self, root, sd_dir, fallbacks=(), substitute_font=None):
+        """Constructor
+
+        Arguments:
+            root {str} -- host directory of the CIRCUITPY drive (the app)
+            sd_dir {str} -- host directory of the SD card
+
+        Keyword Arguments:
+            fallbacks {tuple} -- host directories searched for files that
+                are not in root (default: {()})
+            substitute_font {str} -- host path of the BDF font used for
+                missing fonts (default: {None})
+        """
+        self.root = root
+        self.sd_dir = sd_dir
+        self.fallbacks = tuple(fallbacks)
+        self.substitute_font = substitute_font
+
+        # Top level names on the drive, only paths below them are mapped
+        self._names = set(os.listdir(root))
+        for directory in self.fallbacks:
+            self._names.update(os.listdir(directory))
+
+        # Device path -> host path of substituted fonts
+        self.substituted = {}
+
+    def resolve(self, path):
+        """Map a device path to a host path
+
+        Arguments:
+            path {str} -- path as used by the app
+
+        Returns:
+            str -- host path
+        """
+        if not isinstance(path, str) or not path.startswith("/"):
+            return path
+
+        parts = path.split("/", 2)
+
+        if parts[1] == "sd":
+            return os.path.join(self.sd_dir, *parts[2:])
+
+        if parts[1] not in self._names:
+            return path
+
+        relative = path[1:]
+        for directory in (self.root,) + self.fallbacks:
+            candidate = os.path.join(directory, relative)
+            if os.path.exists(candidate):
+                return candidate
+
+        if path.endswith(".bdf") and self.substitute_font:
+            self.substituted[path] = self.substitute_font
+            return self.substitute_font
+
+        return os.path.join(self.root, relative)
+
+    def install(self):
+        """Route open() and the os functions the apps use through
+        resolve()"""
+        self._saved = {
+            "open": builtins.open,
+            "stat": os.stat,
+            "listdir": os.listdir,
+            "remove": os.remove,
+            "rename": os.rename,
+        }
+        saved = self._saved
+
+        def _open(file, *args, **kwargs):
+            path = self.resolve(file)
+            if path != file and len(args) < 2:
+                # A file on the board buffers one FAT sector, CPython
+                # would allocate 8 KB, more than the cached images cost
+                kwargs.setdefault("buffering", FILE_BUFFER)
+            return saved["open"](path, *args, **kwargs)
+
+        def _stat(path, *args, **kwargs):
+            return saved["stat"](self.resolve(path), *args, **kwargs)
+
+        def _listdir(path=".", *args, **kwargs):
+            return saved["listdir"](self.resolve(path), *args, **kwargs)
+
+        def _remove(path, *args, **kwargs):
+            return saved["remove"](self.resolve(path), *args, **kwargs)
+
+        def _rename(src, dst, *args, **kwargs):
+            return saved["rename"](
+                self.resolve(src), self.resolve(dst), *args, **kwargs
+            )
+
+        builtins.open = _open
+        os.stat = _stat
+        os.listdir = _listdir
+        os.remove = _remove
+        os.rename = _rename
+
+    def uninstall(self):
+        """Restore open() and the os functions"""
+        builtins.open = self._saved["open"]
+        os.stat = self._saved["stat"]
+        os.listdir = self._saved["listdir"]
+        os.remove = self._saved["remove"]
+        os.rename = self._saved["rename"]
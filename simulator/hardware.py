@@ -0,0 +1,402 @@
+import gc
+import os
+import sys
+import time
+import tracemalloc
+import types
+from array import array
+
+from simulator.clock import VirtualClock
+from simulator.drive import Drive
+from simulator.network import Network
+
+MODULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "modules")
+
+# Modules the apps share, CIRCUITPY/lib on the board
+LIB_DIR = os.path.join(os.path.dirname(os.path.dirname(MODULES_DIR)), "lib")
+
+# Board modules replaced by the stand-ins, dropped from sys.modules on
+# install so the stand-ins are imported instead of host packages
+STAND_INS = (
+    "adafruit_adt7410",
+    "adafruit_esp32spi",
+    "adafruit_pyportal",
+    "adafruit_touchscreen",
+    "analogio",
+    "audiocore",
+    "audioio",
+    "board",
+    "busio",
+    "digitalio",
+    "displayio",
+    "fontio",
+    "micropython",
+    "neopixel",
+    "supervisor",
+    "usb_hid",
+)
+
+# The simulated board, used by the stand-in modules
+current = None
+
+# Seconds a touch screen read takes on the board: the driver switches the
+# pins between digital and analog and oversamples the analog inputs
+TOUCH_READ = 0.001
+
+
+class TouchScript:
+    """Scripted touches. Times are seconds after the app reached its
+    main loop (the first poll point)."""
+
+    def __init__(self):
+        # (start, end, x, y) tuples
+        self.touches = []
+
+    def tap(self, at, x, y, duration=0.15):
+        """Add a touch
+
+        Arguments:
+            at {float} -- start in seconds after the loop started
+            x {int} -- x position
+            y {int} -- y position
+
+        Keyword Arguments:
+            duration {float} -- seconds the finger stays down
+                (default: {0.15})
+        """
+        self.touches.append((at, at + duration, x, y))
+        self.touches.sort()
+
+    def point(self, elapsed):
+        """Touch point at a time
+
+        Arguments:
+            elapsed {float} -- seconds after the loop started
+
+        Returns:
+            tuple -- x, y and pressure or None
+        """
+        for start, end, x, y in self.touches:
+            if start > elapsed:
+                break
+            if elapsed < end:
+                return (x, y, 40000)
+
+        return None
+
+
+class Hardware:
+    """The simulated PyPortal: virtual clock, file system, network,
+    display and the inputs and outputs the stand-in modules talk to.
+    install() makes it the current board and puts the stand-ins in
+    place of the board modules.
+
+    Poll points are the places where the app waits for something: sleep()
+    and touch screen reads. The simulation can end there, scheduled
+    events run there and the display refreshes itself there (auto
+    refresh), like the background tasks of CircuitPython."""
+
+    def __init__(
+        self,
+        app_dir,
+        sd_dir,
+        fallbacks=(),
+        substitute_font=None,
+        duration=None,
+        cpu_scale=1.0,
+        heap_size=4 << 20,
+    ):
+        """Constructor
+
+        Arguments:
+            app_dir {str} -- host directory with the app (CIRCUITPY)
+            sd_dir {str} -- host directory used as SD card
+
+        Keyword Arguments:
+            fallbacks {tuple} -- host directories searched for files the
+                app directory doesn't have (default: {()})
+            substitute_font {str} -- BDF font used for missing fonts
+                (default: {None})
+            duration {float} -- Seconds of main loop after which the
+                simulation ends, None runs forever (default: {None})
+            cpu_scale {float} -- Factor applied to the real time spent
+                computing (default: {1.0})
+            heap_size {int} -- Heap size gc.mem_free() is based on. The
+                heap use is measured with tracemalloc, so it is in
+                CPython bytes. (default: {4 << 20})
+        """
+        self.app_dir = app_dir
+        self.duration = duration
+        self.heap_size = heap_size
+
+        self.clock = VirtualClock(cpu_scale=cpu_scale)
+        self.drive = Drive(app_dir, sd_dir, fallbacks, substitute_font)
+        self.network = Network(self.clock)
+        self.touch = TouchScript()
+        self.display = None
+
+        # Inputs, light is a value or a function of the loop time
+        self.light = 12000
+        self.temperature = 21.2
+
+        # (time, callable) events, times relative to the loop start
+        self._events = []
+
+        self.loop_start = None
+        self._poll_listeners = []
+
+        # Statistics. They are updated while the app runs, so they don't
+        # allocate memory that would show up in the app's heap use.
+        self.polls = 0
+        self.hid_reports = 0
+        self.sounds_played = 0
+        self.reloads = 0
+        self.allocation_failures = 0
+
+        # IP address (None for any) -> socket reads that fail
+        self._failing_reads = {}
+
+        # Seconds from every touch to the next visible change (refresh or
+        # brightness), -1 for touches without one (yet)
+        self.tap_responses = array("d")
+        self._next_tap = 0
+
+        # Seconds from every touch to the first HID report after it, -1
+        # for touches that sent none
+        self.key_responses = array("d")
+
+    def at(self, seconds, event):
+        """Schedule an event, e.g. a router going offline
+
+        Arguments:
+            seconds {float} -- seconds after the loop started
+            event {function} -- called without arguments
+        """
+        self._events.append((seconds, event))
+        self._events.sort(key=lambda entry: entry[0])
+
+    def fail_allocations(self, ip=None, count=1):
+        """Let socket reads fail with a MemoryError, like the buffer
+        allocation of socket_read on a board that is out of heap
+
+        Keyword Arguments:
+            ip {str} -- IP address of the connection, None for any
+                (default: {None})
+            count {int} -- number of reads that fail (default: {1})
+        """
+        self._failing_reads[ip] = self._failing_reads.get(ip, 0) + count
+
+    def allocate(self, ip):
+        """Called by the socket stand-in before a read allocates its
+        buffer
+
+        Arguments:
+            ip {str} -- IP address of the connection
+
+        Raises:
+            MemoryError: a failure is due
+        """
+        for key in (ip, None):
+            if self._failing_reads.get(key):
+                self._failing_reads[key] -= 1
+                self.allocation_failures += 1
+                raise MemoryError("memory allocation failed (simulated)")
+
+    def add_poll_listener(self, listener):
+        """Get called at every poll point
+
+        Arguments:
+            listener {function} -- called with the current Hardware
+        """
+        self._poll_listeners.append(listener)
+
+    def now(self):
+        """Seconds since the loop started, None during boot
+
+        Returns:
+            float -- seconds
+        """
+        if self.loop_start is None:
+            return None
+        return self.clock.monotonic() - self.loop_start
+
+    def light_value(self):
+        """Current value of the light sensor
+
+        Returns:
+            int -- raw 16 bit value
+        """
+        if callable(self.light):
+            return int(self.light(self.now() or 0))
+        return int(self.light)
+
+    def touch_point(self):
+        """Read the touch screen, a poll point
+
+        Returns:
+            tuple -- x, y and pressure or None
+        """
+        self.poll()
+        self.clock.advance(TOUCH_READ)
+        return self.touch.point(self.now())
+
+    def sleep(self, seconds):
+        """time.sleep() of the board, a poll point
+
+        Arguments:
+            seconds {float} -- seconds
+        """
+        self.poll()
+        self.clock.sleep(seconds)
+
+    def poll(self):
+        """Run the board's background work
+
+        Raises:
+            SimulationEnd: the simulated duration is over
+        """
+        if self.loop_start is None:
+            self.loop_start = self.clock.monotonic()
+            self.clock.duration = (
+                None if self.duration is None else self.loop_start + self.duration
+            )
+
+        self.polls += 1
+
+        elapsed = self.now()
+        while self._events and self._events[0][0] <= elapsed:
+            self._events.pop(0)[1]()
+
+        for listener in self._poll_listeners:
+            listener(self)
+
+        if self.display:
+            self.display.background(self.clock.monotonic())
+
+        self.clock.check()
+
+    def display_changed(self, now):
+        """Called by the display after a refresh or a brightness change,
+        records the response time of the touches that started before
+
+        Arguments:
+            now {float} -- virtual time of the refresh
+        """
+        if self.loop_start is None:
+            return
+
+        touches = self.touch.touches
+        while self._next_tap < len(touches):
+            start = self.loop_start + touches[self._next_tap][0]
+            if start > now:
+                break
+
+            self.tap_responses[self._next_tap] = now - start
+            self._next_tap += 1
+
+    def hid_report(self, now):
+        """Called by the keyboard for every report, records the time from
+        the last touch before it to its first report
+
+        Arguments:
+            now {float} -- virtual time of the report
+        """
+        self.hid_reports += 1
+        if self.loop_start is None:
+            return
+
+        index = -1
+        for start, _, _, _ in self.touch.touches:
+            if self.loop_start + start > now:
+                break
+            index += 1
+
+        if index >= 0 and self.key_responses[index] < 0:
+            self.key_responses[index] = (
+                now - self.loop_start - self.touch.touches[index][0]
+            )
+
+    def mem_free(self):
+        """gc.mem_free() of the board
+
+        Returns:
+            int -- free bytes
+        """
+        return max(self.heap_size - tracemalloc.get_traced_memory()[0], 0)
+
+    def mem_alloc(self):
+        """gc.mem_alloc() of the board
+
+        Returns:
+            int -- allocated bytes
+        """
+        return tracemalloc.get_traced_memory()[0]
+
+    def install(self, secrets):
+        """Make this the current board: patch time, gc and the file
+        system, start the network and put the stand-in modules first on
+        sys.path. The app directory and the shared lib directory come
+        before them, like CIRCUITPY and CIRCUITPY/lib on the board.
+
+        Arguments:
+            secrets {dict} -- content of the secrets module
+        """
+        global current
+        current = self
+
+        self.tap_responses = array("d", [-1.0]) * len(self.touch.touches)
+        self.key_responses = array("d", [-1.0]) * len(self.touch.touches)
+
+        self.clock.install()
+        time.sleep = self.sleep
+        self.drive.install()
+        self.network.start()
+
+        self._saved_gc = (getattr(gc, "mem_free", None), getattr(gc, "mem_alloc", None))
+        gc.mem_free = self.mem_free
+        gc.mem_alloc = self.mem_alloc
+
+        # The app imports the stand-ins and its own modules afresh, like
+        # after a reset, also if the host imported them before (tests)
+        self._saved_modules = dict(sys.modules)
+        for name, module in self._saved_modules.items():
+            path = getattr(module, "__file__", None) or ""
+            if name.split(".")[0] in STAND_INS or path.startswith(
+                (self.app_dir, LIB_DIR)
+            ):
+                del sys.modules[name]
+
+        self._saved_path = list(sys.path)
+        sys.path[0:0] = [self.app_dir, LIB_DIR, MODULES_DIR]
+
+        module = types.ModuleType("secrets")
+        module.secrets = secrets
+        sys.modules["secrets"] = module
+
+        import displayio
+
+        self.display = displayio.Display(480, 320)
+
+    def uninstall(self):
+        """Undo install()"""
+        global current
+
+        self.network.stop()
+        self.drive.uninstall()
+        self.clock.uninstall()
+
+        for name, saved in zip(("mem_free", "mem_alloc"), self._saved_gc):
+            if saved is None:
+                delattr(gc, name)
+            else:
+                setattr(gc, name, saved)
+
+        sys.path[:] = self._saved_path
+
+        # Drop what the app imported (secrets too), the host gets its
+        # modules back
+        for name in set(sys.modules) - set(self._saved_modules):
+            del sys.modules[name]
+        sys.modules.update(self._saved_modules)
+
+        current = None
@@ -0,0 +1,12 @@
+"""Stand-in for adafruit_adt7410, reads the simulated temperature"""
+
+from simulator import hardware
+
+
+class ADT7410:
+    def __init__(self, i2c_bus, address=0x48):
+        self.high_resolution = False
+
+    @property
+    def temperature(self):
+        return hardware.current.temperature
@@ -0,0 +1,89 @@
+"""Stand-in for adafruit_esp32spi 3.3.0: the ESP32 co-processor. The
+access point is always there, name lookups and connections go to the
+network of the simulated board."""
+
+from simulator import hardware
+
+WL_NO_SHIELD = 0xFF
+WL_NO_MODULE = 0xFF
+WL_IDLE_STATUS = 0
+WL_NO_SSID_AVAIL = 1
+WL_SCAN_COMPLETED = 2
+WL_CONNECTED = 3
+WL_CONNECT_FAILED = 4
+WL_CONNECTION_LOST = 5
+WL_DISCONNECTED = 6
+WL_AP_LISTENING = 7
+WL_AP_CONNECTED = 8
+WL_AP_FAILED = 9
+
+SOCKET_CLOSED = 0
+SOCKET_ESTABLISHED = 4
+
+
+class ESP_SPIcontrol:
+    """ESP32 on the SPI bus"""
+
+    TCP_MODE = 0
+    UDP_MODE = 1
+    TLS_MODE = 2
+
+    def __init__(
+        self, spi, cs_pin, ready_pin, reset_pin, gpio0_pin=None, *, debug=False
+    ):
+        self._debug = debug
+        self._ssid = None
+        self._network = hardware.current.network
+
+    @property
+    def status(self):
+        return WL_CONNECTED if self._ssid else WL_IDLE_STATUS
+
+    @property
+    def firmware_version(self):
+        return b"1.7.1\x00"
+
+    @property
+    def MAC_address(self):
+        return b"\x12\x34\x56\x78\x9a\xbc"
+
+    @property
+    def is_connected(self):
+        return self._ssid is not None
+
+    @property
+    def ssid(self):
+        return self._ssid or b""
+
+    @property
+    def rssi(self):
+        return -52
+
+    @property
+    def ip_address(self):
+        return b"\xc0\xa8\xb2\x2a"
+
+    def connect(self, secrets):
+        self.connect_AP(secrets["ssid"], secrets["password"])
+
+    def connect_AP(self, ssid, password):
+        self._network.esp_calls += 2
+        if isinstance(ssid, str):
+            ssid = bytes(ssid, "utf-8")
+        self._ssid = ssid
+        return WL_CONNECTED
+
+    def disconnect(self):
+        self._ssid = None
+
+    def get_host_by_name(self, hostname):
+        self._network.esp_calls += 2
+        if isinstance(hostname, bytes):
+            hostname = str(hostname, "utf-8")
+        return bytes(int(part) for part in self._network.resolve(hostname).split("."))
+
+    def pretty_ip(self, ip):
+        return "%d.%d.%d.%d" % (ip[0], ip[1], ip[2], ip[3])
+
+    def unpretty_ip(self, ip):
+        return bytes(int(part) for part in ip.split("."))
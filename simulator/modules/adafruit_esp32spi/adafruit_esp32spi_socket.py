@@ -0,0 +1,273 @@
+"""Stand-in for adafruit_esp32spi_socket 3.3.0. The sockets are real TCP
+connections to the local servers the network of the simulated board
+routes to. Reads and timeouts behave like the library: recv() waits for
+the full size until the timeout, readline() waits for a complete line.
+Every call that is an SPI transaction on the board is counted, so is
+every request/response turn (round trip)."""
+
+import select
+import socket as _host_socket
+import time
+
+from simulator import hardware
+
+AF_INET = 2
+SOCK_STREAM = 1
+SOCK_DGRAM = 2
+MAX_PACKET = 4000
+
+# Real seconds readline() waits for data before giving up, the library
+# would wait forever
+READLINE_LIMIT = 5
+
+_the_interface = None
+
+
+def set_interface(iface):
+    """Set the ESP32 the sockets use"""
+    global _the_interface
+    _the_interface = iface
+
+
+def getaddrinfo(host, port, family=0, socktype=0, proto=0, flags=0):
+    """Look up a host, there's only IPv4"""
+    if not isinstance(port, int):
+        raise RuntimeError("Port must be an integer")
+    ipaddr = _the_interface.get_host_by_name(host)
+    return [(AF_INET, socktype, proto, "", (ipaddr, port))]
+
+
+class socket:
+    """Socket of the ESP32"""
+
+    def __init__(
+        self, family=AF_INET, type=SOCK_STREAM, proto=0, fileno=None, socknum=None
+    ):
+        if family != AF_INET:
+            raise RuntimeError("Only AF_INET family supported")
+        if type != SOCK_STREAM:
+            raise RuntimeError("Only SOCK_STREAM type supported")
+
+        self._network = hardware.current.network
+        self._network.esp_calls += 1
+        self._buffer = b""
+        self._timeout = 0
+
+        self._host_socket = None
+        self._ip = None
+        self._server = None
+        self._port = None
+        # Requests sent, counted by their request lines
+        self._requests = 0
+        # Virtual time the response to the last request starts arriving
+        self._ready = 0
+        # Received by the ESP32, not read yet
+        self._pending = b""
+        self._closed = False
+        self._sent = False
+
+    def connect(self, address, conntype=None):
+        """Connect to a host and port"""
+        host, port = address
+        if isinstance(host, (bytes, bytearray)):
+            host = "%d.%d.%d.%d" % tuple(host)
+
+        self._network.esp_calls += 2
+        self._ip = self._network.resolve(host)
+        self._server = self._network.route(self._ip, port)
+
+        self._host_socket = _host_socket.create_connection(self._server.address)
+        # Pipelined requests are separate sends, see servers._Handler
+        self._host_socket.setsockopt(
+            _host_socket.IPPROTO_TCP, _host_socket.TCP_NODELAY, 1
+        )
+        self._host_socket.setblocking(False)
+        self._port = self._host_socket.getsockname()[1]
+        self._requests = 0
+        self._network.connects += 1
+        self._buffer = b""
+        # The ESP32 returns once the connection (and TLS) is established
+        self._network.clock.advance(self._server.connect_time)
+
+    def send(self, data):
+        """Send data"""
+        if self._host_socket is None:
+            raise RuntimeError("Socket not connected")
+
+        data = bytes(data)
+        self._network.esp_calls += len(data) // 64 + 2
+        self._network.bytes_sent += len(data)
+        self._host_socket.setblocking(True)
+        self._host_socket.sendall(data)
+        self._host_socket.setblocking(False)
+        self._sent = True
+        self._requests += data.count(b" HTTP/1.")
+        self._ready = self._network.clock.monotonic() + self._server.latency
+
+    def write(self, data):
+        """Sends data to the socket"""
+        self.send(data)
+
+    def readline(self):
+        """Read up to but not including the next \\r\\n"""
+        stamp = self._network.clock.busy()
+
+        while b"\r\n" not in self._buffer:
+            avail = self.available()
+            if avail:
+                self._buffer += self._read(avail)
+            elif self._closed:
+                raise RuntimeError("Connection closed while reading a line")
+            elif self._network.clock.busy() - stamp > READLINE_LIMIT:
+                raise RuntimeError("No line from the server")
+            else:
+                self._wait(0.01)
+
+        firstline, self._buffer = self._buffer.split(b"\r\n", 1)
+        return firstline
+
+    def recv(self, bufsize=0):
+        """Read up to bufsize bytes, 0 reads what is available now"""
+        if bufsize == 0:
+            while True:
+                avail = self.available()
+                if avail:
+                    self._buffer += self._read(avail)
+                else:
+                    break
+            ret = self._buffer
+            self._buffer = b""
+            return ret
+
+        clock = self._network.clock
+        stamp = clock.monotonic()
+        to_read = bufsize - len(self._buffer)
+        received = []
+
+        while to_read > 0:
+            avail = self.available()
+            if avail:
+                stamp = clock.monotonic()
+                data = self._read(min(to_read, avail))
+                received.append(data)
+                to_read -= len(data)
+            elif self._closed:
+                # The library polls until the timeout, skip that time
+                if self._timeout > 0:
+                    clock.advance(max(self._timeout - (clock.monotonic() - stamp), 0))
+                    self._network.timeouts += 1
+                break
+            else:
+                self._wait(0.01)
+
+            if self._timeout > 0 and clock.monotonic() - stamp > self._timeout:
+                self._network.timeouts += 1
+                break
+
+        self._buffer += b"".join(received)
+        ret = self._buffer[:bufsize]
+        self._buffer = self._buffer[bufsize:]
+        return ret
+
+    def read(self, size=0):
+        """Read up to size bytes"""
+        return self.recv(size)
+
+    def settimeout(self, value):
+        """Set the read timeout in seconds, 0 waits forever"""
+        self._timeout = value
+
+    def available(self):
+        """Bytes the ESP32 has received and not handed out yet"""
+        if self._host_socket is None:
+            return 0
+
+        self._network.esp_calls += 1
+        if self._network.clock.monotonic() < self._ready:
+            return 0
+        self._fetch()
+        if not self._pending:
+            self._wait_for_server()
+        return min(len(self._pending), MAX_PACKET)
+
+    def connected(self):
+        """Whether the connection is still open"""
+        if self._host_socket is None:
+            return False
+        if self.available():
+            return True
+        if self._closed:
+            self.close()
+            return False
+        return True
+
+    def close(self):
+        """Close the socket"""
+        self._network.esp_calls += 1
+        if self._host_socket is not None:
+            self._host_socket.close()
+            self._host_socket = None
+
+    def _fetch(self):
+        """Move what the host socket received to the ESP32 buffer"""
+        while not self._closed:
+            readable, _, _ = select.select([self._host_socket], [], [], 0)
+            if not readable:
+                return
+
+            try:
+                data = self._host_socket.recv(4096)
+            except OSError:
+                data = b""
+
+            if not data:
+                self._closed = True
+                return
+
+            self._pending += data
+
+    def _wait_for_server(self):
+        """Wait until the local server has answered every request sent.
+        The server's thread needs real time for that, the server on the
+        network would be done after its latency, so the wait is left out
+        of the virtual clock."""
+        clock = self._network.clock
+        start = time.perf_counter()
+
+        while (
+            not self._pending
+            and not self._closed
+            and self._server.responses(self._port) < self._requests
+            and time.perf_counter() - start < READLINE_LIMIT
+        ):
+            select.select([self._host_socket], [], [], 0.01)
+            self._fetch()
+
+        clock.exclude(time.perf_counter() - start)
+
+    def _read(self, size):
+        """socket_read of the ESP32"""
+        hardware.current.allocate(self._ip)
+        self._network.esp_calls += 1
+        data = self._pending[:size]
+        self._pending = self._pending[size:]
+        self._network.bytes_received += len(data)
+
+        if data and self._sent:
+            self._network.round_trips += 1
+            self._sent = False
+
+        return data
+
+    def _wait(self, seconds):
+        """Wait for data: the server's latency on the virtual clock, the
+        host socket in real time"""
+        if self._host_socket is None:
+            raise RuntimeError("Socket not connected")
+
+        clock = self._network.clock
+        if clock.monotonic() < self._ready:
+            clock.advance(self._ready - clock.monotonic())
+            return
+
+        select.select([self._host_socket], [], [], seconds)
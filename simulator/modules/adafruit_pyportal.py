@@ -0,0 +1,218 @@
+"""Stand-in for adafruit_pyportal 3.2.1, the parts the apps use. The
+display, text and background handling is the library's, on top of the
+other stand-ins, so it costs what it costs on the board."""
+
+import gc
+
+import adafruit_esp32spi.adafruit_esp32spi_socket as socket
+import adafruit_requests as requests
+import audiocore
+import audioio
+import board
+import busio
+import displayio
+import neopixel
+from adafruit_bitmap_font import bitmap_font
+from adafruit_display_text.label import Label
+from adafruit_esp32spi import adafruit_esp32spi
+from digitalio import DigitalInOut
+from simulator import hardware
+
+try:
+    from secrets import secrets
+except ImportError:
+    secrets = None
+
+
+class PyPortal:
+    def __init__(
+        self,
+        *,
+        url=None,
+        headers=None,
+        json_path=None,
+        regexp_path=None,
+        default_bg=0x000000,
+        status_neopixel=None,
+        text_font=None,
+        text_position=None,
+        text_color=0x808080,
+        text_wrap=False,
+        text_maxlen=0,
+        text_transform=None,
+        json_transform=None,
+        image_json_path=None,
+        image_resize=None,
+        image_position=None,
+        image_dim_json_path=None,
+        caption_text=None,
+        caption_font=None,
+        caption_position=None,
+        caption_color=0x808080,
+        image_url_path=None,
+        success_callback=None,
+        esp=None,
+        external_spi=None,
+        debug=False
+    ):
+        self._debug = debug
+        self._backlight = None
+        self.set_backlight(1.0)
+
+        if status_neopixel:
+            self.neopix = neopixel.NeoPixel(status_neopixel, 1, brightness=0.2)
+        else:
+            self.neopix = None
+        self.neo_status(0)
+
+        self.splash = displayio.Group(max_size=15)
+        board.DISPLAY.show(self.splash)
+
+        self._speaker_enable = DigitalInOut(board.SPEAKER_ENABLE)
+        self._speaker_enable.switch_to_output(False)
+        self.audio = audioio.AudioOut(board.AUDIO_OUT)
+
+        if esp:
+            self._esp = esp
+        else:
+            spi = external_spi or busio.SPI(board.SCK, board.MOSI, board.MISO)
+            self._esp = adafruit_esp32spi.ESP_SPIcontrol(
+                spi,
+                DigitalInOut(board.ESP_CS),
+                DigitalInOut(board.ESP_BUSY),
+                DigitalInOut(board.ESP_RESET),
+                DigitalInOut(board.ESP_GPIO0),
+            )
+        requests.set_socket(socket, self._esp)
+
+        self._bg_group = displayio.Group(max_size=1)
+        self._bg_file = None
+        self.splash.append(self._bg_group)
+        self.set_background(default_bg)
+
+        self._text = None
+        self._text_font = None
+        if text_font:
+            if isinstance(text_position[0], (list, tuple)):
+                num = len(text_position)
+                self._text_color = text_color
+                self._text_position = text_position
+                self._text_wrap = text_wrap
+                self._text_maxlen = text_maxlen
+            else:
+                num = 1
+                self._text_color = (text_color,)
+                self._text_position = (text_position,)
+                self._text_wrap = (text_wrap,)
+                self._text_maxlen = (text_maxlen,)
+            self._text = [None] * num
+            self._text_font = bitmap_font.load_font(text_font)
+
+        gc.collect()
+
+    def neo_status(self, value):
+        if self.neopix:
+            self.neopix.fill(value)
+
+    def set_backlight(self, val):
+        val = max(0, min(1.0, val))
+        board.DISPLAY.auto_brightness = False
+        board.DISPLAY.brightness = val
+
+    def set_background(self, file_or_color, position=None):
+        while self._bg_group:
+            self._bg_group.pop()
+
+        if not position:
+            position = (0, 0)
+
+        if not file_or_color:
+            return
+
+        if self._bg_file:
+            self._bg_file.close()
+
+        if isinstance(file_or_color, str):
+            self._bg_file = open(file_or_color, "rb")
+            background = displayio.OnDiskBitmap(self._bg_file)
+            self._bg_sprite = displayio.TileGrid(
+                background,
+                pixel_shader=displayio.ColorConverter(),
+                x=position[0],
+                y=position[1],
+            )
+        elif isinstance(file_or_color, int):
+            color_bitmap = displayio.Bitmap(320, 240, 1)
+            color_palette = displayio.Palette(1)
+            color_palette[0] = file_or_color
+            self._bg_sprite = displayio.TileGrid(
+                color_bitmap, pixel_shader=color_palette, x=position[0], y=position[1]
+            )
+        else:
+            raise RuntimeError("Unknown type of background")
+
+        self._bg_group.append(self._bg_sprite)
+        gc.collect()
+
+    def preload_font(self, glyphs=None):
+        if not glyphs:
+            glyphs = b"0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ-!,. \"'?!"
+        if self._text_font:
+            self._text_font.load_glyphs(glyphs)
+
+    def set_text(self, val, index=0):
+        if not self._text_font:
+            return
+
+        string = str(val)
+        if self._text_maxlen[index]:
+            string = string[: self._text_maxlen[index]]
+
+        if self._text[index]:
+            text_index = self.splash.index(self._text[index])
+            self._text[index] = Label(self._text_font, text=string)
+            self._text[index].color = self._text_color[index]
+            self._text[index].x = self._text_position[index][0]
+            self._text[index].y = self._text_position[index][1]
+            self.splash[text_index] = self._text[index]
+            return
+
+        if self._text_position[index]:
+            self._text[index] = Label(self._text_font, text=string)
+            self._text[index].color = self._text_color[index]
+            self._text[index].x = self._text_position[index][0]
+            self._text[index].y = self._text_position[index][1]
+            self.splash.append(self._text[index])
+
+    def play_file(self, file_name, wait_to_finish=True):
+        wavfile = open(file_name, "rb")
+        wavedata = audiocore.WaveFile(wavfile)
+        self._speaker_enable.value = True
+        self.audio.play(wavedata)
+        if wait_to_finish:
+            hardware.current.clock.advance(wavedata.duration)
+            self.audio.stop()
+            wavfile.close()
+            self._speaker_enable.value = False
+
+    def _connect_esp(self):
+        self.neo_status((0, 0, 100))
+        while not self._esp.is_connected:
+            self._esp.connect_AP(secrets["ssid"], secrets["password"])
+
+    @staticmethod
+    def wrap_nicely(string, max_chars):
+        string = string.replace("\n", "").replace("\r", "")
+        words = string.split(" ")
+        the_lines = []
+        the_line = ""
+        for w in words:
+            if len(the_line + " " + w) <= max_chars:
+                the_line += " " + w
+            else:
+                the_lines.append(the_line)
+                the_line = "" + w
+        if the_line:
+            the_lines.append(the_line)
+        the_lines[0] = the_lines[0][1:]
+        return the_lines
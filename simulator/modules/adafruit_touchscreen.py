@@ -0,0 +1,25 @@
+"""Stand-in for adafruit_touchscreen 1.1.0, plays the touch script of
+the simulated board. Reading the touch point is a poll point."""
+
+from simulator import hardware
+
+
+class Touchscreen:
+    def __init__(
+        self,
+        x1_pin,
+        x2_pin,
+        y1_pin,
+        y2_pin,
+        *,
+        x_resistance=None,
+        samples=4,
+        z_threshold=10000,
+        calibration=None,
+        size=None
+    ):
+        self._size = size
+
+    @property
+    def touch_point(self):
+        return hardware.current.touch_point()
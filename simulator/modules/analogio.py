@@ -0,0 +1,27 @@
+"""Stand-in for analogio, board.LIGHT reads the simulated light level"""
+
+from simulator import hardware
+
+
+class AnalogIn:
+    def __init__(self, pin):
+        self.pin = pin
+        self.reference_voltage = 3.3
+
+    @property
+    def value(self):
+        if self.pin == "A2":
+            return hardware.current.light_value()
+        return 0
+
+    def deinit(self):
+        pass
+
+
+class AnalogOut:
+    def __init__(self, pin):
+        self.pin = pin
+        self.value = 0
+
+    def deinit(self):
+        pass
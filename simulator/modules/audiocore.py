@@ -0,0 +1,48 @@
+"""Stand-in for audiocore, samples know their duration"""
+
+import struct
+
+
+class RawSample:
+    def __init__(self, buffer, *, channel_count=1, sample_rate=8000):
+        self.sample_rate = sample_rate
+        self.duration = len(buffer) / channel_count / sample_rate
+
+    def deinit(self):
+        pass
+
+
+class WaveFile:
+    def __init__(self, file, buffer=None):
+        if file.read(12)[8:12] != b"WAVE":
+            raise ValueError("Invalid WAVE file")
+
+        channels = 1
+        self.sample_rate = 8000
+        bytes_per_sample = 2
+        size = 0
+
+        while True:
+            chunk = file.read(8)
+            if len(chunk) < 8:
+                break
+
+            chunk_id = chunk[0:4]
+            chunk_size = struct.unpack("<I", chunk[4:8])[0]
+
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", file.read(16))
+                channels = fmt[1]
+                self.sample_rate = fmt[2]
+                bytes_per_sample = fmt[5] // 8
+                file.seek(file.tell() + chunk_size - 16 + (chunk_size & 1))
+            elif chunk_id == b"data":
+                size = chunk_size
+                break
+            else:
+                file.seek(file.tell() + chunk_size + (chunk_size & 1))
+
+        self.duration = size / channels / bytes_per_sample / self.sample_rate
+
+    def deinit(self):
+        pass
@@ -0,0 +1,45 @@
+"""Stand-in for the board module of the PyPortal"""
+
+from simulator import hardware
+
+A0 = AUDIO_OUT = SPEAKER = "A0"
+A1 = "A1"
+A2 = LIGHT = "A2"
+A3 = "A3"
+A4 = "A4"
+D3 = "D3"
+D4 = "D4"
+NEOPIXEL = "NEOPIXEL"
+SPEAKER_ENABLE = "SPEAKER_ENABLE"
+SCL = "SCL"
+SDA = "SDA"
+SCK = "SCK"
+MOSI = "MOSI"
+MISO = "MISO"
+SD_CS = "SD_CS"
+SD_CARD_DETECT = "SD_CARD_DETECT"
+ESP_CS = "ESP_CS"
+ESP_BUSY = "ESP_BUSY"
+ESP_RESET = "ESP_RESET"
+ESP_GPIO0 = "ESP_GPIO0"
+ESP_TX = "ESP_TX"
+ESP_RX = "ESP_RX"
+TOUCH_XL = "TOUCH_XL"
+TOUCH_XR = "TOUCH_XR"
+TOUCH_YU = "TOUCH_YU"
+TOUCH_YD = "TOUCH_YD"
+TFT_BACKLIGHT = "TFT_BACKLIGHT"
+
+DISPLAY = hardware.current.display
+
+
+def I2C():
+    import busio
+
+    return busio.I2C(SCL, SDA)
+
+
+def SPI():
+    import busio
+
+    return busio.SPI(SCK, MOSI, MISO)
@@ -0,0 +1,580 @@
+"""Stand-in for the displayio core module (CircuitPython 5 API). Nothing
+is rendered. Instead every change of a shown element marks its screen
+area as dirty, like displayio does, and a refresh counts the pixels it
+would push to the display."""
+
+import struct
+import weakref
+from array import array
+
+from simulator import hardware
+
+
+def _merge(areas, area):
+    """Add an area to a list of areas, merging it with the ones it
+    overlaps
+
+    Arguments:
+        areas {list} -- [x0, y0, x1, y1] lists
+        area {list} -- [x0, y0, x1, y1], x1 and y1 exclusive
+    """
+    index = 0
+    while index < len(areas):
+        other = areas[index]
+        if (
+            area[0] <= other[2]
+            and other[0] <= area[2]
+            and area[1] <= other[3]
+            and other[1] <= area[3]
+        ):
+            area = [
+                min(area[0], other[0]),
+                min(area[1], other[1]),
+                max(area[2], other[2]),
+                max(area[3], other[3]),
+            ]
+            del areas[index]
+            index = 0
+        else:
+            index += 1
+
+    areas.append(area)
+
+
+class _Element:
+    """Common part of Group and TileGrid: position, visibility and the
+    link to the parent group"""
+
+    def __init__(self, x=0, y=0):
+        self._x = x
+        self._y = y
+        self._hidden = False
+        self._parent = None
+
+    @property
+    def x(self):
+        return self._x
+
+    @x.setter
+    def x(self, value):
+        if value != self._x:
+            self._invalidate()
+            self._x = value
+            self._invalidate()
+
+    @property
+    def y(self):
+        return self._y
+
+    @y.setter
+    def y(self, value):
+        if value != self._y:
+            self._invalidate()
+            self._y = value
+            self._invalidate()
+
+    @property
+    def hidden(self):
+        return self._hidden
+
+    @hidden.setter
+    def hidden(self, value):
+        value = bool(value)
+        if value != self._hidden:
+            self._hidden = False
+            self._invalidate()
+            self._hidden = value
+
+    def _origin(self):
+        """Screen position and scale of this element, None if it isn't
+        part of the shown tree
+
+        Returns:
+            tuple -- x, y and scale or None
+        """
+        x = self._x
+        y = self._y
+        scale = 1
+        node = self
+        parent = self._parent
+
+        while parent is not None:
+            if parent._hidden:
+                return None
+            x = parent._x + x * parent._scale
+            y = parent._y + y * parent._scale
+            scale *= parent._scale
+            node = parent
+            parent = parent._parent
+
+        display = hardware.current.display if hardware.current else None
+        if display is None or display._root is not node:
+            return None
+
+        return x, y, scale
+
+    def _invalidate(self):
+        """Mark the area covered by this element as dirty"""
+        if self._hidden:
+            return
+
+        origin = self._origin()
+        if origin is None:
+            return
+
+        x, y, scale = origin
+        area = self._area(x, y, scale * self._content_scale())
+        if area:
+            hardware.current.display._invalidate(area)
+
+    def _content_scale(self):
+        """Scale this element applies to its own content"""
+        return 1
+
+    def _area(self, x, y, scale):
+        """Screen area covered by this element
+
+        Arguments:
+            x {int} -- screen x position of the element
+            y {int} -- screen y position of the element
+            scale {int} -- scale of the element content
+
+        Returns:
+            list -- [x0, y0, x1, y1] or None if it covers nothing
+        """
+        return None
+
+
+class Group(_Element):
+    """Ordered list of elements with a common position and scale"""
+
+    def __init__(self, *, max_size=4, scale=1, x=0, y=0):
+        super().__init__(x, y)
+        self._max_size = max_size
+        self._scale = scale
+        self._children = []
+
+    @property
+    def scale(self):
+        return self._scale
+
+    @scale.setter
+    def scale(self, value):
+        if value < 1:
+            raise ValueError("scale must be >= 1")
+        if value != self._scale:
+            self._invalidate()
+            self._scale = value
+            self._invalidate()
+
+    def _content_scale(self):
+        return self._scale
+
+    def _adopt(self, element):
+        if element._parent is not None:
+            raise ValueError("Layer already in a group.")
+        if len(self._children) >= self._max_size:
+            raise RuntimeError("Group full")
+        element._parent = self
+
+    def append(self, element):
+        self.insert(len(self._children), element)
+
+    def insert(self, index, element):
+        self._adopt(element)
+        self._children.insert(index, element)
+        element._invalidate()
+
+    def index(self, element):
+        return self._children.index(element)
+
+    def pop(self, index=-1):
+        element = self._children[index]
+        element._invalidate()
+        del self._children[index]
+        element._parent = None
+        return element
+
+    def remove(self, element):
+        self.pop(self._children.index(element))
+
+    def __len__(self):
+        return len(self._children)
+
+    def __bool__(self):
+        return bool(self._children)
+
+    def __getitem__(self, index):
+        return self._children[index]
+
+    def __setitem__(self, index, element):
+        if element._parent is not None:
+            raise ValueError("Layer already in a group.")
+
+        old = self._children[index]
+        old._invalidate()
+        old._parent = None
+
+        element._parent = self
+        self._children[index] = element
+        element._invalidate()
+
+    def __delitem__(self, index):
+        self.pop(index)
+
+    def _area(self, x, y, scale):
+        area = None
+
+        for child in self._children:
+            if child._hidden:
+                continue
+
+            child_area = child._area(
+                x + child._x * scale,
+                y + child._y * scale,
+                scale * child._content_scale(),
+            )
+            if child_area is None:
+                continue
+
+            if area is None:
+                area = list(child_area)
+            else:
+                area[0] = min(area[0], child_area[0])
+                area[1] = min(area[1], child_area[1])
+                area[2] = max(area[2], child_area[2])
+                area[3] = max(area[3], child_area[3])
+
+        return area
+
+
+class Bitmap:
+    """Bitmap with a fixed number of colors"""
+
+    def __init__(self, width, height, value_count):
+        if value_count < 1 or value_count > 65536:
+            raise ValueError("value_count must be in 1..65536")
+        self.width = width
+        self.height = height
+        self._data = array("B" if value_count <= 256 else "H", [0]) * (width * height)
+        self._users = weakref.WeakSet()
+
+    def _index(self, index):
+        if isinstance(index, tuple):
+            x, y = index
+            if not (0 <= x < self.width and 0 <= y < self.height):
+                raise IndexError("pixel coordinates out of bounds")
+            return y * self.width + x
+        return index
+
+    def __getitem__(self, index):
+        return self._data[self._index(index)]
+
+    def __setitem__(self, index, value):
+        index = self._index(index)
+        if self._data[index] != value:
+            self._data[index] = value
+            self._changed()
+
+    def fill(self, value):
+        self._data = array(self._data.typecode, [value]) * len(self._data)
+        self._changed()
+
+    def _changed(self):
+        for user in self._users:
+            user._invalidate()
+
+
+class Palette:
+    """Color palette with transparency"""
+
+    def __init__(self, color_count):
+        self._colors = [0] * color_count
+        self._transparent = [False] * color_count
+        self._users = weakref.WeakSet()
+
+    def __len__(self):
+        return len(self._colors)
+
+    def __getitem__(self, index):
+        return self._colors[index]
+
+    def __setitem__(self, index, value):
+        if isinstance(value, (bytes, bytearray)):
+            value = int.from_bytes(value[:3], "big")
+        if self._colors[index] != value:
+            self._colors[index] = value
+            self._changed()
+
+    def make_transparent(self, index):
+        if not self._transparent[index]:
+            self._transparent[index] = True
+            self._changed()
+
+    def make_opaque(self, index):
+        if self._transparent[index]:
+            self._transparent[index] = False
+            self._changed()
+
+    def _changed(self):
+        for user in self._users:
+            user._invalidate()
+
+
+class ColorConverter:
+    """Converts the colors of true color images"""
+
+    def __init__(self, *, dither=False):
+        self.dither = dither
+
+    def convert(self, color):
+        return color
+
+
+class OnDiskBitmap:
+    """Bitmap read from a BMP file on demand. Only the header is read
+    here, like in displayio."""
+
+    def __init__(self, file):
+        header = file.read(26)
+        if header[0:2] != b"BM":
+            raise ValueError("Invalid BMP file")
+
+        self._file = file
+        self.width, height = struct.unpack_from("<ii", header, 18)
+        self.height = abs(height)
+        self._users = weakref.WeakSet()
+
+
+class Shape:
+    """Bitmap defined by spans per row"""
+
+    def __init__(self, width, height, *, mirror_x=False, mirror_y=False):
+        self.width = width
+        self.height = height
+        self._users = weakref.WeakSet()
+
+    def set_boundary(self, y, start_x, end_x):
+        for user in self._users:
+            user._invalidate()
+
+
+class TileGrid(_Element):
+    """Grid of tiles from a bitmap"""
+
+    def __init__(
+        self,
+        bitmap,
+        *,
+        pixel_shader,
+        width=1,
+        height=1,
+        tile_width=None,
+        tile_height=None,
+        default_tile=0,
+        x=0,
+        y=0,
+    ):
+        super().__init__(x, y)
+        self.bitmap = bitmap
+        self.pixel_shader = pixel_shader
+
+        self._tile_width = tile_width or bitmap.width
+        self._tile_height = tile_height or bitmap.height
+        self._width = width
+        self._height = height
+        self._tiles = [default_tile] * (width * height)
+
+        self.flip_x = False
+        self.flip_y = False
+        self.transpose_xy = False
+
+        bitmap._users.add(self)
+        if hasattr(pixel_shader, "_users"):
+            pixel_shader._users.add(self)
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def height(self):
+        return self._height
+
+    @property
+    def tile_width(self):
+        return self._tile_width
+
+    @property
+    def tile_height(self):
+        return self._tile_height
+
+    def _index(self, index):
+        if isinstance(index, tuple):
+            return index[1] * self._width + index[0]
+        return index
+
+    def __getitem__(self, index):
+        return self._tiles[self._index(index)]
+
+    def __setitem__(self, index, value):
+        index = self._index(index)
+        if self._tiles[index] != value:
+            self._tiles[index] = value
+            self._invalidate()
+
+    def _area(self, x, y, scale):
+        return [
+            x,
+            y,
+            x + self._width * self._tile_width * scale,
+            y + self._height * self._tile_height * scale,
+        ]
+
+
+class Display:
+    """Display of the simulated board. Refreshes push the dirty areas
+    (merged where they overlap) and count their pixels."""
+
+    def __init__(self, width, height, rotation=0, auto_refresh=True):
+        self._width = width
+        self._height = height
+        self._rotation = rotation
+        self.auto_refresh = auto_refresh
+        self._brightness = 1.0
+        self.auto_brightness = False
+
+        self._root = None
+        self._areas = []
+        self._last_refresh = None
+
+        # Statistics
+        self.refreshes = 0
+        self.pixels_pushed = 0
+        self.brightness_writes = 0
+        # Virtual time of the first refresh (time to first frame)
+        self.first_refresh = None
+
+    @property
+    def width(self):
+        if self._rotation in (90, 270):
+            return self._height
+        return self._width
+
+    @property
+    def height(self):
+        if self._rotation in (90, 270):
+            return self._width
+        return self._height
+
+    @property
+    def rotation(self):
+        return self._rotation
+
+    @rotation.setter
+    def rotation(self, value):
+        if value % 90:
+            raise ValueError("Display rotation must be in 90 degree increments")
+        self._rotation = value % 360
+        self._invalidate_all()
+
+    @property
+    def brightness(self):
+        return self._brightness
+
+    @brightness.setter
+    def brightness(self, value):
+        if not 0 <= value <= 1:
+            raise ValueError("Brightness must be 0-1.0")
+        if value != self._brightness:
+            hardware.current.display_changed(hardware.current.clock.monotonic())
+        self._brightness = value
+        self.brightness_writes += 1
+
+    def show(self, group):
+        """Show a group, None shows the terminal"""
+        if group is not None and group._parent is not None:
+            raise ValueError("Group already used")
+        self._root = group
+        self._invalidate_all()
+
+    def refresh(self, *, target_frames_per_second=60, minimum_frames_per_second=1):
+        """Push the dirty areas to the display. Like displayio, it waits
+        until a frame at the target rate is over and skips the refresh
+        if the last one is longer ago than the minimum rate allows.
+
+        Returns:
+            bool -- False if the refresh was skipped
+        """
+        clock = hardware.current.clock
+
+        if self._last_refresh is not None:
+            elapsed = clock.monotonic() - self._last_refresh
+
+            if minimum_frames_per_second and elapsed > 1 / minimum_frames_per_second:
+                self._last_refresh = clock.monotonic()
+                return False
+
+            if elapsed < 1 / target_frames_per_second:
+                clock.sleep(1 / target_frames_per_second - elapsed)
+
+        self._push()
+        return True
+
+    def wait_for_frame(self):
+        pass
+
+    def refresh_soon(self):
+        pass
+
+    def background(self, now):
+        """Auto refresh, called at the poll points of the board
+
+        Arguments:
+            now {float} -- virtual time
+        """
+        if (
+            self.auto_refresh
+            and self._areas
+            and (self._last_refresh is None or now - self._last_refresh >= 1 / 60)
+        ):
+            self._push()
+
+    def _invalidate_all(self):
+        self._areas = [[0, 0, self.width, self.height]]
+
+    def _invalidate(self, area):
+        """Mark an area as dirty, clipped to the screen
+
+        Arguments:
+            area {list} -- [x0, y0, x1, y1]
+        """
+        area = [
+            max(int(area[0]), 0),
+            max(int(area[1]), 0),
+            min(int(area[2]), self.width),
+            min(int(area[3]), self.height),
+        ]
+
+        if area[0] < area[2] and area[1] < area[3]:
+            _merge(self._areas, area)
+
+    def _push(self):
+        now = hardware.current.clock.monotonic()
+        self._last_refresh = now
+
+        if not self._areas:
+            return
+
+        self.refreshes += 1
+        if self.first_refresh is None:
+            self.first_refresh = now
+        for area in self._areas:
+            self.pixels_pushed += (area[2] - area[0]) * (area[3] - area[1])
+        self._areas = []
+
+        hardware.current.display_changed(now)
+
+
+def release_displays():
+    pass
@@ -0,0 +1,16 @@
+"""Stand-in for fontio"""
+
+from collections import namedtuple
+
+Glyph = namedtuple(
+    "Glyph",
+    ("bitmap", "tile_index", "width", "height", "dx", "dy", "shift_x", "shift_y"),
+)
+
+
+class BuiltinFont:
+    def get_bounding_box(self):
+        return (6, 12)
+
+    def get_glyph(self, codepoint):
+        return None
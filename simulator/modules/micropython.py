@@ -0,0 +1,5 @@
+"""Stand-in for the micropython module"""
+
+
+def const(value):
+    return value
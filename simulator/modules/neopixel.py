@@ -0,0 +1,36 @@
+"""Stand-in for neopixel"""
+
+RGB = (0, 1, 2)
+GRB = (1, 0, 2)
+
+
+class NeoPixel:
+    def __init__(
+        self, pin, n, *, bpp=3, brightness=1.0, auto_write=True, pixel_order=None
+    ):
+        self.pin = pin
+        self.n = n
+        self.brightness = brightness
+        self.auto_write = auto_write
+        self._pixels = [(0, 0, 0)] * n
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, index):
+        return self._pixels[index]
+
+    def __setitem__(self, index, value):
+        if isinstance(value, int):
+            value = ((value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF)
+        self._pixels[index] = tuple(value)
+
+    def fill(self, color):
+        for index in range(self.n):
+            self[index] = color
+
+    def show(self):
+        pass
+
+    def deinit(self):
+        pass
@@ -0,0 +1,15 @@
+"""Stand-in for supervisor. A reload ends the simulation, it would start
+the app from scratch."""
+
+from simulator import hardware
+from simulator.clock import SimulationEnd
+
+
+class runtime:
+    serial_connected = True
+    serial_bytes_available = False
+
+
+def reload():
+    hardware.current.reloads += 1
+    raise SimulationEnd("supervisor.reload()")
@@ -0,0 +1,19 @@
+"""Stand-in for usb_hid: keyboard, mouse and consumer control. The
+reports are recorded by the simulated board."""
+
+from simulator import hardware
+
+
+class Device:
+    def __init__(self, usage_page, usage):
+        self.usage_page = usage_page
+        self.usage = usage
+
+    def send_report(self, report):
+        if len(report) != 8 and self.usage == 0x06:
+            raise ValueError("Buffer incorrect size")
+        board = hardware.current
+        board.hid_report(board.clock.monotonic())
+
+
+devices = (Device(0x01, 0x06), Device(0x01, 0x02), Device(0x0C, 0x01))
@@ -0,0 +1,98 @@
+class Network:
+    """What the simulated ESP32 can reach: host names and ports are
+    routed to local servers. The socket stand-in reports its traffic
+    here."""
+
+    def __init__(self, clock):
+        """Constructor
+
+        Arguments:
+            clock {VirtualClock} -- clock of the simulated board
+        """
+        self.clock = clock
+
+        # (host or IP, port) -> local (host, port)
+        self._routes = {}
+        # host name -> IP address string
+        self._hosts = {}
+        self._servers = []
+
+        # Statistics
+        self.connects = 0
+        self.round_trips = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.esp_calls = 0
+        self.timeouts = 0
+
+    def add_server(self, server, host, port, ip=None):
+        """Route a host to a local server
+
+        Arguments:
+            server {LocalServer} -- server
+            host {str} -- host name or IP address the apps use
+            port {int} -- port the apps use
+
+        Keyword Arguments:
+            ip {str} -- IP address the host name resolves to
+                (default: {None})
+        """
+        if server not in self._servers:
+            self._servers.append(server)
+        self._routes[(host, port)] = server
+        if ip:
+            self._hosts[host] = ip
+            self._routes[(ip, port)] = server
+
+    def resolve(self, host):
+        """DNS lookup
+
+        Arguments:
+            host {str} -- host name or IP address
+
+        Raises:
+            RuntimeError: unknown host, like the ESP32 firmware
+
+        Returns:
+            str -- IP address
+        """
+        if host in self._hosts:
+            return self._hosts[host]
+
+        if all(part.isdigit() for part in host.split(".")):
+            return host
+
+        raise RuntimeError("Failed to request hostname")
+
+    def route(self, host, port):
+        """Server of a host
+
+        Arguments:
+            host {str} -- host name or IP address
+            port {int} -- port
+
+        Raises:
+            RuntimeError: nothing listens there, like the ESP32 firmware
+
+        Returns:
+            LocalServer -- server
+        """
+        server = self._routes.get((host, port))
+        if server is None:
+            raise RuntimeError("Failed to establish connection.")
+        return server
+
+    @property
+    def requests(self):
+        """HTTP requests the servers answered"""
+        return sum(server.requests for server in self._servers)
+
+    def start(self):
+        """Start the servers"""
+        for server in self._servers:
+            server.start()
+
+    def stop(self):
+        """Stop the servers"""
+        for server in self._servers:
+            server.stop()
@@ -0,0 +1,507 @@
+"""Run one of the apps on the simulated PyPortal and report what it
+costs: boot time, loop latency, tap response, display refreshes, memory
+per stage and network round trips.
+
+Runs on the host (CPython), with the pure Python Adafruit libraries from
+simulator/requirements.txt installed:
+
+    python -m simulator.run dashboard --duration 300
+
+The app's serial output goes to stderr, the report to stdout (--json
+for a machine readable one). Times are virtual: sleeping takes no real
+time, computing is measured for real. Heap numbers come from tracemalloc
+and are CPython bytes, so they are only good for comparisons.
+"""
+
+import argparse
+import contextlib
+import gc
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+import tracemalloc
+
+from simulator.clock import SimulationEnd
+from simulator.hardware import LIB_DIR, Hardware
+from simulator.scenarios import APPS, ROOT, SCENARIOS, SECRETS
+
+SUBSTITUTE_FONT = os.path.join(ROOT, "demo_ui", "fonts", "Helvetica-Bold-16.bdf")
+
+
+def percentile(values, fraction):
+    """Value below which a fraction of the values lie
+
+    Arguments:
+        values {list} -- values
+        fraction {float} -- between 0 and 1
+
+    Returns:
+        float -- value, None for no values
+    """
+    if not values:
+        return None
+
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+def _lib_module(name):
+    """Load a module of lib/ for the simulator's own use. It is kept apart
+    from the module of the same name the app imports, which has to see
+    the patched time functions.
+
+    Arguments:
+        name {str} -- module name
+
+    Returns:
+        module -- module
+    """
+    spec = importlib.util.spec_from_file_location(
+        f"simulator._{name}", os.path.join(LIB_DIR, f"{name}.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# Loop latency histogram: about 3 % wide buckets up to 2 minutes, in
+# microseconds. Preallocated, so a sample doesn't allocate memory that
+# would be counted as the app's.
+LoopProfiler = _lib_module("loop_profiler").LoopProfiler
+LATENCY_PRECISION = 5
+LATENCY_BUCKETS = 800
+
+
+class StageMeter:
+    """Compute time and heap use of named stages. A stage is measured
+    from start() to stop(), stages must not overlap."""
+
+    def __init__(self, clock):
+        """Constructor
+
+        Arguments:
+            clock {VirtualClock} -- clock of the simulated board
+        """
+        self._clock = clock
+
+        # name -> [steps, total seconds, max seconds, max peak, retained]
+        self.stages = {}
+
+        # Heap the measurement itself uses (start values, readings), taken
+        # off every stage. tracemalloc must be tracing already.
+        self._bias = (0, 0)
+        self._bias = min(self._empty_stage() for _ in range(5))
+
+    def start(self):
+        """Start measuring a stage
+
+        Returns:
+            tuple -- start values for stop()
+        """
+        tracemalloc.reset_peak()
+        return self._clock.busy(), tracemalloc.get_traced_memory()[0]
+
+    def stop(self, name, start):
+        """Stop measuring a stage
+
+        Arguments:
+            name {str} -- stage name
+            start {tuple} -- value returned by start()
+        """
+        # The heap first, so the reading of the clock isn't counted
+        retained, peak = self._heap(start)
+        busy = self._clock.busy() - start[0]
+
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = [0, 0.0, 0.0, 0, 0]
+
+        stage[0] += 1
+        stage[1] += busy
+        stage[2] = max(stage[2], busy)
+        stage[3] = max(stage[3], peak)
+        stage[4] += retained
+
+    def _empty_stage(self):
+        """Measure a stage without anything in it, like stop() does
+
+        Returns:
+            tuple -- retained and peak bytes
+        """
+        return self._heap(self.start())
+
+    def _heap(self, start):
+        """Heap retained and peak heap since start(), without the bias
+
+        Arguments:
+            start {tuple} -- value returned by start()
+
+        Returns:
+            tuple -- retained and peak bytes
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        return current - start[1] - self._bias[0], peak - start[1] - self._bias[1]
+
+    def report(self):
+        """Stage statistics
+
+        Returns:
+            dict -- stage name -> statistics
+        """
+        return {
+            name: {
+                "steps": stage[0],
+                "mean_ms": stage[1] / stage[0] * 1000,
+                "max_ms": stage[2] * 1000,
+                "peak_heap": stage[3],
+                "retained_heap": stage[4],
+            }
+            for name, stage in self.stages.items()
+        }
+
+
+def instrument_task_loop(meter):
+    """Measure every task step of the app's TaskLoop as a stage named
+    after the task. The app imports the same, patched module.
+
+    Arguments:
+        meter {StageMeter} -- meter
+
+    Returns:
+        bool -- False if the app has no task loop
+    """
+    try:
+        import task_loop
+    except ImportError:
+        return False
+
+    step = task_loop.TaskLoop._step
+
+    def _step(loop, entry):
+        if not entry[1] or entry[2] > loop._clock():
+            return False
+
+        start = meter.start()
+        try:
+            return step(loop, entry)
+        finally:
+            meter.stop(entry[0], start)
+
+    task_loop.TaskLoop._step = _step
+    return True
+
+
+class LoopMeter:
+    """Poll listener measuring the compute time between poll points
+    (loop latency), the boot and, for apps without task loop, every loop
+    pass as a stage."""
+
+    def __init__(self, stages, loop_stage):
+        """Constructor
+
+        Arguments:
+            stages {StageMeter} -- stage meter
+            loop_stage {bool} -- measure loop passes as stage "loop"
+        """
+        self._stages = stages
+        self._loop_stage = loop_stage
+        self._boot_start = stages.start()
+        self._last = None
+        self._stage_start = None
+
+        self.boot = None
+        self.latencies = LoopProfiler(
+            buckets=LATENCY_BUCKETS, precision=LATENCY_PRECISION
+        )
+        self.latencies.stage("loop")
+        self.min_free = None
+
+    def __call__(self, board):
+        self._measure(board)
+
+        # Started last, after the locals of _measure() are gone
+        if self._loop_stage:
+            self._stage_start = self._stages.start()
+
+    def _measure(self, board):
+        busy = board.clock.busy()
+
+        if self.boot is None:
+            current, peak = tracemalloc.get_traced_memory()
+            self.boot = {
+                "busy_ms": (busy - self._boot_start[0]) * 1000,
+                "heap": current,
+                "peak_heap": peak,
+            }
+        else:
+            self.latencies.add(0, round((busy - self._last) * 1000000))
+
+            if self._loop_stage:
+                self._stages.stop("loop", self._stage_start)
+                # Free the start values before the next stage starts
+                self._stage_start = None
+
+        free = board.mem_free()
+        if self.min_free is None or free < self.min_free:
+            self.min_free = free
+
+        self._last = board.clock.busy()
+
+
+def run(
+    app,
+    duration=300,
+    heap_size=4 << 20,
+    cpu_scale=1.0,
+    sd_dir=None,
+    serial=None,
+    scenario=None,
+):
+    """Run an app on the simulated board
+
+    Arguments:
+        app {str} -- app directory name, e.g. dashboard
+
+    Keyword Arguments:
+        duration {float} -- seconds of main loop (default: {300})
+        heap_size {int} -- heap size for gc.mem_free() (default: {4 << 20})
+        cpu_scale {float} -- factor for the compute time (default: {1.0})
+        sd_dir {str} -- host directory used as SD card, None for an empty
+            temporary one (default: {None})
+        serial {file} -- where the app's output goes (default: {stderr})
+        scenario {function} -- called with the board and the duration to
+            add servers, touches and events, None for the app's scenario
+            in simulator/scenarios.py (default: {None})
+
+    Returns:
+        dict -- report
+    """
+    app_dir = os.path.join(ROOT, app)
+    temporary_sd = sd_dir is None
+    if temporary_sd:
+        sd_dir = tempfile.mkdtemp(prefix="pyportal_sd_")
+
+    board = Hardware(
+        app_dir,
+        sd_dir,
+        fallbacks=[os.path.join(ROOT, other) for other in APPS if other != app],
+        substitute_font=SUBSTITUTE_FONT,
+        duration=duration,
+        cpu_scale=cpu_scale,
+        heap_size=heap_size,
+    )
+    (scenario or SCENARIOS[app])(board, duration)
+
+    code_path = os.path.join(app_dir, "code.py")
+    with open(code_path) as code_file:
+        code = compile(code_file.read(), code_path, "exec")
+
+    # Like on the board, there's no path in __file__
+    namespace = {"__name__": "__main__", "__file__": "code.py"}
+
+    end_reason = "duration"
+    error = None
+    real_start = time.perf_counter()
+
+    tracemalloc.start()
+    board.install(SECRETS)
+    try:
+        stages = StageMeter(board.clock)
+        loop_meter = LoopMeter(stages, not instrument_task_loop(stages))
+        board.add_poll_listener(loop_meter)
+
+        with contextlib.redirect_stdout(serial or sys.stderr):
+            exec(code, namespace)
+
+        end_reason = "finished"
+    except SimulationEnd as end:
+        end_reason = str(end)
+    except Exception:
+        end_reason = "error"
+        error = traceback.format_exc()
+    finally:
+        heap_end = tracemalloc.get_traced_memory()[0]
+        # What the app keeps, without the garbage a collection would free
+        gc.collect()
+        heap_live = tracemalloc.get_traced_memory()[0]
+        board.uninstall()
+        tracemalloc.stop()
+
+        if temporary_sd:
+            shutil.rmtree(sd_dir, ignore_errors=True)
+
+    elapsed = board.now() or 0
+    minutes = max(elapsed / 60, 1 / 60)
+    network = board.network
+    latencies = loop_meter.latencies
+    taps = [response * 1000 for response in board.tap_responses if response >= 0]
+    keys = [response * 1000 for response in board.key_responses if response >= 0]
+    first_frame = board.display.first_refresh
+
+    return {
+        "app": app,
+        "end": end_reason,
+        "error": error,
+        "simulated_s": elapsed,
+        "real_s": time.perf_counter() - real_start,
+        "boot": loop_meter.boot,
+        "loop_ms": {
+            "count": latencies.count(0),
+            "p50": latencies.percentile(0, 0.5) / 1000,
+            "p90": latencies.percentile(0, 0.9) / 1000,
+            "p99": latencies.percentile(0, 0.99) / 1000,
+            "max": latencies.maximum(0) / 1000,
+        },
+        "tap_ms": {
+            "count": len(taps),
+            "p50": percentile(taps, 0.5),
+            "max": max(taps) if taps else None,
+        },
+        "key_ms": {
+            "count": len(keys),
+            "p50": percentile(keys, 0.5),
+            "max": max(keys) if keys else None,
+        },
+        "display": {
+            "first_frame_ms": first_frame and first_frame * 1000,
+            "refreshes": board.display.refreshes,
+            "pixels_pushed": board.display.pixels_pushed,
+            "pixels_per_s": board.display.pixels_pushed / max(elapsed, 1),
+            "brightness_writes": board.display.brightness_writes,
+        },
+        "heap": {
+            "end": heap_end,
+            "live": heap_live,
+            "min_free": loop_meter.min_free,
+        },
+        "stages": stages.report(),
+        "network": {
+            "connects": network.connects,
+            "requests": network.requests,
+            "round_trips": network.round_trips,
+            "round_trips_per_min": network.round_trips / minutes,
+            "esp_calls": network.esp_calls,
+            "esp_calls_per_min": network.esp_calls / minutes,
+            "bytes_sent": network.bytes_sent,
+            "bytes_received": network.bytes_received,
+            "timeouts": network.timeouts,
+        },
+        "hid_reports": board.hid_reports,
+        "sounds": board.sounds_played,
+        "reloads": board.reloads,
+        "allocation_failures": board.allocation_failures,
+        "substituted_fonts": sorted(board.drive.substituted),
+    }
+
+
+def _ms(value):
+    return "-" if value is None else f"{value:.2f} ms"
+
+
+def print_report(report, out=sys.stdout):
+    """Print a report in readable form
+
+    Arguments:
+        report {dict} -- report returned by run()
+
+    Keyword Arguments:
+        out {file} -- output (default: {sys.stdout})
+    """
+    boot = report["boot"] or {}
+    loop = report["loop_ms"]
+    taps = report["tap_ms"]
+    keys = report["key_ms"]
+    display = report["display"]
+    network = report["network"]
+
+    lines = [
+        f"{report['app']}: {report['simulated_s']:.0f} s simulated in "
+        f"{report['real_s']:.1f} s, end: {report['end']}",
+        f"  boot           {_ms(boot.get('busy_ms'))}, heap {boot.get('heap')} "
+        f"bytes (peak {boot.get('peak_heap')})",
+        f"  loop latency   p50 {_ms(loop['p50'])}, p90 {_ms(loop['p90'])}, "
+        f"p99 {_ms(loop['p99'])}, max {_ms(loop['max'])} ({loop['count']} passes)",
+        f"  tap response   p50 {_ms(taps['p50'])}, max {_ms(taps['max'])} "
+        f"({taps['count']} taps)",
+        f"  tap to key     p50 {_ms(keys['p50'])}, max {_ms(keys['max'])} "
+        f"({keys['count']} taps)",
+        f"  display        first frame {_ms(display['first_frame_ms'])}, "
+        f"{display['refreshes']} refreshes, "
+        f"{display['pixels_pushed']} pixels ({display['pixels_per_s']:.0f}/s), "
+        f"{display['brightness_writes']} brightness writes",
+        f"  heap           {report['heap']['end']} bytes at the end "
+        f"({report['heap']['live']} live), min free {report['heap']['min_free']}",
+        f"  network        {network['connects']} connects, {network['requests']} "
+        f"requests, {network['round_trips']} round trips "
+        f"({network['round_trips_per_min']:.1f}/min), {network['esp_calls']} ESP32 "
+        f"calls, {network['bytes_sent']}/{network['bytes_received']} bytes "
+        f"sent/received, {network['timeouts']} timeouts",
+        f"  other          {report['hid_reports']} HID reports, "
+        f"{report['sounds']} sounds, {report['reloads']} reloads, "
+        f"{report['allocation_failures']} allocation failures",
+        "  stages         steps     mean ms    max ms   peak heap    retained",
+    ]
+
+    for name, stage in sorted(report["stages"].items()):
+        lines.append(
+            f"    {name:<14}{stage['steps']:>6}{stage['mean_ms']:>12.3f}"
+            f"{stage['max_ms']:>10.2f}{stage['peak_heap']:>12}"
+            f"{stage['retained_heap']:>12}"
+        )
+
+    if report["substituted_fonts"]:
+        lines.append(
+            "  fonts not in the repository, substituted: "
+            + ", ".join(report["substituted_fonts"])
+        )
+
+    if report["error"]:
+        lines.append(report["error"])
+
+    out.write("\n".join(lines) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("app", choices=APPS, help="app to run")
+    parser.add_argument(
+        "--duration", type=float, default=300, help="seconds of main loop"
+    )
+    parser.add_argument(
+        "--heap", type=int, default=4 << 20, help="heap size for gc.mem_free()"
+    )
+    parser.add_argument(
+        "--cpu-scale", type=float, default=1.0, help="factor for the compute time"
+    )
+    parser.add_argument("--sd", help="directory used as SD card (kept)")
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    parser.add_argument(
+        "--quiet", action="store_true", help="drop the app's serial output"
+    )
+    args = parser.parse_args()
+
+    report = run(
+        args.app,
+        duration=args.duration,
+        heap_size=args.heap,
+        cpu_scale=args.cpu_scale,
+        sd_dir=args.sd,
+        serial=open(os.devnull, "w") if args.quiet else None,
+    )
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=1)
+        sys.stdout.write("\n")
+    else:
+        print_report(report)
+
+    sys.exit(1 if report["error"] else 0)
+
+
+if __name__ == "__main__":
+    main()
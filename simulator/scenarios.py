@@ -0,0 +1,111 @@
+"""What happens to each app during a simulated run: touches, router and
+light changes. Times are seconds after the app reached its main loop."""
+
+import os
+
+from simulator.servers import FritzboxServer, QuoteServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APPS = ("dashboard", "demo_ui", "quote")
+
+SECRETS = {
+    "ssid": "simulator",
+    "password": "simulator",
+    "access_point_ip": "192.168.178.1",
+    "access_point_port": "49000",
+    "timezone": "Europe/Berlin",
+}
+
+# Host and address of the quotes API
+QUOTE_HOST = "www.adafruit.com"
+QUOTE_IP = "104.20.38.240"
+
+
+def _add_servers(board):
+    """Route the router and the quotes API to local servers
+
+    Arguments:
+        board {Hardware} -- simulated board
+
+    Returns:
+        tuple -- FritzboxServer and QuoteServer
+    """
+    fritzbox = FritzboxServer()
+    board.network.add_server(
+        fritzbox, SECRETS["access_point_ip"], int(SECRETS["access_point_port"])
+    )
+
+    quotes = QuoteServer()
+    board.network.add_server(quotes, QUOTE_HOST, 443, ip=QUOTE_IP)
+    board.network.add_server(quotes, QUOTE_HOST, 80, ip=QUOTE_IP)
+
+    return fritzbox, quotes
+
+
+def _day_and_night(elapsed):
+    """Light level that changes between bright and dark every two
+    minutes, with some ripple
+
+    Arguments:
+        elapsed {float} -- seconds since the loop started
+
+    Returns:
+        int -- light sensor value
+    """
+    base = 600 if int(elapsed // 120) % 2 else 15000
+    return base + (int(elapsed * 7) % 11) * base // 100
+
+
+def dashboard(board, duration):
+    """Press the shortcut buttons and the Dim button in turn, the DSL
+    link goes down for half a minute after one minute. A router query and
+    a quote fetch run out of memory once each, later on."""
+    fritzbox, _ = _add_servers(board)
+    board.light = _day_and_night
+
+    targets = ((80, 284), (240, 284), (400, 284), (443, 21))
+    for index, at in enumerate(range(5, int(duration), 5)):
+        x, y = targets[index % len(targets)]
+        board.touch.tap(at, x, y)
+
+    def link_down():
+        fritzbox.linked = False
+        fritzbox.connected = False
+
+    def link_up():
+        fritzbox.linked = True
+        fritzbox.connected = True
+
+    board.at(60, link_down)
+    board.at(90, link_up)
+
+    board.at(100, lambda: board.fail_allocations(SECRETS["access_point_ip"]))
+    board.at(130, lambda: board.fail_allocations(QUOTE_IP))
+
+
+def demo_ui(board, duration):
+    """Go through the views and press every button, every two seconds"""
+    _add_servers(board)
+    board.light = _day_and_night
+
+    targets = (
+        (160, 20),  # View2
+        (190, 80),  # Icon
+        (266, 20),  # View3
+        (190, 190),  # Sound
+        (53, 20),  # View1
+        (80, 405),  # Switch
+        (240, 405),  # Button
+    )
+    for index, at in enumerate(range(2, int(duration), 2)):
+        x, y = targets[index % len(targets)]
+        board.touch.tap(at, x, y)
+
+
+def quote(board, duration):
+    """Nothing to touch, the quotes come from the quotes API"""
+    _add_servers(board)
+
+
+SCENARIOS = {"dashboard": dashboard, "demo_ui": demo_ui, "quote": quote}
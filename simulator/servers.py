@@ -0,0 +1,301 @@
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Request handler that hands the request to its server"""
+
+    # Header and body go out in separate writes. With Nagle's algorithm
+    # the body would wait for the client's delayed ACK (40 ms on Linux)
+    # on every response but the first of a connection, a cost the router
+    # doesn't have.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.server.owner.handle_get(self)
+
+    def do_POST(self):
+        self.server.owner.handle_post(self)
+
+    def handle_one_request(self):
+        super().handle_one_request()
+        if self.raw_requestline:
+            self.server.owner._answered(self.client_address[1])
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _KeepAliveHandler(_Handler):
+    protocol_version = "HTTP/1.1"
+
+
+class _Server(ThreadingHTTPServer):
+    """Threading server that doesn't report clients hanging up"""
+
+    def handle_error(self, request, client_address):
+        # A client that closes its socket mid-response (e.g. after a
+        # MemoryError) is normal, the traceback would only add noise and
+        # heap use to the measurement
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class LocalServer:
+    """HTTP server on a free localhost port, running in a thread. How long
+    connecting and answering take on the board is virtual time, the
+    socket stand-in lets it pass while the board waits for it."""
+
+    handler = _Handler
+
+    def __init__(self, connect_time=0, latency=0):
+        """Constructor
+
+        Keyword Arguments:
+            connect_time {float} -- Seconds a connect takes, e.g. the TLS
+                handshake of the ESP32 (default: {0})
+            latency {float} -- Seconds from a request to the first byte of
+                the response (default: {0})
+        """
+        self.connect_time = connect_time
+        self.latency = latency
+
+        self._server = _Server(("127.0.0.1", 0), self.handler)
+        self._server.daemon_threads = True
+        self._server.owner = self
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # Client port -> responses written on that connection
+        self._responses = {}
+
+        # Statistics
+        self.requests = 0
+
+    @property
+    def address(self):
+        """Host and port the server listens on"""
+        return self._server.server_address
+
+    def start(self):
+        """Start serving in the background"""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}
+        )
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop serving"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def handle_get(self, request):
+        request.send_error(405)
+
+    def handle_post(self, request):
+        request.send_error(405)
+
+    def responses(self, port):
+        """Responses the server has written to a connection, the
+        response data is in the socket by then
+
+        Arguments:
+            port {int} -- local port of the client
+
+        Returns:
+            int -- responses
+        """
+        with self._lock:
+            return self._responses.get(port, 0)
+
+    def _answered(self, port):
+        with self._lock:
+            self._responses[port] = self._responses.get(port, 0) + 1
+
+    def _count(self):
+        with self._lock:
+            self.requests += 1
+
+    @staticmethod
+    def _reply(request, status, body, content_type, headers=()):
+        """Send a complete response
+
+        Arguments:
+            request {BaseHTTPRequestHandler} -- request
+            status {int} -- HTTP status code
+            body {bytes} -- response body
+            content_type {str} -- value of the content-type header
+
+        Keyword Arguments:
+            headers {tuple} -- additional (name, value) headers
+                (default: {()})
+        """
+        request.send_response(status)
+        request.send_header("Content-Type", content_type)
+        request.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(body)
+
+
+class FritzboxServer(LocalServer):
+    """UPnP control endpoint of a FRITZ!Box (the IGD services the
+    dashboard queries). The link and connection state can be changed
+    while the simulation runs. Keep-alive and pipelined requests are
+    supported like on the real router."""
+
+    handler = _KeepAliveHandler
+
+    ENVELOPE = (
+        '<?xml version="1.0"?>\n<s:Envelope '
+        'xmlns:s="http://schemas.xmlsoap.org/soap/envelope/" '
+        's:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/">\n'
+        "<s:Body>\n<u:{action}Response xmlns:u="
+        '"urn:schemas-upnp-org:service:{service}">\n{fields}'
+        "</u:{action}Response>\n</s:Body>\n</s:Envelope>\n"
+    )
+
+    ERROR = (
+        '<?xml version="1.0"?>\n<s:Envelope '
+        'xmlns:s="http://schemas.xmlsoap.org/soap/envelope/" '
+        's:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/">\n'
+        "<s:Body>\n<s:Fault>\n<faultcode>s:Client</faultcode>\n"
+        "<faultstring>UPnPError</faultstring>\n<detail>\n"
+        '<UPnPError xmlns="urn:schemas-upnp-org:control-1-0">\n'
+        "<errorCode>401</errorCode>\n"
+        "<errorDescription>Invalid Action</errorDescription>\n"
+        "</UPnPError>\n</detail>\n</s:Fault>\n</s:Body>\n</s:Envelope>\n"
+    )
+
+    def __init__(self, linked=True, connected=True, **kwargs):
+        """Constructor
+
+        Keyword Arguments:
+            linked {bool} -- DSL link is up (default: {True})
+            connected {bool} -- Internet connection is up (default: {True})
+
+        Other keyword arguments go to LocalServer.
+        """
+        super().__init__(**kwargs)
+        self.linked = linked
+        self.connected = connected
+
+    def fields(self, action):
+        """Response fields of an action in the current state
+
+        Arguments:
+            action {str} -- action name, e.g. GetStatusInfo
+
+        Returns:
+            tuple -- (element, value) tuples, None for unknown actions
+        """
+        if action == "GetStatusInfo":
+            return (
+                ("NewConnectionStatus", "Connected" if self.connected else "Idle"),
+                ("NewLastConnectionError", "ERROR_NONE"),
+                ("NewUptime", "86400" if self.connected else "0"),
+            )
+        if action == "GetCommonLinkProperties":
+            return (
+                ("NewWANAccessType", "DSL"),
+                ("NewLayer1UpstreamMaxBitRate", "40000000" if self.linked else "0"),
+                ("NewLayer1DownstreamMaxBitRate", "100000000" if self.linked else "0"),
+                ("NewPhysicalLinkStatus", "Up" if self.linked else "Down"),
+            )
+        if action == "GetExternalIPAddress":
+            return (("NewExternalIPAddress", "203.0.113.7"),)
+        if action == "GetTotalBytesSent":
+            return (("NewTotalBytesSent", "123456789"),)
+        if action == "GetTotalBytesReceived":
+            return (("NewTotalBytesReceived", "987654321"),)
+
+        return None
+
+    def handle_post(self, request):
+        self._count()
+
+        length = int(request.headers.get("content-length", 0))
+        request.rfile.read(length)
+
+        # urn:schemas-upnp-org:service:WANIPConnection:1#GetStatusInfo
+        soapaction = request.headers.get("soapaction", "").strip('"')
+        service, _, action = soapaction.rpartition("#")
+        service = service.rpartition(":service:")[2]
+
+        fields = self.fields(action)
+        if fields is None:
+            body = FritzboxServer.ERROR.encode("utf-8")
+            status = 500
+        else:
+            body = FritzboxServer.ENVELOPE.format(
+                action=action,
+                service=service,
+                fields="".join(f"<{tag}>{value}</{tag}>\n" for tag, value in fields),
+            ).encode("utf-8")
+            status = 200
+
+        LocalServer._reply(
+            request,
+            status,
+            body,
+            'text/xml; charset="utf-8"',
+            (("Ext", ""),),
+        )
+
+
+class QuoteServer(LocalServer):
+    """Quotes endpoint as served by adafruit.com/api/quotes.php: a JSON
+    list with one quote. The quotes are served round robin."""
+
+    QUOTES = (
+        ("Make something every day.", "Limor Fried"),
+        (
+            "The best way to predict the future is to invent it.",
+            "Alan Kay",
+        ),
+        (
+            "Any sufficiently advanced technology is indistinguishable from "
+            "magic, which is why we keep explaining how it works in small "
+            "steps until nobody is surprised by it anymore, not even the "
+            "people who built it in the first place.",
+            "Arthur C. Clarke (paraphrased)",
+        ),
+        ("Simplicity is prerequisite for reliability.", "Edsger W. Dijkstra"),
+        ("If it's not tested, it's broken.", "Bruce Eckel"),
+    )
+
+    def __init__(self, quotes=QUOTES, **kwargs):
+        """Constructor
+
+        Keyword Arguments:
+            quotes {tuple} -- (text, author) tuples (default: {QUOTES})
+
+        Other keyword arguments go to LocalServer.
+        """
+        super().__init__(**kwargs)
+        self.quotes = quotes
+        self._next = 0
+
+    def handle_get(self, request):
+        self._count()
+
+        if not request.path.startswith("/api/quotes.php"):
+            request.send_error(404)
+            return
+
+        with self._lock:
+            text, author = self.quotes[self._next % len(self.quotes)]
+            self._next += 1
+
+        body = json.dumps([{"text": text, "author": author}]).encode("utf-8")
+        LocalServer._reply(
+            request,
+            200,
+            body,
+            "application/json",
+            (("Connection", "close"),),
+        )
@@ -0,0 +1,154 @@
+"""Measure what one DSL status poll of the dashboard costs: heap
+allocated per poll, compute time, ESP32 calls and round trips, against
+the stand-in router.
+
+Runs on the host (CPython), see simulator/run.py:
+
+    python -m simulator.upnp_benchmark --polls 200
+
+The heap is measured with tracemalloc, so it is in CPython bytes: peak
+is the most a poll had allocated at once, retained what it left behind.
+Both are only good for comparisons.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+import types
+
+from simulator.hardware import Hardware
+from simulator.run import StageMeter
+from simulator.scenarios import ROOT, SECRETS
+from simulator.servers import FritzboxServer
+
+
+def measure(polls=200, warmup=5, pipelining=True, keep_alive=True, latency=0):
+    """Poll the DSL status like the dashboard does
+
+    Keyword Arguments:
+        polls {int} -- measured polls (default: {200})
+        warmup {int} -- polls before measuring, they open the socket and
+            fill caches (default: {5})
+        pipelining {bool} -- send both requests before reading the
+            responses (default: {True})
+        keep_alive {bool} -- reuse the socket, False opens one per request
+            like the dashboard did before UpnpSession, pipelining is off
+            then (default: {True})
+        latency {float} -- seconds the router takes to answer
+            (default: {0})
+
+    Raises:
+        RuntimeError: the poll doesn't return the router's status
+
+    Returns:
+        dict -- results per poll
+    """
+    sd_dir = tempfile.mkdtemp(prefix="pyportal_sd_")
+    board = Hardware(os.path.join(ROOT, "dashboard"), sd_dir)
+    board.network.add_server(
+        FritzboxServer(latency=latency),
+        SECRETS["access_point_ip"],
+        int(SECRETS["access_point_port"]),
+    )
+
+    tracemalloc.start()
+    board.install(SECRETS)
+    try:
+        import fritz_box
+        from adafruit_esp32spi import adafruit_esp32spi
+
+        esp = adafruit_esp32spi.ESP_SPIcontrol(None, None, None, None)
+        status = fritz_box.FritzboxStatus(
+            types.SimpleNamespace(_esp=esp), pipelining=pipelining and keep_alive
+        )
+        if not keep_alive:
+            # Closing the socket where the response would be released
+            status._session.release = status._session.close
+        actions = fritz_box.FritzboxStatus.dsl_actions
+
+        for _ in range(warmup):
+            result = status.query(actions)
+            if not (result.linked and result.connected):
+                raise RuntimeError("No DSL status from the router")
+        result = None
+
+        network = board.network
+        before = (network.esp_calls, network.round_trips, network.connects)
+        meter = StageMeter(board.clock)
+
+        for _ in range(polls):
+            start = meter.start()
+            status.query(actions)
+            meter.stop("poll", start)
+
+        stage = meter.report()["poll"]
+    finally:
+        board.uninstall()
+        tracemalloc.stop()
+        shutil.rmtree(sd_dir, ignore_errors=True)
+
+    return {
+        "polls": polls,
+        "pipelining": pipelining and keep_alive,
+        "keep_alive": keep_alive,
+        "latency": latency,
+        "mean_ms": stage["mean_ms"],
+        "max_ms": stage["max_ms"],
+        "peak_heap": stage["peak_heap"],
+        "retained_heap": stage["retained_heap"] / polls,
+        "esp_calls": (network.esp_calls - before[0]) / polls,
+        "round_trips": (network.round_trips - before[1]) / polls,
+        "connects": network.connects - before[2],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--polls", type=int, default=200, help="measured polls")
+    parser.add_argument(
+        "--no-pipelining", action="store_true", help="one request at a time"
+    )
+    parser.add_argument(
+        "--socket-per-request",
+        action="store_true",
+        help="open a socket for every request instead of keeping it",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0, help="seconds the router takes"
+    )
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    args = parser.parse_args()
+
+    results = measure(
+        args.polls,
+        pipelining=not args.no_pipelining,
+        keep_alive=not args.socket_per_request,
+        latency=args.latency,
+    )
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=1)
+        sys.stdout.write("\n")
+        return
+
+    print(
+        f"{results['polls']} DSL polls, pipelining "
+        f"{'on' if results['pipelining'] else 'off'}, keep-alive "
+        f"{'on' if results['keep_alive'] else 'off'}, router latency "
+        f"{results['latency'] * 1000:.0f} ms, per poll:\n"
+        f"  compute        {results['mean_ms']:.3f} ms (max {results['max_ms']:.2f})\n"
+        f"  peak heap      {results['peak_heap']} bytes\n"
+        f"  retained heap  {results['retained_heap']:.1f} bytes\n"
+        f"  ESP32 calls    {results['esp_calls']:.1f}\n"
+        f"  round trips    {results['round_trips']:.2f}\n"
+        f"  connects       {results['connects']} in total, "
+        f"{results['connects'] / results['polls']:.2f} per poll"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""The apps on the simulated board as benchmarks. The timed function is
+the whole simulated run, the measurements of the app (boot, loop latency,
+heap, round trips) go to extra_info of the benchmark:
+
+    python -m pytest tests/benchmarks --benchmark-enable --benchmark-json out.json
+"""
+
+import io
+
+import pytest
+
+from simulator.run import run
+from simulator.scenarios import APPS
+
+DURATION = 60
+
+
+def measure(benchmark, app, duration=DURATION, **kwargs):
+    """Run an app once as benchmark and record its report
+
+    Arguments:
+        benchmark {BenchmarkFixture} -- pytest-benchmark fixture
+        app {str} -- app name
+
+    Keyword Arguments:
+        duration {float} -- seconds of main loop (default: {DURATION})
+
+    Returns:
+        dict -- report of simulator.run.run()
+    """
+    report = benchmark.pedantic(
+        run,
+        args=(app,),
+        kwargs=dict(duration=duration, serial=io.StringIO(), **kwargs),
+        rounds=1,
+        iterations=1,
+    )
+    assert report["error"] is None
+
+    benchmark.extra_info.update(
+        boot_ms=report["boot"]["busy_ms"],
+        boot_heap=report["boot"]["heap"],
+        loop_p50_ms=report["loop_ms"]["p50"],
+        loop_p99_ms=report["loop_ms"]["p99"],
+        loop_max_ms=report["loop_ms"]["max"],
+        tap_p50_ms=report["tap_ms"]["p50"],
+        tap_max_ms=report["tap_ms"]["max"],
+        key_p50_ms=report["key_ms"]["p50"],
+        key_max_ms=report["key_ms"]["max"],
+        first_frame_ms=report["display"]["first_frame_ms"],
+        pixels_per_s=report["display"]["pixels_per_s"],
+        heap_end=report["heap"]["end"],
+        heap_live=report["heap"]["live"],
+        round_trips_per_min=report["network"]["round_trips_per_min"],
+        stage_peak_heap={
+            name: stage["peak_heap"] for name, stage in report["stages"].items()
+        },
+    )
+    return report
+
+
+@pytest.mark.parametrize("app", APPS)
+def test_app(benchmark, app):
+    measure(benchmark, app)
@@ -0,0 +1,125 @@
+"""demo_ui with simulated touches and sensors: the time from a tap to the
+refresh that shows the new view, how many main loop passes a press takes
+away and the loop rate and refreshes while the sensor view is shown. The
+loop reads the light sensor once per pass, so the reads are counted to
+find the passes.
+
+    python -m pytest tests/benchmarks/test_demo_ui.py --benchmark-enable
+"""
+
+import io
+
+from simulator.run import run
+from simulator.scenarios import _add_servers
+
+# Tabs of the views, in the order they are tapped
+TABS = ((160, 20), (266, 20), (53, 20))
+
+# Seconds the finger stays on a tab
+PRESS = 0.3
+
+# The sensor view and when it is shown
+SENSOR_VIEW = TABS[1]
+SENSOR_VIEW_AT = 1
+
+
+def switch_views(board, duration, reads):
+    """Tap the tabs in turn every two seconds and record the time of
+    every light sensor read in reads"""
+    _add_servers(board)
+
+    def light(elapsed):
+        reads.append(elapsed)
+        return 12000
+
+    board.light = light
+
+    for index, at in enumerate(range(2, int(duration), 2)):
+        board.touch.tap(at, *TABS[index % len(TABS)], duration=PRESS)
+
+
+def loop_passes(touches, reads):
+    """Loop passes while a finger is down
+
+    Arguments:
+        touches {list} -- (start, end, x, y) of the touches
+        reads {list} -- times of the light sensor reads
+
+    Returns:
+        tuple -- passes expected during a press at the rate of the loop
+            while nobody touches the screen, passes during every press
+    """
+    touched = sum(end - start for start, end, _, _ in touches)
+    inside = [
+        sum(start <= read < end for read in reads) for start, end, _, _ in touches
+    ]
+    rate = (len(reads) - sum(inside)) / (reads[-1] - reads[0] - touched)
+
+    return round(rate * PRESS), inside
+
+
+def test_view_switch(benchmark):
+    reads = []
+    touches = []
+
+    def scenario(board, duration):
+        switch_views(board, duration, reads)
+        touches.extend(board.touch.touches)
+
+    report = benchmark.pedantic(
+        run,
+        args=("demo_ui",),
+        kwargs=dict(duration=30, serial=io.StringIO(), scenario=scenario),
+        rounds=1,
+        iterations=1,
+    )
+    assert report["error"] is None
+
+    expected, passes = loop_passes(touches, reads)
+    taps = report["tap_ms"]
+    benchmark.extra_info.update(
+        switch_p50_ms=taps["p50"],
+        switch_max_ms=taps["max"],
+        passes_per_press=expected,
+        starved_per_press=expected - sum(passes) / len(passes),
+    )
+
+    assert taps["count"] == len(touches) == 14
+    # The loop keeps running while the finger is down
+    assert min(passes) > expected / 2
+    assert taps["max"] < 150
+
+
+def test_sensor_view(benchmark):
+    reads = []
+    refreshes = []
+
+    def scenario(board, duration):
+        _add_servers(board)
+        board.touch.tap(SENSOR_VIEW_AT, *SENSOR_VIEW)
+
+        def light(elapsed):
+            reads.append(elapsed)
+            # Slowly getting brighter, with noise of the sensor
+            return 12000 + int(elapsed * 20) + (int(elapsed * 1000) % 13 - 6) * 17
+
+        board.light = light
+        board.at(SENSOR_VIEW_AT + 1, lambda: refreshes.append(board.display.refreshes))
+
+    duration = 30
+    report = benchmark.pedantic(
+        run,
+        args=("demo_ui",),
+        kwargs=dict(duration=duration, serial=io.StringIO(), scenario=scenario),
+        rounds=1,
+        iterations=1,
+    )
+    assert report["error"] is None
+
+    seconds = duration - SENSOR_VIEW_AT - 1
+    loop_rate = sum(read >= SENSOR_VIEW_AT + 1 for read in reads) / seconds
+    refresh_rate = (report["display"]["refreshes"] - refreshes[0]) / seconds
+    benchmark.extra_info.update(loop_rate=loop_rate, refresh_rate=refresh_rate)
+
+    # Three readouts, each written at most 4 times per second
+    assert 0 < refresh_rate <= 12
@@ -0,0 +1,30 @@
+"""Boot time of the button font: the shipped Helvetica-Bold-16.bdf
+parsed by adafruit_bitmap_font against its precompiled glyph atlas, both
+with the glyphs the button controller loads. The heap the font keeps goes
+to extra_info."""
+
+import tracemalloc
+
+import pytest
+
+from test_glyph_atlas import BDF, BUTTON_GLYPHS
+
+
+@pytest.mark.parametrize("loader", ("bdf", "atlas"))
+def test_load_button_font(benchmark, board, loader):
+    import glyph_atlas
+    from adafruit_bitmap_font import bitmap_font
+
+    load_font = bitmap_font.load_font if loader == "bdf" else glyph_atlas.load_font
+
+    def load():
+        font = load_font(BDF)
+        font.load_glyphs(BUTTON_GLYPHS)
+        return font
+
+    start = tracemalloc.get_traced_memory()[0]
+    font = load()
+    benchmark.extra_info["heap"] = tracemalloc.get_traced_memory()[0] - start
+    del font
+
+    benchmark(load)
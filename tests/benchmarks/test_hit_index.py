@@ -0,0 +1,55 @@
+"""Touch lookups with 3, 30 and 300 buttons on the screen: a linear scan
+over Button.contains(), like the button loops before the index, against
+HitTestIndex.lookup(). Every round looks up the same 200 touch points,
+the ones between the buttons go to extra_info as misses."""
+
+import random
+import tracemalloc
+
+import pytest
+
+from test_hit_index import SCREEN, button_grid, index_of, linear_scan
+
+TOUCHES = 200
+
+SIZES = pytest.mark.parametrize(
+    "count, columns", ((3, 3), (30, 6), (300, 20)), ids=("3", "30", "300")
+)
+
+
+@pytest.fixture
+def touches(board):
+    """Touch points, the same for every test"""
+    # Nothing here needs gc.mem_free(), tracing would dominate the times
+    tracemalloc.stop()
+
+    generator = random.Random(6)
+    return [
+        (generator.randrange(SCREEN[0]), generator.randrange(SCREEN[1]))
+        for _ in range(TOUCHES)
+    ]
+
+
+@SIZES
+def test_linear_scan(benchmark, touches, count, columns):
+    buttons = button_grid(count, columns)
+
+    def lookup_all():
+        return [linear_scan(buttons, x, y) for x, y in touches]
+
+    hits = benchmark(lookup_all)
+    benchmark.extra_info["misses"] = hits.count(None)
+
+
+@SIZES
+def test_hit_index(benchmark, touches, count, columns):
+    buttons = button_grid(count, columns)
+    index = index_of(buttons)
+
+    def lookup_all():
+        return [index.lookup(x, y) for x, y in touches]
+
+    hits = benchmark(lookup_all)
+    benchmark.extra_info["misses"] = hits.count(None)
+
+    assert hits == [linear_scan(buttons, x, y) for x, y in touches]
@@ -0,0 +1,59 @@
+"""Pixels pushed to the display during one hour of dashboard use,
+replayed on the simulated board. It runs for about a minute, so it is
+skipped unless the benchmarks are enabled:
+
+    python -m pytest tests/benchmarks/test_render.py --benchmark-enable
+"""
+
+import io
+
+import pytest
+
+from simulator.run import run
+from simulator.servers import FritzboxServer, QuoteServer
+from test_dashboard import DIM, add_servers
+
+HOUR = 3600
+
+# Shortcut buttons of the dashboard
+BUTTONS = ((80, 284), (240, 284), (400, 284))
+
+
+def session(board, duration):
+    """An hour at the desk: a few shortcuts every five minutes, the
+    screen dimmed for a break, the DSL link down for a minute and the
+    room getting dark towards the end"""
+    fritzbox = FritzboxServer()
+    add_servers(board, QuoteServer(), fritzbox)
+    board.light = lambda elapsed: 15000 if elapsed < 2700 else 900
+
+    for start in range(30, int(duration), 300):
+        for index, (x, y) in enumerate(BUTTONS):
+            board.touch.tap(start + 2 * index, x, y)
+
+    board.touch.tap(1200, *DIM)
+    board.touch.tap(1500, *DIM)
+
+    def link(up):
+        fritzbox.linked = up
+        fritzbox.connected = up
+
+    board.at(1800, lambda: link(False))
+    board.at(1860, lambda: link(True))
+
+
+def test_hour_of_use(benchmark):
+    if benchmark.disabled:
+        pytest.skip("one hour replay, run with --benchmark-enable")
+
+    report = benchmark.pedantic(
+        run,
+        args=("dashboard",),
+        kwargs=dict(duration=HOUR, serial=io.StringIO(), scenario=session),
+        rounds=1,
+        iterations=1,
+    )
+    assert report["error"] is None
+    assert report["simulated_s"] >= HOUR
+
+    benchmark.extra_info.update(report["display"], loop_p99_ms=report["loop_ms"]["p99"])
@@ -0,0 +1,68 @@
+"""Status icons with one BMP file per icon against the sprite sheet, on
+the displayio stand-in of the simulator. Setup is what the dashboard does
+at boot, a change flips the DSL icon. File opens and the heap the icons
+keep go to extra_info."""
+
+import tracemalloc
+
+import pytest
+
+from test_status_icons import BUDGET, SHEET
+
+MODES = pytest.mark.parametrize("sprite_sheet", (None, SHEET), ids=("files", "sheet"))
+
+
+def retained_heap(function):
+    """Heap still allocated after a call, with its result kept
+
+    Arguments:
+        function {function} -- function without arguments
+
+    Returns:
+        tuple -- result of the call, bytes
+    """
+    start = tracemalloc.get_traced_memory()[0]
+    result = function()
+    return result, tracemalloc.get_traced_memory()[0] - start
+
+
+@MODES
+def test_setup(benchmark, board, opened, sprite_sheet):
+    from image_cache import ImageCache
+    from status_icon_controller import StatusIconController
+
+    def setup():
+        return StatusIconController(
+            image_cache=ImageCache(byte_budget=BUDGET), sprite_sheet=sprite_sheet
+        )
+
+    controller, heap = retained_heap(setup)
+    benchmark.extra_info.update(opens=len(opened), heap=heap)
+
+    # Every icon shows one sprite, the DSL icon starts inactive
+    assert [len(group) for group in controller.get_icons()] == [1, 1, 1]
+    if sprite_sheet:
+        tile = controller.icons["dsl_status"]["object"][0][0]
+        assert tile == controller._manifest["tiles"]["unlinked.bmp"]
+
+    benchmark(setup)
+
+
+@MODES
+def test_change(benchmark, board, opened, sprite_sheet):
+    from image_cache import ImageCache
+    from status_icon_controller import StatusIconController
+
+    controller = StatusIconController(
+        image_cache=ImageCache(byte_budget=BUDGET), sprite_sheet=sprite_sheet
+    )
+    state = [False]
+
+    def change():
+        state[0] = not state[0]
+        controller.set_dsl_status(state[0])
+
+    del opened[:]
+    benchmark(change)
+
+    assert opened == []
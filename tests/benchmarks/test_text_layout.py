@@ -0,0 +1,94 @@
+"""Quote updates of the dashboard over a corpus of 3000 quotes: the
+former wrap_nicely() path, which measured the text with a Label full of
+"M" lines, against layout_text(). Measuring wraps and sizes every quote,
+an update also shows it in the quote label. Quotes are shown only if
+they fit into four lines, the number that fit goes to extra_info."""
+
+import tracemalloc
+
+import pytest
+
+from test_glyph_atlas import BDF
+from test_text_layout import quote_corpus
+
+QUOTES = 3000
+UPDATES = 300
+WIDTH = 460  # quote label width of the dashboard
+MAX_LINES = 4
+
+PATHS = pytest.mark.parametrize("path", ("wrap_nicely", "layout_text"))
+
+
+@pytest.fixture
+def measure_of(board):
+    """Create the measuring function of a path for the button font
+
+    Returns:
+        function -- called with the path name, returns a function that
+            takes a quote and returns its lines or None if it doesn't fit
+    """
+    # Nothing here needs gc.mem_free(), tracing would dominate the times
+    tracemalloc.stop()
+
+    from adafruit_display_text.label import Label
+    from adafruit_pyportal import PyPortal
+    from glyph_atlas import load_font
+    from text_layout import layout_text
+
+    font = load_font(BDF)
+    height_label = Label(font, text="M", max_glyphs=10)
+
+    def with_wrap_nicely(quote_text):
+        quote = PyPortal.wrap_nicely(quote_text, 40)
+        if len(quote) > MAX_LINES:
+            return None
+
+        new_quote = ""
+        test = ""
+        for w in quote:
+            new_quote += "\n" + w
+            test += "M\n"
+        height_label.text = test
+        height_label.bounding_box
+        return new_quote
+
+    def with_layout_text(quote_text):
+        quote = layout_text(font, quote_text, WIDTH, max_lines=MAX_LINES)
+        return "\n" + "\n".join(quote[0]) if quote else None
+
+    paths = {"wrap_nicely": with_wrap_nicely, "layout_text": with_layout_text}
+    return lambda path: (font, paths[path])
+
+
+@PATHS
+def test_measure(benchmark, measure_of, path):
+    _, measure = measure_of(path)
+    quotes = quote_corpus(QUOTES)
+
+    fit = benchmark.pedantic(
+        lambda: sum(measure(quote) is not None for quote in quotes),
+        rounds=3,
+        iterations=1,
+    )
+
+    benchmark.extra_info["fit"] = fit
+
+
+@PATHS
+def test_update(benchmark, measure_of, path):
+    from adafruit_display_text.label import Label
+
+    font, measure = measure_of(path)
+    label = Label(font, text="Loading Quote...", max_glyphs=500)
+    # Quotes both paths show, so both render the same number of labels
+    checks = [measure_of(name)[1] for name in ("wrap_nicely", "layout_text")]
+    quotes = [
+        quote for quote in quote_corpus(QUOTES) if all(check(quote) for check in checks)
+    ][:UPDATES]
+
+    def update():
+        for quote in quotes:
+            label.text = ""
+            label.text = measure(quote)
+
+    benchmark.pedantic(update, rounds=3, iterations=1)
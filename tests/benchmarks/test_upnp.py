@@ -0,0 +1,26 @@
+"""One DSL status poll of the dashboard against the stand-in router, see
+simulator/upnp_benchmark.py"""
+
+import pytest
+
+from simulator.upnp_benchmark import measure
+
+POLLS = 50
+
+
+@pytest.mark.parametrize(
+    "pipelining, keep_alive",
+    ((True, True), (False, True), (False, False)),
+    ids=("pipelining", "keep-alive", "socket-per-request"),
+)
+def test_dsl_poll(benchmark, pipelining, keep_alive):
+    results = benchmark.pedantic(
+        measure,
+        kwargs=dict(polls=POLLS, pipelining=pipelining, keep_alive=keep_alive),
+        rounds=1,
+        iterations=1,
+    )
+    benchmark.extra_info.update(results)
+
+    assert results["round_trips"] == (1 if pipelining else 2)
+    assert results["connects"] == (0 if keep_alive else 2 * POLLS)
@@ -0,0 +1,97 @@
+"""Fixtures of the test suite. The modules of lib/, dashboard/ and demo_ui/
+are importable as they are, modules that need the board (displayio,
+gc.mem_free, ...) are imported inside a test that uses the board fixture.
+The apps run on the simulated PyPortal, see simulator/run.py."""
+
+import builtins
+import io
+import os
+import sys
+import tracemalloc
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# After the standard library, dashboard/code.py would shadow its code module
+sys.path += [ROOT] + [
+    os.path.join(ROOT, name) for name in ("lib", "dashboard", "demo_ui")
+]
+
+from simulator.hardware import Hardware  # noqa: E402
+from simulator.run import run  # noqa: E402
+from simulator.scenarios import SECRETS  # noqa: E402
+
+
+@pytest.fixture
+def board(tmp_path):
+    """The simulated board with an empty SD card, installed for the test.
+    Modules imported during the test see the stand-ins and the virtual
+    clock. gc.mem_free() is based on tracemalloc, which is started for
+    the test.
+
+    Returns:
+        Hardware -- the installed board
+    """
+    hardware = Hardware(os.path.join(ROOT, "dashboard"), str(tmp_path))
+    tracemalloc.start()
+    hardware.install(SECRETS)
+    try:
+        yield hardware
+    finally:
+        hardware.uninstall()
+        tracemalloc.stop()
+
+
+@pytest.fixture
+def opened(board, monkeypatch):
+    """Files opened on the board during the test, in order
+
+    Returns:
+        list -- file names as the app passed them to open()
+    """
+    names = []
+    board_open = builtins.open
+
+    def counting_open(file, *args, **kwargs):
+        names.append(file)
+        return board_open(file, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", counting_open)
+    return names
+
+
+@pytest.fixture(scope="session")
+def app_report():
+    """Run an app with its scenario, the reports are kept for the whole
+    session
+
+    Returns:
+        function -- called with the app name and the duration in seconds,
+            returns the report of simulator.run.run()
+    """
+    reports = {}
+
+    def get(app, duration=60):
+        if (app, duration) not in reports:
+            reports[app, duration] = run(app, duration=duration, serial=io.StringIO())
+        return reports[app, duration]
+
+    return get
+
+
+@pytest.fixture
+def simulate():
+    """Run an app with a scenario of the test
+
+    Returns:
+        function -- called with the app name, a scenario function (board,
+            duration) and the duration, returns the report and the serial
+            output
+    """
+
+    def simulate(app, scenario, duration=30, **kwargs):
+        serial = io.StringIO()
+        report = run(app, duration=duration, serial=serial, scenario=scenario, **kwargs)
+        return report, serial.getvalue()
+
+    return simulate
@@ -0,0 +1,135 @@
+"""Stand-ins for the tests that don't need the simulated board"""
+
+from simulator.servers import FritzboxServer
+
+
+def soap_response(action, fields, status=200, headers=()):
+    """HTTP response of the router to a SOAP action
+
+    Arguments:
+        action {str} -- action name, e.g. GetStatusInfo
+        fields {tuple} -- (element, value) tuples
+
+    Keyword Arguments:
+        status {int} -- HTTP status code (default: {200})
+        headers {tuple} -- additional header lines (default: {()})
+
+    Returns:
+        bytes -- status line, header and body
+    """
+    body = FritzboxServer.ENVELOPE.format(
+        action=action,
+        service="WANIPConnection:1",
+        fields="".join(f"<{tag}>{value}</{tag}>\n" for tag, value in fields),
+    ).encode("utf-8")
+    header = [
+        f"HTTP/1.1 {status} {'OK' if status == 200 else 'Internal Server Error'}",
+        'CONTENT-TYPE: text/xml; charset="utf-8"',
+        f"CONTENT-LENGTH: {len(body)}",
+        *headers,
+    ]
+    return ("\r\n".join(header) + "\r\n\r\n").encode("utf-8") + body
+
+
+class StubSocket:
+    """Socket of adafruit_esp32spi_socket 3.3.0 that answers every request
+    with the next of the given responses. What it has to receive becomes
+    available in chunks of a fixed size, one chunk per available() call,
+    so elements are split at every possible place."""
+
+    def __init__(self, module):
+        self._module = module
+        self._pending = b""
+        self._silent = 0
+        self.closed = False
+
+    def settimeout(self, timeout):
+        pass
+
+    def connect(self, address):
+        self._module.connects += 1
+
+    def send(self, data):
+        self._module.sent.append(bytes(data))
+        self._silent = self._module.silent
+        if self._module.responses:
+            self._pending += self._module.responses.pop(0)
+
+    def connected(self):
+        self._module.esp_calls += 1
+        return not self.closed
+
+    def available(self):
+        self._module.esp_calls += 1
+        if self._silent:
+            self._silent -= 1
+            return 0
+        return min(len(self._pending), self._module.chunk)
+
+    def recv(self, size):
+        self._module.esp_calls += 1
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+    def close(self):
+        self.closed = True
+
+
+class StubSocketModule:
+    """Socket module made of StubSockets, for UpnpSession"""
+
+    def __init__(self, responses, chunk=1024, silent=0):
+        """Constructor
+
+        Arguments:
+            responses {list} -- responses (bytes) to the requests in order,
+                b"" for a request that isn't answered
+
+        Keyword Arguments:
+            chunk {int} -- bytes available at once (default: {1024})
+            silent {int} -- available() calls after a request that report
+                nothing, the router's latency (default: {0})
+        """
+        self.responses = list(responses)
+        self.chunk = chunk
+        self.silent = silent
+        self.sent = []
+        self.connects = 0
+        self.esp_calls = 0
+
+    def socket(self):
+        return StubSocket(self)
+
+
+class StubKeyboardDevice:
+    """Keyboard of usb_hid.devices that records the reports it gets. The
+    host can be made to reject reports, like while it isn't ready."""
+
+    usage_page = 0x01
+    usage = 0x06
+
+    def __init__(self, clock=lambda: 0, busy=0):
+        """Constructor
+
+        Keyword Arguments:
+            clock {function} -- time of the reports (default: {always 0})
+            busy {int} -- sends that fail with an OSError before the host
+                accepts reports (default: {0})
+        """
+        self.clock = clock
+        self.busy = busy
+        # (time, report) tuples
+        self.sent = []
+
+    @property
+    def reports(self):
+        """The reports without their time"""
+        return [report for _, report in self.sent]
+
+    def send_report(self, report):
+        if len(report) != 8:
+            raise ValueError("Buffer incorrect size")
+        if self.busy:
+            self.busy -= 1
+            raise OSError("USB busy")
+        self.sent.append((self.clock(), bytes(report)))
@@ -0,0 +1,57 @@
+import types
+
+import pytest
+
+BEEP = "/sounds/beep.wav"  # 9216 sample bytes, preloaded
+SOUND = "/sounds/sound.wav"  # 37028 sample bytes, streamed
+
+
+@pytest.fixture
+def feedback(board):
+    """AudioFeedback with both clips loaded and a speaker enable pin"""
+    import audioio
+    from audio_feedback import AudioFeedback
+
+    feedback = AudioFeedback(
+        audioio.AudioOut(None), speaker_enable=types.SimpleNamespace(value=False)
+    )
+    feedback.load("beep", BEEP)
+    feedback.load("sound", SOUND)
+    return feedback
+
+
+def test_preloaded_clip_opens_no_file(board, feedback, opened):
+    for _ in range(10):
+        feedback.play("beep")
+        board.clock.sleep(0.05)
+        feedback.update()
+
+    assert opened == []
+    assert board.sounds_played == 10
+
+
+def test_streamed_clip_opens_its_file_per_play(board, feedback, opened):
+    for _ in range(3):
+        feedback.play("sound")
+        stream = feedback._stream_file
+        assert not stream.closed
+
+        # Retriggered before the end, the stream is closed by play()
+        feedback.play("sound")
+        assert stream.closed
+        board.clock.sleep(1)
+        feedback.update()
+        assert feedback._stream_file is None
+        assert not feedback._speaker_enable.value
+
+    assert opened == [SOUND] * 6
+
+
+def test_release_streams_preloaded_clips(board, feedback, opened):
+    feedback.release()
+    feedback.play("beep")
+    board.clock.sleep(1)
+    feedback.update()
+
+    assert opened == [BEEP]
+    assert feedback._stream_file is None
@@ -0,0 +1,116 @@
+import os
+import types
+
+import pytest
+
+from backlight_controller import BacklightController
+
+
+def load_traces():
+    """Read tests/light_traces.txt
+
+    Returns:
+        dict -- light sensor values by trace name
+    """
+    traces = {}
+    path = os.path.join(os.path.dirname(__file__), "light_traces.txt")
+
+    with open(path) as trace_file:
+        for line in trace_file:
+            if line.strip() and not line.startswith("#"):
+                name, values = line.split(":")
+                traces[name] = [int(value) for value in values.split()]
+
+    return traces
+
+
+TRACES = load_traces()
+
+
+def replay(values, **kwargs):
+    """Feed a trace to a BacklightController like the backlight task does
+
+    Returns:
+        tuple -- controller, (sample index, brightness) of the writes and
+            the smoothed light after every sample
+    """
+    sensor = types.SimpleNamespace(value=None)
+    writes = []
+    controller = BacklightController(
+        sensor, lambda brightness: writes.append((index, brightness)), **kwargs
+    )
+    lights = []
+
+    for index, value in enumerate(values):
+        sensor.value = value
+        controller.update()
+        lights.append(controller.light)
+
+    return controller, writes, lights
+
+
+def test_moving_average():
+    values = TRACES["lamp_off"]
+    _, _, lights = replay(values, alpha=0.2)
+
+    average = values[0]
+    for value, light in zip(values, lights):
+        average += 0.2 * (value - average)
+        assert light == pytest.approx(average)
+
+
+@pytest.mark.parametrize("name", ("steady", "flicker"))
+def test_noise_is_not_written(name):
+    controller, writes, _ = replay(TRACES[name])
+
+    # Only the first sample sets the backlight
+    assert [index for index, _ in writes] == [0]
+    assert controller.writes == 1
+
+
+def test_lamp_switched_off():
+    values = TRACES["lamp_off"]
+    controller, writes, _ = replay(values)
+
+    # The first sample after the lamp went off is written already
+    assert writes[1][0] == 60
+    # and the backlight ends up where the curve puts the new light
+    assert writes[-1][1] == pytest.approx(controller.map(400), abs=0.05)
+    assert writes[-1][0] < 60 + 20
+
+
+def test_hysteresis():
+    controller, writes, lights = replay(TRACES["cloud"], hysteresis=0.1)
+    written = [lights[index] for index, _ in writes]
+
+    assert len(writes) > 2
+    for previous, light in zip(written, written[1:]):
+        assert abs(light - previous) > 0.1 * previous
+
+
+def test_min_step():
+    controller, writes, _ = replay(TRACES["dusk"], min_step=0.05)
+    brightness = [value for _, value in writes]
+
+    for previous, value in zip(brightness, brightness[1:]):
+        assert abs(value - previous) >= 0.05
+    # From about 0.62 down to 0.06 in steps of at least 0.05
+    assert 5 <= len(writes) <= 12
+    assert brightness[-1] == pytest.approx(controller.map(300), abs=0.05)
+
+
+def test_override_until_toggled_back():
+    sensor = types.SimpleNamespace(value=8000)
+    writes = []
+    controller = BacklightController(sensor, writes.append)
+    controller.update()
+
+    assert not controller.toggle_off()
+    sensor.value = 400
+    for _ in range(20):
+        controller.update()
+    assert writes == [controller.map(8000), 0]
+
+    # Back on, at the light of now
+    assert controller.toggle_off()
+    assert writes[-1] == pytest.approx(controller.map(400), abs=0.05)
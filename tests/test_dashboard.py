@@ -0,0 +1,147 @@
+"""The dashboard on the simulated board, with scenarios of the tests"""
+
+import io
+import os
+import sys
+import types
+
+import pytest
+
+from simulator.run import run
+from simulator.scenarios import QUOTE_HOST, QUOTE_IP, SECRETS
+from simulator.servers import FritzboxServer, QuoteServer
+
+# Position of the Dim button, a tap changes the brightness right away
+DIM = (443, 21)
+
+# Positions of the shortcut buttons, a tap beeps and sends a macro
+SHORTCUTS = ((80, 284), (240, 284), (400, 284))
+
+# Length of sounds/beep.wav: 4608 samples at 48 kHz
+BEEP_MS = 96
+
+
+class FailingQuoteServer(QuoteServer):
+    def handle_get(self, request):
+        self._count()
+        request.send_error(500)
+
+
+def add_servers(board, quotes, fritzbox=None):
+    board.network.add_server(
+        fritzbox or FritzboxServer(),
+        SECRETS["access_point_ip"],
+        int(SECRETS["access_point_port"]),
+    )
+    board.network.add_server(quotes, QUOTE_HOST, 443, ip=QUOTE_IP)
+
+
+def test_touch_while_the_quote_server_thinks(simulate, tmp_path):
+    def scenario(board, duration):
+        # The fetch starts with the loop, TLS takes 1.5 s, then the
+        # server takes another 1.5 s for the response
+        add_servers(board, QuoteServer(connect_time=1.5, latency=1.5))
+        for index in range(4):
+            board.touch.tap(1.7 + index * 0.35, *DIM)
+
+    report, _ = simulate("dashboard", scenario, duration=10, sd_dir=str(tmp_path))
+
+    assert report["error"] is None
+    assert report["tap_ms"]["count"] == 4
+    assert report["tap_ms"]["max"] < 150
+    with open(os.path.join(tmp_path, "quotes.dat"), "rb") as store:
+        assert b"Make something every day." in store.read()
+
+
+def test_quote_server_error(simulate, tmp_path):
+    quotes = FailingQuoteServer()
+
+    def scenario(board, duration):
+        add_servers(board, quotes)
+        board.touch.tap(5, *DIM)
+
+    report, _ = simulate("dashboard", scenario, duration=10, sd_dir=str(tmp_path))
+
+    assert report["error"] is None
+    assert quotes.requests == 1
+    assert report["tap_ms"]["count"] == 1
+    store = tmp_path / "quotes.dat"
+    assert not store.exists() or b" - " not in store.read_bytes()
+
+
+def test_router_latency_keeps_taps_responsive(simulate):
+    def scenario(board, duration):
+        add_servers(board, QuoteServer(), FritzboxServer(latency=0.5))
+        for at in range(2, int(duration), 3):
+            board.touch.tap(at, *DIM)
+
+    report, _ = simulate("dashboard", scenario, duration=60)
+
+    assert report["error"] is None
+    assert report["tap_ms"]["max"] < 150
+    # Checking every 10 ms, not in a busy loop
+    assert report["network"]["esp_calls_per_min"] < 2000
+
+
+def play_file(self, name):
+    """AudioFeedback.play() as the dashboard played the beep before:
+    pyportal.play_file() opens the clip and returns when it is over"""
+    portal = types.SimpleNamespace(
+        audio=self._audio, _speaker_enable=self._speaker_enable
+    )
+    sys.modules["adafruit_pyportal"].PyPortal.play_file(portal, self._files[name])
+
+
+@pytest.fixture(scope="module")
+def shortcut_taps():
+    """Tap the shortcut buttons every two seconds for 30 seconds, the
+    reports are kept for the module
+
+    Returns:
+        function -- called with "play_file" for the blocking beep or
+            "audio_feedback", returns the report
+    """
+    reports = {}
+
+    def scenario(board, duration, sound):
+        add_servers(board, QuoteServer())
+        for index, at in enumerate(range(2, int(duration), 2)):
+            board.touch.tap(at, *SHORTCUTS[index % len(SHORTCUTS)])
+
+        if sound == "play_file":
+            # Once the app has imported it, before the first tap
+            board.at(
+                1,
+                lambda: setattr(
+                    sys.modules["audio_feedback"].AudioFeedback, "play", play_file
+                ),
+            )
+
+    def get(sound):
+        if sound not in reports:
+            reports[sound] = run(
+                "dashboard",
+                duration=30,
+                serial=io.StringIO(),
+                scenario=lambda board, duration: scenario(board, duration, sound),
+            )
+        return reports[sound]
+
+    return get
+
+
+@pytest.mark.parametrize("sound", ("play_file", "audio_feedback"))
+def test_beep_does_not_delay_the_shortcut(shortcut_taps, sound):
+    report = shortcut_taps(sound)
+    key_ms = report["key_ms"]
+
+    assert report["error"] is None
+    assert report["sounds"] == key_ms["count"] == 14
+
+    if sound == "play_file":
+        # The baseline: every shortcut waits for the whole beep
+        assert key_ms["p50"] > BEEP_MS
+    else:
+        assert key_ms["max"] < BEEP_MS
+        baseline = shortcut_taps("play_file")["key_ms"]
+        assert baseline["p50"] - key_ms["p50"] >= 0.9 * BEEP_MS
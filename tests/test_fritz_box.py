@@ -0,0 +1,169 @@
+import re
+import tracemalloc
+import types
+
+import pytest
+
+from stubs import StubSocketModule, soap_response
+
+LINK = (
+    ("NewWANAccessType", "DSL"),
+    ("NewLayer1UpstreamMaxBitRate", "40000000"),
+    ("NewLayer1DownstreamMaxBitRate", "100000000"),
+    ("NewPhysicalLinkStatus", "Up"),
+)
+STATUS = (
+    ("NewConnectionStatus", "Connected"),
+    ("NewLastConnectionError", "ERROR_NONE"),
+    ("NewUptime", "86400"),
+)
+
+
+@pytest.fixture
+def fritz_box(board):
+    """fritz_box imported on the simulated board, it needs the secrets
+    and the ESP32 socket module"""
+    import fritz_box
+
+    return fritz_box
+
+
+def body_of(response):
+    return bytearray(response.partition(b"\r\n\r\n")[2])
+
+
+def status_with(fritz_box, module, pipelining=True):
+    """FritzboxStatus that talks to a StubSocketModule"""
+    status = fritz_box.FritzboxStatus(
+        types.SimpleNamespace(_esp=None), pipelining=pipelining
+    )
+    status._session._socket_module = module
+    return status
+
+
+def test_field_types(fritz_box):
+    body = body_of(soap_response("GetCommonLinkProperties", LINK))
+    fields = {
+        field.attribute: field
+        for field in fritz_box.FritzboxStatus.actions["link_properties"].fields
+    }
+
+    assert fields["link_status"].parse(body, 0, len(body)) == "Up"
+    assert fields["max_bitrate_down"].parse(body, 0, len(body)) == 100000000
+    assert fields["max_bitrate_up"].parse(body, 0, len(body)) == 40000000
+
+
+def test_field_values(fritz_box):
+    field = fritz_box.UpnpField(
+        "NewConnectionStatus", "connection_status", fritz_box.CONNECTION_STATES
+    )
+
+    for value in ("Connected", "Disconnected", "Idle", ""):
+        body = body_of(
+            soap_response("GetStatusInfo", (("NewConnectionStatus", value),))
+        )
+        # Unknown values are decoded
+        assert field.parse(body, 0, len(body)) == value
+
+    body = body_of(soap_response("GetStatusInfo", STATUS))
+    # Only within the given range
+    assert field.parse(body, body.find(b"<NewUptime>"), len(body)) is None
+    assert (
+        fritz_box.UpnpField("Missing", "uptime", int).parse(body, 0, len(body)) is None
+    )
+
+
+def test_field_parse_allocates_less_than_the_regex(fritz_box):
+    response = soap_response("GetStatusInfo", STATUS)
+    body = body_of(response)
+    field = fritz_box.UpnpField(
+        "NewConnectionStatus", "connection_status", fritz_box.CONNECTION_STATES
+    )
+    regex = r"<NewConnectionStatus>(.*)<\/NewConnectionStatus>"
+
+    def with_regex():
+        # Like before UpnpField: the decoded body searched with a regex
+        return re.search(regex, bytes(body).decode("utf-8")).groups()[0]
+
+    peaks = []
+    for parse in (lambda: field.parse(body, 0, len(body)), with_regex):
+        assert parse() == "Connected"
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        parse()
+        peaks.append(tracemalloc.get_traced_memory()[1] - start)
+
+    assert peaks[0] < len(body) < peaks[1]
+
+
+@pytest.mark.parametrize("chunk", (1, 5, 13, 64))
+@pytest.mark.parametrize("pipelining", (True, False))
+def test_query_with_responses_in_chunks(fritz_box, chunk, pipelining):
+    module = StubSocketModule(
+        [
+            soap_response("GetCommonLinkProperties", LINK),
+            soap_response("GetStatusInfo", STATUS),
+        ],
+        chunk=chunk,
+    )
+    status = status_with(fritz_box, module, pipelining)
+
+    result = status.get_dsl_status()
+
+    assert result.linked and result.connected
+    assert result.uptime == 86400
+    assert result.max_bitrate_down == 100000000
+    assert module.connects == 1
+
+
+def test_error_response_is_not_read(fritz_box):
+    fault = soap_response("GetStatusInfo", (("NewConnectionStatus", "Connected"),), 500)
+    module = StubSocketModule([fault, soap_response("GetStatusInfo", STATUS)])
+    status = status_with(fritz_box, module)
+
+    assert status.query(("status_info",)).connection_status is None
+    assert status.query(("status_info",)).connection_status == "Connected"
+    # The fault was received completely, the socket kept
+    assert module.connects == 1
+
+
+def test_pipelining_survives_a_lost_response(fritz_box):
+    link = soap_response("GetCommonLinkProperties", LINK)
+    info = soap_response("GetStatusInfo", STATUS)
+    # The second pipelined request is lost, it's repeated on its own
+    module = StubSocketModule([link, b"", info] * fritz_box.PIPELINING_FAILURES)
+    status = status_with(fritz_box, module)
+
+    for query in range(fritz_box.PIPELINING_FAILURES):
+        assert status._pipelining
+        result = status.get_dsl_status()
+        assert result.linked and result.connected
+
+    assert not status._pipelining
+
+
+def test_pipelining_is_reset_by_a_success(fritz_box):
+    link = soap_response("GetCommonLinkProperties", LINK)
+    info = soap_response("GetStatusInfo", STATUS)
+    lost = [link, b"", info] * (fritz_box.PIPELINING_FAILURES - 1)
+    module = StubSocketModule(lost + [link, info] + lost)
+    status = status_with(fritz_box, module)
+
+    for query in range(2 * fritz_box.PIPELINING_FAILURES - 1):
+        assert status.get_dsl_status().connected
+
+    assert status._pipelining
+
+
+def test_pipelining_off_when_the_router_closes(fritz_box):
+    link = soap_response(
+        "GetCommonLinkProperties", LINK, headers=("Connection: close",)
+    )
+    info = soap_response("GetStatusInfo", STATUS)
+    module = StubSocketModule([link, b"", info])
+    status = status_with(fritz_box, module)
+
+    result = status.get_dsl_status()
+
+    assert result.linked and result.connected
+    assert not status._pipelining
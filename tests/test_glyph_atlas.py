@@ -0,0 +1,94 @@
+import ast
+import glob
+import os
+import shutil
+
+import pytest
+
+from tools.compile_font import DEFAULT_GLYPHS, build_atlas, parse_bdf
+
+FONTS = os.path.join(os.path.dirname(os.path.dirname(__file__)), "demo_ui", "fonts")
+BDF = os.path.join(FONTS, "Helvetica-Bold-16.bdf")
+
+# The glyph set the button controller loads at boot
+BUTTON_GLYPHS = b"abcdefghjiklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890- ()"
+
+
+@pytest.fixture
+def glyph_atlas(board):
+    """glyph_atlas imported on the simulated board"""
+    import glyph_atlas
+
+    return glyph_atlas
+
+
+def pixels(glyph):
+    bitmap = glyph.bitmap
+    return [[bitmap[x, y] for x in range(glyph.width)] for y in range(glyph.height)]
+
+
+def test_shipped_atlas_is_up_to_date():
+    bounding_box, glyphs = parse_bdf(BDF)
+    atlas = build_atlas(bounding_box, glyphs, [ord(char) for char in DEFAULT_GLYPHS])
+
+    with open(BDF.replace(".bdf", ".atlas"), "rb") as atlas_file:
+        assert atlas_file.read() == atlas
+
+
+def test_atlas_glyphs_match_the_bdf(glyph_atlas):
+    from adafruit_bitmap_font import bitmap_font
+
+    bdf = bitmap_font.load_font(BDF)
+    atlas = glyph_atlas.load_font(BDF)
+    assert isinstance(atlas, glyph_atlas.GlyphAtlas)
+    assert atlas.get_bounding_box() == bdf.get_bounding_box()
+
+    for code_point in BUTTON_GLYPHS:
+        expected = bdf.get_glyph(code_point)
+        glyph = atlas.get_glyph(code_point)
+
+        for attribute in ("width", "height", "dx", "dy", "shift_x", "shift_y"):
+            assert getattr(glyph, attribute) == getattr(expected, attribute)
+        assert pixels(glyph) == pixels(expected)
+
+
+def test_missing_glyph(glyph_atlas):
+    atlas = glyph_atlas.load_font(BDF)
+
+    assert atlas.get_glyph(0x20AC) is None
+    atlas.load_glyphs("€")
+
+
+def test_demo_ui_strings_resolve(glyph_atlas):
+    atlas = glyph_atlas.load_font(BDF)
+    characters = set()
+
+    for filename in glob.glob(os.path.join(os.path.dirname(FONTS), "*.py")):
+        with open(filename, encoding="utf-8") as source:
+            tree = ast.parse(source.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str):
+                characters.update(char for char in node.value if char >= " ")
+
+    assert "°" in characters
+    assert [char for char in characters if atlas.get_glyph(ord(char)) is None] == []
+
+
+def test_bdf_without_atlas(board, glyph_atlas, tmp_path):
+    shutil.copy(BDF, tmp_path)
+
+    font = glyph_atlas.load_font("/sd/Helvetica-Bold-16.bdf")
+
+    assert not isinstance(font, glyph_atlas.GlyphAtlas)
+    assert font.get_glyph(ord("A")).width == 12
+
+
+def test_clear_reads_glyphs_again(glyph_atlas):
+    atlas = glyph_atlas.load_font(BDF)
+    atlas.load_glyphs(BUTTON_GLYPHS)
+    glyph = atlas.get_glyph(ord("A"))
+
+    atlas.clear()
+
+    assert atlas.get_glyph(ord("A")) is not glyph
+    assert pixels(atlas.get_glyph(ord("A"))) == pixels(glyph)
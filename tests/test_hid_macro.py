@@ -0,0 +1,131 @@
+import types
+
+import pytest
+from adafruit_hid.keyboard import Keyboard
+from adafruit_hid.keyboard_layout_us import KeyboardLayoutUS
+from adafruit_hid.keycode import Keycode
+from stubs import StubKeyboardDevice
+
+import hid_macro
+from hid_macro import RELEASE_REPORT, Macro, MacroSender
+
+# The chord of the "Developer Scene" button
+SCENE = (Keycode.COMMAND, Keycode.CONTROL, Keycode.OPTION, Keycode.SHIFT, Keycode.FOUR)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(
+        hid_macro, "time", types.SimpleNamespace(monotonic=clock, sleep=None)
+    )
+    return clock
+
+
+def keyboard_reports(send):
+    """Reports adafruit_hid's Keyboard sends, without the one of its
+    constructor
+
+    Arguments:
+        send {function} -- called with the Keyboard
+    """
+    device = StubKeyboardDevice()
+    send(Keyboard([device]))
+    return device.reports[1:]
+
+
+def run(sender, clock, device, seconds, poll_interval=0.01):
+    """Call update() every poll interval, like the keyboard task"""
+    for _ in range(round(seconds / poll_interval)):
+        sender.update()
+        clock.now += poll_interval
+
+
+def test_chord_report_bytes():
+    macro = Macro.chord(*SCENE)
+
+    # GUI, ALT, SHIFT and CTRL bits, no reserved byte, the key "4"
+    assert macro.reports == (bytes((0x0F, 0, 0x21, 0, 0, 0, 0, 0)), RELEASE_REPORT)
+    assert list(macro.reports) == keyboard_reports(lambda k: k.send(*SCENE))
+
+
+def test_text_matches_the_keyboard_layout():
+    layout = KeyboardLayoutUS(Keyboard([StubKeyboardDevice()]))
+    macro = Macro.text("Hi, 42!", layout)
+
+    # The layout presses shift in a report of its own before the key, the
+    # macro does both in one report
+    assert list(macro.reports) == [
+        report
+        for report in keyboard_reports(lambda k: KeyboardLayoutUS(k).write("Hi, 42!"))
+        if report[2] or report == RELEASE_REPORT
+    ]
+    assert macro.reports[0] == bytes((0x02, 0, Keycode.H, 0, 0, 0, 0, 0))
+
+
+def test_sequence_and_chord_limits():
+    macro = Macro.sequence((Keycode.A,), (Keycode.CONTROL, Keycode.C))
+
+    assert macro.reports == (
+        bytes((0, 0, Keycode.A, 0, 0, 0, 0, 0)),
+        RELEASE_REPORT,
+        bytes((0x01, 0, Keycode.C, 0, 0, 0, 0, 0)),
+        RELEASE_REPORT,
+    )
+    with pytest.raises(ValueError):
+        Macro.chord(*range(Keycode.A, Keycode.A + 7))
+
+
+def test_reports_are_paced_by_the_poll_interval(clock):
+    device = StubKeyboardDevice(clock)
+    sender = MacroSender([device])
+    del device.sent[:]  # Release report of the ready check
+
+    # Rapid presses: all of them are queued right away
+    for _ in range(8):
+        assert sender.queue(Macro.chord(*SCENE))
+    assert not sender.queue(Macro.chord(*SCENE))
+
+    run(sender, clock, device, 0.2)
+
+    assert device.reports == [Macro.chord(*SCENE).reports[0], RELEASE_REPORT] * 8
+    times = [time for time, _ in device.sent]
+    assert all(b - a >= 0.01 - 1e-9 for a, b in zip(times, times[1:]))
+    # One report per poll
+    assert times[-1] == pytest.approx(0.15)
+    assert not sender.busy
+
+
+def test_hold_keeps_the_keys_pressed(clock):
+    device = StubKeyboardDevice(clock)
+    sender = MacroSender([device])
+    del device.sent[:]
+
+    sender.queue(Macro.hold((Keycode.SHIFT,), 0.5) + Macro.chord(Keycode.A))
+    run(sender, clock, device, 1)
+
+    assert [report[0] for _, report in device.sent] == [0x02, 0, 0, 0]
+    assert [time for time, _ in device.sent] == pytest.approx([0, 0.5, 0.51, 0.52])
+
+
+def test_busy_host_loses_no_report(clock):
+    device = StubKeyboardDevice(clock)
+    sender = MacroSender([device])
+    del device.sent[:]
+    device.busy = 3
+
+    sender.queue(Macro.chord(*SCENE))
+    run(sender, clock, device, 0.1)
+
+    assert device.reports == list(Macro.chord(*SCENE).reports)
+    # Retried with every poll until the host took it
+    assert device.sent[0][0] == pytest.approx(0.03)
+    assert sender.reports_sent == 2
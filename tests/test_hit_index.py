@@ -0,0 +1,130 @@
+import pytest
+
+from hit_index import HitTestIndex
+
+SCREEN = (480, 320)
+
+
+def button_grid(count, columns):
+    """Buttons in rows of columns buttons, filling the screen
+
+    Arguments:
+        count {int} -- number of buttons
+        columns {int} -- buttons per row
+
+    Returns:
+        list -- adafruit_button.Button objects
+    """
+    from adafruit_button import Button
+
+    rows = (count + columns - 1) // columns
+    width = SCREEN[0] // columns
+    height = SCREEN[1] // rows
+
+    return [
+        Button(
+            x=index % columns * width,
+            y=index // columns * height,
+            width=width - 4,
+            height=height - 4,
+        )
+        for index in range(count)
+    ]
+
+
+def linear_scan(buttons, x, y):
+    """The first button that contains a point, like the loops over all
+    buttons before the index"""
+    for button in buttons:
+        if button.contains((x, y)):
+            return button
+    return None
+
+
+def index_of(buttons):
+    index = HitTestIndex(*SCREEN)
+    for button in buttons:
+        index.register_button(button)
+    return index
+
+
+def test_register_and_lookup():
+    index = HitTestIndex(*SCREEN)
+    index.register("a", 10, 10, 100, 50)
+
+    assert index.lookup(50, 30) == "a"
+    assert index.lookup(200, 30) is None
+    # Cells without any widget
+    assert index.lookup(400, 300) is None
+
+
+@pytest.mark.parametrize(
+    "point, expected",
+    (
+        # Left and top edges of the area, on a cell boundary
+        ((40, 80), "a"),
+        ((39, 80), None),
+        ((80, 79), None),
+        # Right and bottom edges are part of the area, like in
+        # Button.contains(). They are the first pixels of the next cells.
+        ((120, 160), "a"),
+        ((121, 100), None),
+        ((100, 161), None),
+    ),
+)
+def test_points_on_cell_boundaries(point, expected):
+    index = HitTestIndex(*SCREEN, cell_size=40)
+    index.register("a", 40, 80, 80, 80)
+
+    assert index.lookup(*point) == expected
+
+
+@pytest.mark.parametrize(
+    "area, points",
+    (
+        # Reaching over the right and bottom edges
+        ((440, 280, 100, 100), ((479, 319), (440, 280), (500, 340))),
+        # Starting left of and above the screen
+        ((-30, -20, 60, 50), ((0, 0), (-10, -10), (30, 30))),
+    ),
+)
+def test_areas_clipped_at_the_screen_edge(area, points):
+    index = HitTestIndex(*SCREEN)
+    index.register("a", *area)
+
+    for point in points:
+        assert index.lookup(*point) == "a", point
+    assert index.lookup(200, 150) is None
+
+
+def test_overlapping_areas_first_registered_wins():
+    index = HitTestIndex(*SCREEN)
+    index.register("first", 30, 30, 100, 100)
+    index.register("second", 100, 100, 100, 100)
+
+    assert index.lookup(110, 110) == "first"
+    assert index.lookup(150, 150) == "second"
+    assert index.lookup(50, 50) == "first"
+
+
+def test_button_target(board):
+    buttons = button_grid(3, 3)
+    index = HitTestIndex(*SCREEN)
+    index.register_button(buttons[0])
+    index.register_button(buttons[1], target="second")
+
+    assert index.lookup(buttons[0].x, buttons[0].y) is buttons[0]
+    assert index.lookup(buttons[1].x, buttons[1].y) == "second"
+
+
+@pytest.mark.parametrize("count, columns", ((3, 3), (30, 6), (300, 20)))
+def test_same_button_as_a_linear_scan(board, count, columns):
+    buttons = button_grid(count, columns)
+    # Overlaps the buttons of the first row and reaches over the screen edge
+    buttons.append(button_grid(1, 1)[0])
+    buttons[-1].y = -20
+    index = index_of(buttons)
+
+    for y in range(-5, SCREEN[1] + 5, 3):
+        for x in range(-5, SCREEN[0] + 5, 3):
+            assert index.lookup(x, y) is linear_scan(buttons, x, y), (x, y)
@@ -0,0 +1,90 @@
+import pytest
+
+# Holds all six status icons in the simulator, where an entry costs
+# about 2.2 KB instead of the device's 640 bytes
+BUDGET = 1 << 15
+
+
+@pytest.fixture
+def image_cache(board):
+    """image_cache imported on the simulated board"""
+    import image_cache
+
+    return image_cache
+
+
+def test_flapping_icon_opens_no_files(board, image_cache, opened):
+    from status_icon_controller import StatusIconController
+
+    cache = image_cache.ImageCache(byte_budget=BUDGET)
+    controller = StatusIconController(image_cache=cache)
+    # Both states of each icon
+    assert cache.file_opens == 6
+    del opened[:]
+
+    for index in range(100):
+        controller.set_dsl_status(index % 2 == 0)
+
+    assert opened == []
+    assert cache.file_opens == 6
+
+
+def test_budget_evicts_least_recently_used(board, image_cache, opened):
+    import displayio
+
+    cache = image_cache.ImageCache(byte_budget=BUDGET)
+    group = displayio.Group(max_size=1)
+    cache.show(group, "/images/linked.bmp")
+    cache.show(group, "/images/unlinked.bmp")
+    cache.show(group, "/images/wifi_on.bmp")
+    # linked.bmp is the least recently used image that isn't shown
+    cache.byte_budget = cache.size - 1
+    cache.show(group, "/images/unlinked.bmp")
+    del opened[:]
+
+    cache.show(group, "/images/wifi_on.bmp")
+    cache.show(group, "/images/linked.bmp")
+
+    assert opened == ["/images/linked.bmp"]
+
+
+def test_shown_images_are_not_evicted(board, image_cache):
+    import displayio
+
+    cache = image_cache.ImageCache(byte_budget=0)
+    groups = [displayio.Group(max_size=1) for _ in range(2)]
+    cache.show(groups[0], "/images/linked.bmp")
+    cache.show(groups[1], "/images/wifi_on.bmp")
+    assert cache.file_opens == 2
+
+    cache.show(groups[0], "/images/linked.bmp")
+    cache.show(groups[1], "/images/wifi_on.bmp")
+    assert cache.file_opens == 2
+
+    cache.show(groups[1], None)
+    cache.show(groups[1], "/images/wifi_on.bmp")
+    assert cache.file_opens == 3
+
+
+def test_sprites_are_reused(board, image_cache):
+    cache = image_cache.ImageCache()
+    first = cache.get("/images/linked.bmp")
+    second = cache.get("/images/linked.bmp")
+    assert first is not second
+    assert cache.file_opens == 1
+
+    cache.release(first)
+    assert cache.get("/images/linked.bmp") is first
+
+
+def test_clear_closes_idle_files(board, image_cache):
+    cache = image_cache.ImageCache()
+    cache.preload("/images/linked.bmp")
+    shown = cache.get("/images/wifi_on.bmp")
+    files = {name: entry[0] for name, entry in cache._entries.items()}
+
+    cache.clear()
+
+    assert files["/images/linked.bmp"].closed
+    assert not files["/images/wifi_on.bmp"].closed
+    assert shown in cache._entries["/images/wifi_on.bmp"][4]
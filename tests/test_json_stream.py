@@ -0,0 +1,160 @@
+import json
+import tracemalloc
+
+import pytest
+
+from json_stream import JsonPathExtractor
+
+QUOTE_PATHS = ([0, "text"], [0, "author"])
+
+# Escapes, \u escapes with a surrogate pair and raw UTF-8
+ESCAPED = (
+    r'[{"text": "Say \"hi\"\\ \/ \b\f\n\r\t caf\u00e9 \ud83d\ude00 €",'
+    r' "author": "Aïda"}]'
+).encode("utf-8")
+
+DOCUMENTS = (
+    b'[{"text": "Make something every day.", "author": "Anonymous"}]',
+    ESCAPED,
+    # Keys before and after, nested values that are skipped
+    b'[{"id": -12.5e3, "tags": ["a", {"text": "no"}], "ok": true, "none": null,'
+    b' "author": "B", "text": "T", "more": [1, 2, [3]]}, {"text": "second"}]',
+    # No whitespace at all
+    b'[{"author":"C","text":"x,y:{}[]"}]',
+)
+
+
+def extract(document, paths, chunk):
+    """Feed a document to a JsonPathExtractor in chunks
+
+    Arguments:
+        document {bytes} -- JSON document
+        paths {tuple} -- paths to extract
+        chunk {int} -- chunk size
+
+    Returns:
+        JsonPathExtractor -- extractor after the document or once it was
+            done
+    """
+    extractor = JsonPathExtractor(paths)
+
+    for start in range(0, len(document), chunk):
+        if extractor.feed(document[start : start + chunk]):
+            return extractor
+
+    extractor.finish()
+    return extractor
+
+
+def expected(document, path):
+    value = json.loads(document)
+    for key in path:
+        value = value[key]
+    return value
+
+
+@pytest.mark.parametrize("document", DOCUMENTS, ids=range(len(DOCUMENTS)))
+@pytest.mark.parametrize("chunk", (1, 2, 3, 7, 64, 4096))
+def test_values_in_chunks(document, chunk):
+    extractor = extract(document, QUOTE_PATHS, chunk)
+
+    assert extractor.done
+    assert extractor.values == [expected(document, path) for path in QUOTE_PATHS]
+
+
+def test_escapes_split_at_every_byte():
+    text = expected(ESCAPED, [0, "text"])
+    assert "😀" in text and "é" in text
+
+    for split in range(1, len(ESCAPED)):
+        extractor = JsonPathExtractor(QUOTE_PATHS)
+        extractor.feed(ESCAPED[:split])
+        extractor.feed(ESCAPED[split:])
+
+        assert extractor.values == [text, "Aïda"]
+
+
+@pytest.mark.parametrize(
+    "document",
+    (
+        b'{"a": [10, -2.5e-3, true, false, null, "s"]}',
+        b'{"a" : [ 10 , -2.5e-3 , true , false , null , "s" ] }',
+    ),
+    ids=("compact", "spaced"),
+)
+@pytest.mark.parametrize("chunk", (1, 2, 3))
+def test_scalars_split_across_chunks(document, chunk):
+    paths = [["a", index] for index in range(6)]
+
+    extractor = extract(document, paths, chunk)
+
+    assert extractor.done
+    assert extractor.values == [10, -2.5e-3, True, False, None, "s"]
+
+
+@pytest.mark.parametrize("document", (b"42", b"-1.5", b"true", b"null"))
+def test_scalar_at_the_end_of_the_document(document):
+    extractor = JsonPathExtractor(([],))
+
+    assert not extractor.feed(document)
+    assert extractor.finish()
+    assert extractor.values == [json.loads(document)]
+
+
+def test_null_is_found_once():
+    extractor = JsonPathExtractor((["a"], ["b"]))
+
+    assert not extractor.feed(b'{"a": null, "a": 1, "c": 2')
+    assert extractor.values == [None, None]
+    assert extractor.feed(b', "b": 3}')
+    assert extractor.values == [None, 3]
+
+
+def test_stops_when_all_paths_are_found():
+    extractor = JsonPathExtractor(QUOTE_PATHS)
+
+    assert extractor.feed(b'[{"text": "t", "author": "a"}, garbage')
+    assert extractor.feed(b"[[[{{{")
+    assert extractor.values == ["t", "a"]
+
+
+def test_missing_path():
+    extractor = extract(DOCUMENTS[0], ([1, "text"],) + QUOTE_PATHS, 16)
+
+    assert not extractor.done
+    assert extractor.values[0] is None
+
+
+def test_value_too_long():
+    extractor = JsonPathExtractor(QUOTE_PATHS, max_length=8)
+
+    with pytest.raises(ValueError):
+        extractor.feed(DOCUMENTS[0])
+
+
+def test_peak_heap_against_json_loads():
+    # A response with many quotes, only the first one is wanted
+    quotes = [
+        {"text": "Quote number %d. " % index * 4, "author": "A"} for index in range(200)
+    ]
+    document = json.dumps(quotes).encode("utf-8")
+
+    def with_json():
+        quote = json.loads(document)[0]
+        return [quote["text"], quote["author"]]
+
+    def with_extractor():
+        return extract(document, QUOTE_PATHS, 64).values
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for function in (with_extractor, with_json):
+            tracemalloc.reset_peak()
+            start = tracemalloc.get_traced_memory()[0]
+            assert function() == [quotes[0]["text"], "A"]
+            peaks.append(tracemalloc.get_traced_memory()[1] - start)
+    finally:
+        tracemalloc.stop()
+
+    assert peaks[0] * 10 < peaks[1]
@@ -0,0 +1,39 @@
+from loop_profiler import LoopProfiler
+
+
+def test_powers_of_two_by_default():
+    profiler = LoopProfiler(buckets=8, enabled=True)
+    stage = profiler.stage("loop")
+
+    for value in (0, 1, 3, 700, 1 << 20):
+        profiler.add(stage, value)
+
+    assert profiler.count(stage) == 5
+    assert [profiler.upper_bound(bucket) for bucket in range(8)] == [
+        1 << bucket for bucket in range(8)
+    ]
+    assert profiler.percentile(stage, 0.5) == 4
+    # Values beyond the last bucket are counted in it, the maximum is kept
+    assert profiler.percentile(stage, 1) == 1 << 7
+    assert profiler.maximum(stage) == 1 << 20
+
+
+def test_precision_splits_the_powers_of_two():
+    profiler = LoopProfiler(buckets=800, precision=5, enabled=True)
+    stage = profiler.stage("loop")
+
+    for value in range(1, 100001, 7):
+        profiler.add(stage, value)
+        # Within 1/32 of the value
+        assert value <= profiler.upper_bound(_bucket(profiler, value))
+        assert profiler.upper_bound(_bucket(profiler, value)) <= value * 33 / 32 + 1
+
+    assert abs(profiler.percentile(stage, 0.5) - 50000) < 50000 / 32 + 7
+
+
+def _bucket(profiler, value):
+    # Bucket the value lands in: the first upper bound above it
+    bucket = 0
+    while profiler.upper_bound(bucket) <= value:
+        bucket += 1
+    return bucket
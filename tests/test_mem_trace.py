@@ -0,0 +1,62 @@
+import pytest
+
+import mem_trace
+from mem_trace import MemTrace
+from task_loop import TaskLoop
+
+
+@pytest.fixture
+def heap(monkeypatch):
+    """Free memory like on CircuitPython: only the current value can be
+    read, there is no peak tracking"""
+    heap = {"free": 5000}
+    monkeypatch.setattr(mem_trace, "mem_free", lambda: heap["free"])
+    monkeypatch.setattr(mem_trace, "_peak_free", lambda: heap["free"])
+    monkeypatch.setattr(mem_trace, "_reset_peak", lambda: None)
+    return heap
+
+
+def run(trace, heap, sampled):
+    """Run a task that allocates 4000 bytes for one yield inside of a span
+    and another task that allocates 1000 bytes while the span waits"""
+
+    def query():
+        heap["free"] -= 4000
+        yield
+        heap["free"] += 4000
+        yield
+
+    def spanned():
+        with trace.span("query"):
+            yield from query()
+
+    def other():
+        heap["free"] -= 1000
+        yield
+        heap["free"] += 1000
+
+    loop = TaskLoop(clock=lambda: 0, mem_trace=trace if sampled else None)
+    loop.add("spanned", spanned())
+    loop.add("other", other())
+    loop.run_forever()
+
+    return list(trace.records())
+
+
+def test_lowest_free_is_sampled_at_every_yield(heap):
+    # Name, free before, free after, lowest free. The lowest value
+    # includes the 1000 bytes of the other task, spans aren't isolated.
+    assert [r[:4] for r in run(MemTrace(), heap, True)] == [("query", 5000, 5000, 0)]
+
+
+def test_lowest_free_at_span_boundaries_only(heap):
+    assert [r[:4] for r in run(MemTrace(), heap, False)] == [
+        ("query", 5000, 5000, 5000)
+    ]
+
+
+def test_disabled_trace_is_not_sampled(heap):
+    trace = MemTrace(capacity=0)
+
+    assert run(trace, heap, True) == []
+    assert TaskLoop(mem_trace=trace)._sample is None
@@ -0,0 +1,84 @@
+import pytest
+
+from simulator.clock import SimulationEnd
+from task_loop import run_until_complete
+
+
+@pytest.fixture
+def guard(board):
+    """MemoryGuard with two resources on level 1 and one each on level 2
+    and 3, released names are recorded in guard.released"""
+    from memory_guard import MemoryGuard
+
+    guard = MemoryGuard()
+    guard.released = []
+    for name, level in (("cache", 1), ("glyphs", 1), ("quotes", 2), ("sounds", 3)):
+        guard.register(name, lambda name=name: guard.released.append(name), level)
+    return guard
+
+
+def failing(guard, failures):
+    """Function that runs out of memory the first times it's called and
+    records what was released before each call"""
+    calls = []
+
+    def function(value):
+        calls.append(list(guard.released))
+        if len(calls) <= failures:
+            raise MemoryError("memory allocation failed")
+        return value
+
+    return function, calls
+
+
+def test_one_level_per_retry(guard):
+    function, calls = failing(guard, 2)
+
+    assert guard.call(function, 42) == 42
+
+    # The cheapest level first, sounds are kept
+    assert calls == [[], ["cache", "glyphs"], ["cache", "glyphs", "quotes"]]
+    assert guard.reloads_avoided == 1
+
+
+def test_steps_are_retried_per_level(guard):
+    function, calls = failing(guard, 1)
+
+    def steps(value):
+        yield 0.01
+        return function(value)
+
+    assert run_until_complete(guard.call_steps(steps, 42)) == 42
+    assert calls == [[], ["cache", "glyphs"]]
+    assert guard.reloads_avoided == 1
+
+
+def test_success_releases_nothing(guard):
+    function, calls = failing(guard, 0)
+
+    assert guard.call(function, 42) == 42
+    assert guard.released == []
+    assert guard.reloads_avoided == 0
+
+
+def test_reload_after_the_last_level(board, guard):
+    function, calls = failing(guard, 4)
+
+    with pytest.raises(SimulationEnd):
+        guard.call(function, 42)
+
+    assert len(calls) == 4
+    assert guard.released == ["cache", "glyphs", "quotes", "sounds"]
+    assert board.reloads == 1
+
+
+def test_reclaim_stops_when_enough_is_free(guard, monkeypatch):
+    import memory_guard
+
+    free = [1000]
+    monkeypatch.setattr(memory_guard, "mem_free", lambda: free[0])
+    guard.register("images", lambda: free.__setitem__(0, 20000), level=2)
+
+    assert guard.check()
+    assert guard.released == ["cache", "glyphs", "quotes"]
+    assert not guard.check()
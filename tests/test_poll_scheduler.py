@@ -0,0 +1,140 @@
+import pytest
+
+from poll_scheduler import PollScheduler
+
+# Seconds a poll blocks while the router doesn't answer: the socket
+# timeout of FritzboxStatus
+TIMEOUT = 2
+DAY = 24 * 3600
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def scheduler(clock, period, **kwargs):
+    kwargs.setdefault("jitter", 0)
+    return PollScheduler(period, clock=clock, rand=lambda: 0.5, **kwargs)
+
+
+def test_backoff_up_to_the_cap():
+    clock = FakeClock()
+    polls = scheduler(clock, 15, retry_period=2, max_period=60)
+    delays = []
+
+    for _ in range(8):
+        polls.report(False)
+        delays.append(polls.delay())
+
+    assert delays == [2, 4, 8, 16, 32, 60, 60, 60]
+    # Counting stops at the cap
+    assert polls.failures == 5
+
+
+def test_long_outage_does_not_overflow():
+    clock = FakeClock()
+    polls = scheduler(clock, 15.0, retry_period=2.5, max_period=60.0, jitter=0.1)
+
+    for _ in range(5000):
+        polls.report(False)
+
+    assert polls.delay() == 60
+
+
+def test_recovery_is_confirmed():
+    clock = FakeClock()
+    polls = scheduler(clock, 15, retry_period=2, max_period=60, confirm_period=2)
+    for _ in range(3):
+        polls.report(False)
+
+    polls.report(True)
+    assert polls.delay() == 2
+    # A failed confirmation continues the backoff
+    polls.report(False)
+    assert polls.delay() == 16
+
+    polls.report(True)
+    polls.report(True)
+    assert polls.delay() == 15
+    assert polls.failures == 0
+
+
+def test_budget_defers_to_the_next_window():
+    clock = FakeClock()
+    polls = scheduler(clock, 1, budget=3, budget_window=100)
+
+    for _ in range(3):
+        clock.now = polls.next_poll
+        assert polls.due()
+        polls.report(True)
+
+    clock.now = polls.next_poll
+    assert not polls.due()
+    assert polls.next_poll == 100
+
+
+def outage(polls, clock, start, end, duration=DAY):
+    """Drive a scheduler through a day with the router down from start to
+    end. A failed poll blocks the loop for the socket timeout.
+
+    Returns:
+        tuple -- polls during the outage and seconds blocked by them,
+            seconds from the end of the outage to the first success
+    """
+    requests = 0
+    blocked = 0.0
+    recovered = None
+
+    while clock.now < duration:
+        clock.now = max(clock.now, polls.next_poll)
+        if not polls.due():
+            continue
+
+        down = start <= clock.now < end
+        if down:
+            requests += 1
+            blocked += TIMEOUT
+            clock.now += TIMEOUT
+        elif recovered is None and clock.now >= end:
+            recovered = clock.now - end
+        polls.report(not down)
+
+    return requests, blocked, recovered
+
+
+# Before PollScheduler the dashboard polled every 2 s while the DSL was
+# down, the others are the schedulers of dashboard/code.py
+STRATEGIES = {
+    "fixed 2 s": dict(period=15, retry_period=2, max_period=2),
+    "backoff": dict(period=15, retry_period=2, max_period=60, confirm_period=2),
+    "backoff and budget": dict(
+        period=15, retry_period=2, max_period=60, confirm_period=2, budget=600
+    ),
+}
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+def test_day_long_outage(record_property, strategy):
+    clock = FakeClock()
+    polls = scheduler(clock, jitter=0.1, **STRATEGIES[strategy])
+
+    # Down for 24 h after the first hour, the day ends with the first
+    # hour of the next one
+    requests, blocked, recovered = outage(
+        polls, clock, 3600, 3600 + DAY, duration=DAY + 2 * 3600
+    )
+    record_property("requests", requests)
+    record_property("blocked_s", blocked)
+    record_property("recovered_s", recovered)
+
+    if strategy == "fixed 2 s":
+        assert requests > DAY / (2 + TIMEOUT) * 0.9
+    else:
+        # About one poll a minute, 2 s out of 62 blocked
+        assert requests < DAY / 60 * 1.1
+        assert blocked < DAY * 0.04
+        assert recovered <= 60 * 1.1
@@ -0,0 +1,179 @@
+import os
+
+import pytest
+
+from quote_store import QuoteStore
+
+
+@pytest.fixture
+def filename(tmp_path):
+    return str(tmp_path / "quotes.dat")
+
+
+def quotes(count, start=0, length=40):
+    return [f"{index:04d} " + "x" * (length - 5) for index in range(start, count)]
+
+
+def records(filename):
+    """Split a record file into its records
+
+    Returns:
+        list -- records as bytes
+    """
+    with open(filename, "rb") as record_file:
+        data = record_file.read()
+
+    result = []
+    while data:
+        length = 4 + int.from_bytes(data[2:4], "little") + 2
+        result.append(data[:length])
+        data = data[length:]
+    return result
+
+
+def test_quotes_survive_a_reboot(filename):
+    store = QuoteStore(filename, capacity=4)
+    for quote in quotes(6):
+        store.add(quote)
+    assert store.next() == quotes(6)[2]
+    assert store.next() == quotes(6)[3]
+
+    store = QuoteStore(filename, capacity=4)
+
+    assert len(store) == 4
+    assert store.unseen == 2
+    assert store.next() == quotes(6)[4]
+    assert store.corrupt_records == 0
+
+
+def test_rotation_writes_nothing(filename):
+    store = QuoteStore(filename, capacity=3)
+    for quote in quotes(3):
+        store.add(quote)
+    shown = [store.next() for _ in range(3)]
+    size = os.stat(filename)[6]
+
+    for _ in range(30):
+        assert store.next() in shown
+
+    assert os.stat(filename)[6] == size
+
+
+def test_rotation_wrap_leaves_nothing_unseen(filename):
+    store = QuoteStore(filename, capacity=3)
+    for quote in quotes(3):
+        store.add(quote)
+
+    # Twice through the pool, the second round starts with the oldest
+    assert [store.next() for _ in range(5)] == quotes(3) + quotes(2)
+    assert store.unseen == 0
+    assert QuoteStore(filename, capacity=3).unseen == 0
+
+    # A new quote replaces the oldest and is shown next, then the
+    # rotation starts over
+    store.add(quotes(4)[3])
+    assert store.unseen == 1
+    assert [store.next() for _ in range(3)] == quotes(4, 3) + quotes(3, 1)
+    assert store.unseen == 0
+
+
+def test_drop_seen_after_a_wrap(filename):
+    store = QuoteStore(filename, capacity=4)
+    for quote in quotes(3):
+        store.add(quote)
+    for _ in range(4):
+        store.next()
+    store.add(quotes(4)[3])
+
+    # Only the quote on the screen and the unseen one are kept
+    assert store.drop_seen() == 2
+    assert [store.next() for _ in range(2)] == [quotes(4)[3], quotes(4)[0]]
+
+
+@pytest.mark.parametrize(
+    "damage, loaded",
+    (
+        (lambda data, start, end: data[:start] + b"\x00" + data[start + 1 :], (0, 2)),
+        (
+            lambda data, start, end: data[: start + 9] + b"?" + data[start + 10 :],
+            (0, 2),
+        ),
+        (lambda data, start, end: data[: end - 1] + b"\xff" + data[end:], (0, 2)),
+        (
+            lambda data, start, end: data[: start + 2] + b"\xff" + data[start + 3 :],
+            (0, 2),
+        ),
+        (
+            lambda data, start, end: data[:start] + b"\xa5\x01\xff" + data[start:],
+            (0, 1, 2),
+        ),
+    ),
+    ids=("magic", "payload", "checksum", "length", "garbage"),
+)
+def test_corrupt_record_is_skipped(filename, damage, loaded):
+    store = QuoteStore(filename, capacity=4)
+    for quote in quotes(3):
+        store.add(quote)
+    start = len(records(filename)[0])
+    end = start + len(records(filename)[1])
+    with open(filename, "rb") as record_file:
+        data = record_file.read()
+    with open(filename, "wb") as record_file:
+        record_file.write(damage(data, start, end))
+
+    store = QuoteStore(filename, capacity=4)
+
+    assert store.corrupt_records == 1
+    assert [store.next() for _ in loaded] == [quotes(3)[index] for index in loaded]
+    # The file was rewritten without the corrupt record
+    assert QuoteStore(filename, capacity=4).corrupt_records == 0
+
+
+def test_write_cut_off_by_a_reset(filename):
+    store = QuoteStore(filename, capacity=4)
+    for quote in quotes(2):
+        store.add(quote)
+    with open(filename, "rb") as record_file:
+        data = record_file.read()
+    with open(filename, "wb") as record_file:
+        record_file.write(data[:-5])
+
+    store = QuoteStore(filename, capacity=4)
+
+    assert store.corrupt_records == 1
+    assert len(store) == 1
+    store.add("next")
+    assert len(QuoteStore(filename, capacity=4)) == 2
+
+
+@pytest.mark.parametrize("length", (20, 200, 400))
+def test_file_size_is_bounded(filename, monkeypatch, length):
+    compactions = []
+    rename = os.rename
+    monkeypatch.setattr(
+        os, "rename", lambda *args: compactions.append(args) or rename(*args)
+    )
+    store = QuoteStore(filename, capacity=8, max_size=1024)
+    # Size of the file with just the pool
+    pool = 8 * (4 + 4 + length + 2) + (4 + 4 + 2)
+    bound = max(1024, 2 * pool) + (4 + 4 + length + 2)
+
+    for quote in quotes(500, length=length):
+        store.add(quote)
+        store.next()
+        assert os.stat(filename)[6] <= bound
+
+    # Every compaction freed at least half of the file
+    written = 500 * (4 + 4 + length + 2 + 4 + 4 + 2)
+    assert len(compactions) <= written // max(pool, 1024 - pool)
+    store = QuoteStore(filename)
+    assert store.corrupt_records == 0
+    assert [store.next() for _ in range(8)] == quotes(500, 492, length)
+
+
+def test_read_only_file_system(tmp_path):
+    store = QuoteStore(str(tmp_path / "missing" / "quotes.dat"))
+    store.add("quote")
+
+    assert not store.persistent
+    assert store.next() == "quote"
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+
+
+class FakeDisplay:
+    """Display that records the refresh calls, refresh() returns the
+    next of the given results"""
+
+    def __init__(self, *results):
+        self.auto_refresh = True
+        self.results = list(results)
+        self.refresh_calls = []
+        self.refresh_times = []
+
+    def refresh(self, **kwargs):
+        self.refresh_calls.append(kwargs)
+        self.refresh_times.append(time.monotonic())
+        return self.results.pop(0) if self.results else True
+
+
+@pytest.fixture
+def render_coordinator(board):
+    """render_coordinator imported on the simulated board, time runs on
+    the virtual clock"""
+    import render_coordinator
+
+    return render_coordinator
+
+
+def test_takes_over_refreshes(render_coordinator):
+    display = FakeDisplay()
+    render = render_coordinator.RenderCoordinator(display)
+
+    assert not display.auto_refresh
+    assert not render.flush()
+    assert display.refresh_calls == []
+
+
+def test_frame_rate_is_capped(board, render_coordinator):
+    display = FakeDisplay()
+    render = render_coordinator.RenderCoordinator(display, max_fps=10)
+
+    board.clock.sleep(1)
+    for _ in range(100):
+        render.invalidate()
+        render.flush()
+        board.clock.sleep(0.01)
+
+    times = display.refresh_times
+    assert render.refreshes == len(times) >= 9
+    assert min(b - a for a, b in zip(times, times[1:])) >= 0.1
+    assert display.refresh_calls[0] == dict(
+        target_frames_per_second=10, minimum_frames_per_second=0
+    )
+
+
+def test_skipped_refresh_stays_dirty(board, render_coordinator):
+    display = FakeDisplay(False)
+    render = render_coordinator.RenderCoordinator(display)
+    board.clock.sleep(1)
+    render.invalidate()
+
+    assert not render.flush()
+    board.clock.sleep(0.1)
+    assert render.flush()
+    board.clock.sleep(0.1)
+    assert not render.flush()
+
+    assert render.skipped == 1
+    assert render.refreshes == 1
+
+
+def test_icon_flip_pushes_the_icon(board, render_coordinator):
+    import displayio
+    from status_icon_controller import StatusIconController
+
+    render = render_coordinator.RenderCoordinator(board.display)
+    controller = StatusIconController(
+        sprite_sheet="/images/status_icons.bmp", render=render
+    )
+    root = displayio.Group(max_size=3)
+    for group in controller.get_icons():
+        root.append(group)
+    board.display.show(root)
+    board.clock.sleep(1)
+    render.invalidate()
+    render.flush()
+    board.clock.sleep(1)
+    pushed = board.display.pixels_pushed
+
+    controller.set_wifi_status(True)
+    controller.set_dsl_status(True)
+    assert render.flush()
+
+    assert board.display.pixels_pushed - pushed == 2 * 32 * 32
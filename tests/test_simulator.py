@@ -0,0 +1,94 @@
+"""The apps on the simulated board, and the simulator itself"""
+
+import os
+import time
+
+import pytest
+
+from simulator.clock import SimulationEnd, VirtualClock
+from simulator.drive import Drive
+from simulator.scenarios import APPS, ROOT
+
+
+@pytest.mark.parametrize("app", APPS)
+def test_app_runs_its_scenario(app_report, app):
+    report = app_report(app)
+
+    assert report["error"] is None
+    assert report["end"].endswith("simulated")
+    assert report["boot"]["busy_ms"] > 0
+    assert report["display"]["refreshes"] > 0
+    assert report["reloads"] == 0
+
+
+@pytest.mark.parametrize("app", ("dashboard", "demo_ui"))
+def test_every_tap_gets_a_response(app_report, app):
+    taps = app_report(app)["tap_ms"]
+
+    assert taps["count"] > 10
+    # Nothing may block the loop for longer than the router timeout
+    assert taps["max"] < 2000
+
+
+def test_dashboard_sends_macros_and_polls(app_report):
+    report = app_report("dashboard")
+
+    assert report["hid_reports"] > 0
+    assert report["network"]["round_trips"] > 0
+    assert report["stages"]["dsl"]["steps"] > 0
+
+
+def test_quote_fetches_once(app_report):
+    network = app_report("quote")["network"]
+
+    assert network["requests"] == 1
+    assert network["connects"] == 1
+
+
+def test_clock_sleeps_without_waiting():
+    clock = VirtualClock(duration=3600)
+    start = time.perf_counter()
+
+    for _ in range(59):
+        clock.sleep(60)
+
+    assert time.perf_counter() - start < 1
+    assert clock.monotonic() >= 3540
+    assert clock.sleeps == 59
+    with pytest.raises(SimulationEnd):
+        clock.sleep(60)
+
+
+def test_clock_scales_compute_time():
+    clock = VirtualClock(cpu_scale=10)
+    start = clock.busy()
+    real = time.perf_counter()
+    while time.perf_counter() - real < 0.01:
+        pass
+
+    assert clock.busy() - start >= 0.1
+
+
+def test_drive_maps_device_paths(tmp_path):
+    app_dir = os.path.join(ROOT, "demo_ui")
+    font = os.path.join(app_dir, "fonts", "Helvetica-Bold-16.bdf")
+    drive = Drive(app_dir, str(tmp_path), substitute_font=font)
+
+    assert drive.resolve("/sd/quotes.bin") == str(tmp_path / "quotes.bin")
+    assert drive.resolve("/images/ui_sprites.bmp").startswith(app_dir)
+    assert drive.resolve("/fonts/Missing-12.bdf") == font
+    assert drive.substituted == {"/fonts/Missing-12.bdf": font}
+    assert drive.resolve("/usr/lib") == "/usr/lib"
+
+
+def test_board_replaces_the_board_modules(board):
+    import gc
+
+    import displayio
+
+    assert displayio.__file__.startswith(os.path.join(ROOT, "simulator"))
+    assert 0 < gc.mem_free() <= board.heap_size
+
+    sleeps = board.clock.sleeps
+    time.sleep(5)
+    assert board.clock.sleeps == sleeps + 1
@@ -0,0 +1,80 @@
+import pytest
+
+SHEET = "/images/status_icons.bmp"
+
+# Holds all six icons in the simulator, see test_image_cache.py
+BUDGET = 1 << 15
+
+
+@pytest.fixture
+def controller_of(board):
+    """Create a StatusIconController on the simulated board
+
+    Returns:
+        function -- called with the sprite sheet (None for one file per
+            icon), returns the controller
+    """
+    from image_cache import ImageCache
+    from status_icon_controller import StatusIconController
+
+    def create(sprite_sheet):
+        return StatusIconController(
+            image_cache=ImageCache(byte_budget=BUDGET), sprite_sheet=sprite_sheet
+        )
+
+    return create
+
+
+@pytest.mark.parametrize(
+    "sprite_sheet, files",
+    ((None, 6), (SHEET, 2)),
+    ids=("files", "sheet"),
+)
+def test_setup_opens(controller_of, opened, sprite_sheet, files):
+    controller_of(sprite_sheet)
+
+    assert len(opened) == files
+
+
+def test_sheet_change_is_a_tile_write(board, controller_of, opened):
+    controller = controller_of(SHEET)
+    group = controller.icons["wifi_status"]["object"]
+    sprite = group[0]
+    del opened[:]
+
+    controller.set_wifi_status(True)
+    assert group[0] is sprite
+    assert sprite[0] == 2
+    controller.set_wifi_status(False)
+    assert sprite[0] == 3
+
+    assert opened == []
+
+
+def test_sheet_shows_the_same_icons(controller_of):
+    tiles = controller_of(SHEET)._manifest["tiles"]
+    controller = controller_of(None)
+
+    for icon in controller.icons.values():
+        for key in ("icon_path_active", "icon_path_inactive"):
+            name = icon[key].rsplit("/", 1)[-1]
+            assert name in tiles
+            assert 0 <= tiles[name] < len(tiles)
+    assert sorted(tiles.values()) == list(range(len(tiles)))
+
+
+def test_change_marks_only_the_icon_dirty(board, controller_of):
+    import displayio
+
+    controller = controller_of(SHEET)
+    root = displayio.Group(max_size=3)
+    for group in controller.get_icons():
+        root.append(group)
+    board.display.show(root)
+    board.display.refresh()
+    pushed = board.display.pixels_pushed
+
+    controller.set_dsl_status(True)
+    board.display.refresh()
+
+    assert board.display.pixels_pushed - pushed == 32 * 32
@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from test_glyph_atlas import BDF
+
+WORDS = (
+    "a an the of to in is it be we you they life time love work day world "
+    "never always simple better make something every people great thing "
+    "future invent predict nothing good only way think know learn change "
+    "quietly impossible, tomorrow. yesterday; beautiful question (answer) "
+    "creativity - 1984 100% imagination experience"
+).split()
+AUTHORS = ("Alan Kay", "Ada Lovelace", "Grace Hopper", "Anonymous", "Tim Peters")
+
+
+def quote_corpus(count, seed=1):
+    """Quotes as the dashboard shows them, made up from a word list
+
+    Arguments:
+        count {int} -- number of quotes
+
+    Keyword Arguments:
+        seed {int} -- seed of the random words (default: {1})
+
+    Returns:
+        list -- quote strings with author
+    """
+    rng = random.Random(seed)
+    quotes = []
+
+    for _ in range(count):
+        words = rng.choices(WORDS, k=rng.randint(3, 40))
+        text = " ".join(words).capitalize()
+        quotes.append(f'"{text}." - {rng.choice(AUTHORS)}')
+
+    return quotes
+
+
+@pytest.fixture
+def font(board):
+    """Helvetica-Bold-16 from its glyph atlas"""
+    from glyph_atlas import load_font
+
+    return load_font(BDF)
+
+
+def advance(font, text):
+    return sum(font.get_glyph(ord(char)).shift_x for char in text)
+
+
+def test_size_matches_the_label(font):
+    from adafruit_display_text.label import Label
+    from text_layout import layout_text
+
+    for quote in quote_corpus(200):
+        lines, width, height = layout_text(font, quote, 460)
+        x, _, box_width, box_height = Label(font, text="\n".join(lines)).bounding_box
+
+        assert width == x + box_width
+        assert height == box_height
+
+
+def test_lines_fit(font):
+    from text_layout import layout_text
+
+    for quote in quote_corpus(200, seed=2):
+        lines, width, _ = layout_text(font, quote, 300)
+
+        assert " ".join(lines) == quote
+        for index, line in enumerate(lines):
+            assert advance(font, line) <= 300 or " " not in line
+            if index + 1 < len(lines):
+                # The next word would not have fitted
+                next_word = lines[index + 1].split(" ")[0]
+                assert advance(font, line + " " + next_word) > 300
+        assert width == max(advance(font, line) for line in lines)
+
+
+def test_max_lines(font):
+    from text_layout import layout_text
+
+    quotes = quote_corpus(200, seed=3)
+    for quote in quotes:
+        unlimited = layout_text(font, quote, 460)
+        limited = layout_text(font, quote, 460, max_lines=4)
+
+        assert limited == (unlimited if len(unlimited[0]) <= 4 else None)
+
+
+def test_long_word(font):
+    from text_layout import layout_text
+
+    lines, width, _ = layout_text(font, "a " + "M" * 40 + " b", 100)
+
+    assert lines == ["a", "M" * 40, "b"]
+    assert width == advance(font, "M" * 40)
@@ -0,0 +1,133 @@
+import os
+
+import pytest
+
+from touch_filter import TouchFilter
+
+# Sample period of the traces in milliseconds
+SAMPLE_MS = 10
+
+PRESS = TouchFilter.PRESS
+HOLD = TouchFilter.HOLD
+RELEASE = TouchFilter.RELEASE
+
+
+def load_traces():
+    """Read tests/touch_traces.txt
+
+    Returns:
+        dict -- samples by trace name, (x, y, pressure) tuples or None
+    """
+    traces = {}
+    path = os.path.join(os.path.dirname(__file__), "touch_traces.txt")
+
+    with open(path) as trace_file:
+        for line in trace_file:
+            if not line.strip() or line.startswith("#"):
+                continue
+
+            name, samples = line.split(":")
+            traces[name] = [
+                None if sample == "-" else (*map(int, sample.split(",")), 40000)
+                for sample in samples.split()
+            ]
+
+    return traces
+
+
+TRACES = load_traces()
+
+
+def replay(samples, **kwargs):
+    """Feed a trace to a TouchFilter like the touch task does
+
+    Returns:
+        list -- (event, milliseconds, x, y) of the events
+    """
+    now = [0]
+    touch_filter = TouchFilter(clock=lambda: now[0] / 1000, **kwargs)
+    events = []
+    touch_filter.add_listener(lambda event, x, y: events.append((event, now[0], x, y)))
+
+    for index, point in enumerate(samples):
+        now[0] = index * SAMPLE_MS
+        touch_filter.update(point)
+
+    return events
+
+
+def touch_starts(samples, release_ms=30):
+    """Milliseconds at which the touches of a trace start. Gaps shorter
+    than release_ms are dropouts and don't start a new touch."""
+    starts = []
+    last_touch = None
+
+    for index, point in enumerate(samples):
+        now = index * SAMPLE_MS
+        if point:
+            if last_touch is None or now - last_touch > release_ms:
+                starts.append(now)
+            last_touch = now
+
+    return starts
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    (
+        ("tap", [(PRESS, 50), (RELEASE, 170)]),
+        ("short_tap", [(PRESS, 50), (RELEASE, 80)]),
+        ("hold", [(PRESS, 50), (HOLD, 850), (RELEASE, 1050)]),
+        ("dropouts", [(PRESS, 50), (RELEASE, 350)]),
+        ("double_tap", [(PRESS, 50), (RELEASE, 130), (PRESS, 210), (RELEASE, 290)]),
+    ),
+)
+def test_settle_hold_and_release(name, expected):
+    events = replay(TRACES[name], settle_ms=20, hold_ms=800, release_ms=30)
+
+    assert [event[:2] for event in events] == expected
+
+
+@pytest.mark.parametrize(
+    "name, position",
+    (("tap", (160, 120)), ("hold", (260, 40)), ("dropouts", (100, 160))),
+)
+def test_outliers_do_not_move_the_press(name, position):
+    # The first sample and single samples are off by up to 90 pixels
+    for event, _, x, y in replay(TRACES[name]):
+        assert abs(x - position[0]) <= 3, event
+        assert abs(y - position[1]) <= 3, event
+
+
+@pytest.mark.parametrize("settle_ms", (20, 40))
+def test_press_latency(settle_ms):
+    latencies = []
+
+    for name in ("tap", "hold", "dropouts", "double_tap"):
+        starts = touch_starts(TRACES[name])
+        presses = [
+            event[1]
+            for event in replay(TRACES[name], settle_ms=settle_ms)
+            if event[0] == PRESS
+        ]
+        assert len(presses) == len(starts), name
+        latencies += [press - start for press, start in zip(presses, starts)]
+
+    # A press is reported with the first sample after the settle time
+    assert max(latencies) < settle_ms + SAMPLE_MS
+
+
+def test_false_press_rate():
+    # Spikes, a bounce and a touch that is too short
+    noise = ("spike", "bounce", "brush")
+    touches = sum(len(touch_starts(TRACES[name])) for name in noise)
+    presses = sum(event[0] == PRESS for name in noise for event in replay(TRACES[name]))
+
+    assert touches == 5
+    assert presses == 0
+
+
+def test_release_without_press_is_not_reported():
+    events = replay(TRACES["brush"] + TRACES["tap"])
+
+    assert [event[0] for event in events] == [PRESS, RELEASE]
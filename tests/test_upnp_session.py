@@ -0,0 +1,98 @@
+import pytest
+
+from stubs import StubSocketModule, soap_response
+from upnp_session import POLL_INTERVAL, UpnpSession, build_request, find, parse_int
+
+REQUEST = build_request("192.168.178.1", 49000, "/control", "urn:x#Action", "<x/>")
+
+
+def run(generator):
+    """Run a TaskLoop generator to its end
+
+    Arguments:
+        generator {generator} -- generator
+
+    Returns:
+        object -- return value
+    """
+    try:
+        while True:
+            next(generator)
+    except StopIteration as stop:
+        return stop.value
+
+
+def test_find_searches_the_range_only():
+    buffer = bytearray(b"<a>1</a><b>2</b>")
+
+    assert find(buffer, b"<b>", 0, len(buffer)) == 8
+    assert find(buffer, b"<b>", 0, 10) == -1
+    assert find(buffer, b"<a>", 1, len(buffer)) == -1
+
+
+def test_parse_int():
+    buffer = bytearray(b"length:  1234\r\n")
+
+    assert parse_int(buffer, 7, len(buffer)) == 1234
+    assert parse_int(buffer, 7, 11) == 12
+    assert parse_int(buffer, 0, len(buffer)) is None
+
+
+def test_build_request_counts_the_encoded_body():
+    request = build_request("host", 80, "/", "urn:x#A", "<ä/>")
+
+    assert b"content-length: 5\r\n" in request
+    assert request.endswith("<ä/>".encode("utf-8"))
+
+
+@pytest.mark.parametrize("chunk", (1, 2, 3, 7, 64, 1024))
+def test_response_in_chunks(chunk):
+    response = soap_response("GetStatusInfo", (("NewConnectionStatus", "Connected"),))
+    module = StubSocketModule([response, response], chunk=chunk)
+    session = UpnpSession(module, "192.168.178.1", 49000)
+
+    for _ in range(2):
+        assert run(session.post(REQUEST)) == 200
+        start, end = run(session.read_body())
+        assert session.buffer[start:end] == response.partition(b"\r\n\r\n")[2]
+
+    # The second request reused the socket
+    assert module.connects == 1
+
+
+def test_pipelined_responses_in_one_chunk():
+    first = soap_response("GetStatusInfo", (("NewUptime", "1"),))
+    second = soap_response("GetStatusInfo", (("NewUptime", "2"),))
+    module = StubSocketModule([first + second], chunk=4096)
+    session = UpnpSession(module, "192.168.178.1", 49000)
+
+    session.send(REQUEST)
+    session.send(REQUEST)
+    bodies = []
+    for _ in range(2):
+        assert run(session.read_header()) == 200
+        start, end = run(session.read_body())
+        bodies.append(bytes(session.buffer[start:end]))
+        session.release()
+
+    assert bodies == [first.partition(b"\r\n\r\n")[2], second.partition(b"\r\n\r\n")[2]]
+
+
+def test_response_bigger_than_the_buffer():
+    response = soap_response("GetStatusInfo", (("NewUptime", "1" * 2000),))
+    session = UpnpSession(StubSocketModule([response]), "192.168.178.1", 49000)
+
+    assert run(session.post(REQUEST)) == 200
+    with pytest.raises(OSError):
+        run(session.read_body())
+
+
+def test_wait_polls_at_an_interval():
+    response = soap_response("GetStatusInfo", (("NewUptime", "1"),))
+    module = StubSocketModule([response], silent=5)
+    session = UpnpSession(module, "192.168.178.1", 49000)
+
+    steps = list(session.post(REQUEST))
+
+    # The first silent check is the receive attempt before waiting
+    assert steps == [POLL_INTERVAL] * 4
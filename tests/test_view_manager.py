@@ -0,0 +1,68 @@
+import gc
+
+import pytest
+
+# Bytes a view keeps besides its group, like the labels and bitmaps of
+# the demo_ui views
+VIEW_SIZE = 16384
+
+
+@pytest.fixture
+def views(board):
+    """ViewManager with three views that count how often they are built"""
+    import displayio
+    from view_manager import ViewManager
+
+    views = ViewManager(displayio.Group(max_size=3), 320, 240)
+    views.builds = []
+    views.releases = []
+
+    def factory(name):
+        def build(view):
+            views.builds.append(name)
+            view.widgets["content"] = bytearray(VIEW_SIZE)
+            view.on_release.append(lambda: views.releases.append(name))
+
+        return build
+
+    for name in ("view1", "view2", "view3"):
+        views.add(name, factory(name))
+
+    return views
+
+
+def test_views_are_built_on_first_show(views):
+    assert views.builds == []
+    assert views.lookup(10, 10) is None
+
+    views.show("view1")
+    assert views.builds == ["view1"]
+
+    for name in ("view2", "view1", "view3", "view2"):
+        views.show(name)
+
+    assert views.builds == ["view1", "view2", "view3"]
+    # Switching only flips the hidden flags
+    assert [view.group.hidden for view in views._views.values()] == [
+        True,
+        False,
+        True,
+    ]
+
+
+def test_hidden_views_are_released_and_rebuilt(views):
+    for name in ("view1", "view2", "view3"):
+        views.show(name)
+    gc.collect()
+    free = gc.mem_free()
+
+    assert views.release_hidden() == 2
+    gc.collect()
+
+    assert sorted(views.releases) == ["view1", "view2"]
+    assert gc.mem_free() - free >= 2 * VIEW_SIZE
+    assert len(views._parent) == 1
+
+    views.show("view1")
+    assert views.builds == ["view1", "view2", "view3", "view1"]
+    assert len(views._parent) == 2
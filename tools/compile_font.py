@@ -0,0 +1,140 @@
+"""Compile a BDF font into a binary glyph atlas that glyph_atlas.py can
+load without parsing the BDF text at every boot.
+
+Runs on the host (CPython), not on the PyPortal:
+
+    python tools/compile_font.py demo_ui/fonts/Helvetica-Bold-16.bdf
+
+The atlas is written next to the BDF file with the extension .atlas.
+
+Atlas format (little endian):
+    header: b"GLA1", glyph count (H), font bounding box (hhhh)
+    index:  one entry per glyph, sorted by code point:
+            code point (H), width (B), height (B), dx (b), dy (b),
+            shift_x (b), shift_y (b), data offset (I)
+    data:   glyph bitmaps, 1 bit per pixel, rows padded to full bytes
+"""
+
+import argparse
+import struct
+
+HEADER_FORMAT = "<4sHhhhh"
+ENTRY_FORMAT = "<HBBbbbbI"
+
+# Printable ASCII and Latin-1, e.g. the degree sign of temperatures
+DEFAULT_GLYPHS = "".join(
+    chr(code_point) for code_point in (*range(32, 127), *range(160, 256))
+)
+
+
+def parse_bdf(filename):
+    """Parse a BDF font
+
+    Arguments:
+        filename {str} -- file path+name
+
+    Returns:
+        tuple -- font bounding box and a dict mapping code points to
+            (width, height, dx, dy, shift_x, shift_y, rows) tuples, rows
+            being a list of ints padded to full bytes with the leftmost
+            pixel in the MSB
+    """
+    bounding_box = None
+    glyphs = {}
+
+    with open(filename, "r") as bdf_file:
+        lines = iter(bdf_file.read().splitlines())
+
+    for line in lines:
+        if line.startswith("FONTBOUNDINGBOX "):
+            bounding_box = tuple(int(value) for value in line.split()[1:5])
+        elif line.startswith("STARTCHAR"):
+            code_point = -1
+            shift = (0, 0)
+            box = (0, 0, 0, 0)
+            rows = []
+
+            for line in lines:
+                if line.startswith("ENCODING "):
+                    code_point = int(line.split()[1])
+                elif line.startswith("DWIDTH "):
+                    shift = tuple(int(value) for value in line.split()[1:3])
+                elif line.startswith("BBX "):
+                    box = tuple(int(value) for value in line.split()[1:5])
+                elif line == "BITMAP":
+                    for _ in range(box[1]):
+                        rows.append(int(next(lines), 16))
+                elif line == "ENDCHAR":
+                    break
+
+            if 0 <= code_point <= 0xFFFF:
+                glyphs[code_point] = box + shift + (rows,)
+
+    return bounding_box, glyphs
+
+
+def build_atlas(bounding_box, glyphs, code_points):
+    """Build the binary atlas
+
+    Arguments:
+        bounding_box {tuple} -- font bounding box
+        glyphs {dict} -- glyphs as returned by parse_bdf()
+        code_points {list} -- code points to include
+
+    Returns:
+        bytes -- atlas
+    """
+    code_points = sorted(set(cp for cp in code_points if cp in glyphs))
+    index = bytearray()
+    data = bytearray()
+    data_start = struct.calcsize(HEADER_FORMAT) + len(code_points) * struct.calcsize(
+        ENTRY_FORMAT
+    )
+
+    for code_point in code_points:
+        width, height, dx, dy, shift_x, shift_y, rows = glyphs[code_point]
+        index.extend(
+            struct.pack(
+                ENTRY_FORMAT,
+                code_point,
+                width,
+                height,
+                dx,
+                dy,
+                shift_x,
+                shift_y,
+                data_start + len(data),
+            )
+        )
+
+        row_bytes = (width + 7) // 8
+        for row in rows:
+            data.extend(row.to_bytes(row_bytes, "big"))
+
+    header = struct.pack(HEADER_FORMAT, b"GLA1", len(code_points), *bounding_box)
+
+    return header + index + data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("bdf", help="BDF font to compile")
+    parser.add_argument(
+        "--glyphs", default=DEFAULT_GLYPHS, help="characters to include"
+    )
+    parser.add_argument("--output", help="atlas file (default: <bdf>.atlas)")
+    args = parser.parse_args()
+
+    bounding_box, glyphs = parse_bdf(args.bdf)
+    atlas = build_atlas(bounding_box, glyphs, [ord(char) for char in args.glyphs])
+    output = args.output or args.bdf.rsplit(".", 1)[0] + ".atlas"
+
+    with open(output, "wb") as atlas_file:
+        atlas_file.write(atlas)
+
+    count = struct.unpack_from("<H", atlas, 4)[0]
+    print(f"{count} glyphs, {len(atlas)} bytes -> {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Pack several BMP images of the same size into one 8 bit indexed
+sprite sheet BMP plus a JSON manifest with the tile index of each image.
+
+Runs on the host (CPython), not on the PyPortal:
+
+    python tools/pack_sprites.py dashboard/images/status_icons.bmp \
+        dashboard/images/linked.bmp dashboard/images/unlinked.bmp ...
+"""
+
+import argparse
+import json
+import os
+import struct
+
+
+def read_bmp(filename):
+    """Read an uncompressed 24 or 32 bit BMP file
+
+    Arguments:
+        filename {str} -- file path+name
+
+    Returns:
+        tuple -- width, height and a list of rows (top row first) with
+            (r, g, b) tuples
+    """
+    with open(filename, "rb") as bmp_file:
+        data = bmp_file.read()
+
+    if data[:2] != b"BM":
+        raise ValueError(f"{filename} is not a BMP file")
+
+    offset = struct.unpack_from("<I", data, 10)[0]
+    width, height, _, depth, compression = struct.unpack_from("<iiHHI", data, 18)
+
+    if depth not in (24, 32) or compression not in (0, 3):
+        raise ValueError(f"{filename}: only 24 and 32 bit BMPs are supported")
+
+    pixel_size = depth // 8
+    row_size = (width * pixel_size + 3) & ~3
+    rows = []
+
+    for row in range(abs(height)):
+        start = offset + row * row_size
+        rows.append(
+            [
+                (data[i + 2], data[i + 1], data[i])
+                for i in range(start, start + width * pixel_size, pixel_size)
+            ]
+        )
+
+    # Positive height means the rows are stored bottom up
+    if height > 0:
+        rows.reverse()
+
+    return width, abs(height), rows
+
+
+def build_palette(images, size=256):
+    """Build a palette with at most size colors. Rarely used colors are
+    mapped to the nearest remaining one.
+
+    Arguments:
+        images {list} -- images as returned by read_bmp()
+
+    Keyword Arguments:
+        size {int} -- maximum number of colors (default: {256})
+
+    Returns:
+        tuple -- palette (list of colors) and a dict mapping every color
+            to its palette index
+    """
+    usage = {}
+    for _, _, rows in images:
+        for row in rows:
+            for color in row:
+                usage[color] = usage.get(color, 0) + 1
+
+    palette = sorted(usage, key=lambda color: -usage[color])[:size]
+    index = {color: i for i, color in enumerate(palette)}
+
+    for color in usage:
+        if color not in index:
+            index[color] = min(
+                range(len(palette)),
+                key=lambda i: sum((a - b) ** 2 for a, b in zip(color, palette[i])),
+            )
+
+    return palette, index
+
+
+def write_sheet(filename, images, palette, index):
+    """Write the images side by side as 8 bit indexed BMP
+
+    Arguments:
+        filename {str} -- file path+name of the sprite sheet
+        images {list} -- images as returned by read_bmp()
+        palette {list} -- palette colors
+        index {dict} -- color to palette index mapping
+    """
+    tile_width, tile_height = images[0][0], images[0][1]
+    width = tile_width * len(images)
+    row_size = (width + 3) & ~3
+    offset = 14 + 40 + 256 * 4
+
+    pixels = bytearray()
+    for row in reversed(range(tile_height)):
+        line = bytearray()
+        for _, _, rows in images:
+            line.extend(index[color] for color in rows[row])
+        pixels.extend(line.ljust(row_size, b"\0"))
+
+    with open(filename, "wb") as sheet:
+        sheet.write(b"BM")
+        sheet.write(struct.pack("<IHHI", offset + len(pixels), 0, 0, offset))
+        sheet.write(
+            struct.pack(
+                "<IiiHHIIiiII",
+                40,
+                width,
+                tile_height,
+                1,
+                8,
+                0,
+                len(pixels),
+                0,
+                0,
+                256,
+                0,
+            )
+        )
+
+        for i in range(256):
+            r, g, b = palette[i] if i < len(palette) else (0, 0, 0)
+            sheet.write(bytes((b, g, r, 0)))
+
+        sheet.write(pixels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sheet", help="sprite sheet BMP to write")
+    parser.add_argument("images", nargs="+", help="BMP images to pack")
+    args = parser.parse_args()
+
+    images = [read_bmp(filename) for filename in args.images]
+
+    if any(image[:2] != images[0][:2] for image in images):
+        raise SystemExit("All images must have the same size")
+
+    palette, index = build_palette(images)
+    write_sheet(args.sheet, images, palette, index)
+
+    manifest = {
+        "tile_width": images[0][0],
+        "tile_height": images[0][1],
+        "tiles": {
+            os.path.basename(filename): i for i, filename in enumerate(args.images)
+        },
+    }
+
+    with open(os.path.splitext(args.sheet)[0] + ".json", "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+
+    print(f"{len(images)} images, {len(palette)} colors -> {args.sheet}")
+
+
+if __name__ == "__main__":
+    main()